@@ -0,0 +1,65 @@
+"""
+Compare FileCRUD.add (one commit + refresh per row) with FileCRUD.add_many.
+
+Runs against a scratch SQLite database so the real tracer.db is untouched:
+
+    python scripts/bench_add_many.py --rows 20000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+
+def make_events(count: int):
+    return [
+        {
+            "event": "modified",
+            "name": f"file_{i}.txt",
+            "is_directory": False,
+            "full_path": f"/tmp/project/src/file_{i}.txt",
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument(
+        "--single-rows",
+        type=int,
+        default=2000,
+        help="Rows inserted through add() (it is much slower)",
+    )
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="tracer-bench-")
+    os.environ["TRACER_DB_URL"] = f"sqlite:///{scratch}/bench.db"
+
+    # Imported after TRACER_DB_URL is set so the engine points at the scratch DB
+    from tracer.db.connection import init_db
+    from tracer.db.crud import FileCRUD
+
+    init_db()
+
+    events = make_events(args.single_rows)
+    start = time.perf_counter()
+    with FileCRUD() as crud:
+        for event in events:
+            crud.add(dict(event))
+    single = time.perf_counter() - start
+
+    events = make_events(args.rows)
+    start = time.perf_counter()
+    with FileCRUD() as crud:
+        first_id, last_id = crud.add_many(events, return_ids=True)
+    bulk = time.perf_counter() - start
+
+    print(f"add():      {args.single_rows / single:12,.0f} rows/s")
+    print(f"add_many(): {args.rows / bulk:12,.0f} rows/s (ids {first_id}-{last_id})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Size and serialization cost of query results: objects vs compact columnar.
+
+Encodes --rows file_system-like rows the way execute_sql_query used to
+(indented list of objects), as unindented objects (the default encoding)
+and with encoding="compact", then decodes each the way the CLI does.
+
+    python scripts/bench_encoding.py --rows 100000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from tracer.utils import decode_columnar, dumps_columnar
+
+COLUMNS = ("id", "event", "name", "is_directory", "full_path", "timestamp", "count")
+EVENTS = ("created", "modified", "deleted", "moved")
+
+
+def make_rows(count, directories):
+    rng = random.Random(0)
+    dirs = [f"/home/user/project/src/module{i % 50}/pkg{i}" for i in range(directories)]
+    base = datetime(2025, 1, 1)
+    rows = []
+    for i in range(1, count + 1):
+        name = f"file_{rng.randrange(100000)}.py"
+        rows.append(
+            (
+                i,
+                rng.choice(EVENTS),
+                name,
+                False,
+                f"{rng.choice(dirs)}/{name}",
+                str(base + timedelta(milliseconds=i * 37)),
+                1,
+            )
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--directories", type=int, default=500)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.directories)
+
+    def objects(indent):
+        data = [dict(zip(COLUMNS, row)) for row in rows]
+        return json.dumps({"status": "success", "data": data}, indent=indent)
+
+    def compact():
+        return (
+            '{"status":"success","encoding":"compact","data":'
+            + dumps_columnar(COLUMNS, rows)
+            + "}"
+        )
+
+    def pretty(payload):
+        # MCPClient.call_tool: parse, then re-dump indented
+        return json.dumps(json.loads(payload), indent=2)
+
+    def columnar(payload):
+        return decode_columnar(json.loads(payload)["data"])
+
+    def timed(fn, *fn_args):
+        began = time.perf_counter()
+        result = fn(*fn_args)
+        return result, (time.perf_counter() - began) * 1000
+
+    print(f"{args.rows} rows, {args.directories} directories")
+    print(f"{'format':<28} {'bytes':>12} {'encode ms':>10} {'decode ms':>10}")
+    for label, encode, decode in (
+        ("objects, indent=2 (before)", lambda: objects(2), pretty),
+        ("objects, no indent", lambda: objects(None), lambda p: json.loads(p)),
+        ("compact columnar", compact, columnar),
+    ):
+        payload, encode_ms = timed(encode)
+        _, decode_ms = timed(decode, payload)
+        print(f"{label:<28} {len(payload):>12,} {encode_ms:>10.1f} {decode_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
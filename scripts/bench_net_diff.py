@@ -0,0 +1,78 @@
+"""
+Cost of one network sample: parsing a /proc/net/tcp table and diffing it.
+
+    python scripts/bench_net_diff.py --sockets 50000 --changes 100
+"""
+
+import argparse
+import random
+import time
+
+from tracer.core.net_tracer import diff_snapshots, parse_table
+
+_HEADER = (
+    b"  sl  local_address rem_address   st tx_queue rx_queue tr tm->when "
+    b"retrnsmt   uid  timeout inode\n"
+)
+
+
+def make_table(rows):
+    lines = [_HEADER]
+    for i, (local, remote, state, inode) in enumerate(rows):
+        lines.append(
+            b"%4d: %s %s %s 00000000:00000000 00:00000000 00000000  1000        0 "
+            b"%d 1 0000000000000000 20 4 30 10 -1\n" % (i, local, remote, state, inode)
+        )
+    return b"".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sockets", type=int, default=50000)
+    parser.add_argument("--changes", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = [
+        (
+            b"0100007F:%04X" % rng.randrange(1024, 65536),
+            b"%08X:%04X" % (rng.getrandbits(32), rng.randrange(1, 65536)),
+            b"01",
+            100000 + i,
+        )
+        for i in range(args.sockets)
+    ]
+    before = make_table(rows)
+
+    # Close some connections, open as many new ones, change a few states
+    changed = list(rows)
+    for i in rng.sample(range(len(changed)), args.changes):
+        local, remote, _, inode = changed[i]
+        changed[i] = (local, remote, b"08", inode)
+    for _ in range(args.changes):
+        changed.pop(rng.randrange(len(changed)))
+    for i in range(args.changes):
+        changed.append(
+            (b"0100007F:1F90", b"0A000001:%04X" % (i + 1), b"01", 900000 + i)
+        )
+    after = make_table(changed)
+
+    def timed(label, fn):
+        began = time.perf_counter()
+        for _ in range(args.rounds):
+            result = fn()
+        elapsed = (time.perf_counter() - began) / args.rounds
+        print(f"{label:<28} {elapsed * 1000:8.2f} ms  ({result})")
+        return result
+
+    print(f"{args.sockets} sockets, {len(after) / 1e6:.1f} MB table")
+    unchanged = bytes(bytearray(before))
+    timed("unchanged table check", lambda: before == unchanged)
+    timed("parse_table", lambda: f"{len(parse_table(before))} rows")
+    previous, current = parse_table(before), parse_table(after)
+    timed("diff_snapshots", lambda: f"{len(diff_snapshots(previous, current))} changes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cost of attributing sockets to processes with SocketOwnerCache.
+
+Builds a fake /proc with --processes PIDs holding --fds descriptors each
+(a quarter of them sockets) and times a cold full walk against the lookups
+a running tracer does for a few changed connections.
+
+    python scripts/bench_socket_owners.py --processes 2000 --fds 50
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from tracer.core.socket_owners import SocketOwnerCache
+
+
+def make_proc(root, processes, fds):
+    owners = {}
+    inode = 100000
+    for pid in range(1, processes + 1):
+        fd_dir = os.path.join(root, str(pid), "fd")
+        os.makedirs(fd_dir)
+        with open(os.path.join(root, str(pid), "comm"), "w") as f:
+            f.write(f"proc{pid}\n")
+        for fd in range(fds):
+            if fd % 4 == 3:
+                inode += 1
+                target = f"socket:[{inode}]"
+                owners[inode] = pid
+            else:
+                target = "/dev/null"
+            os.symlink(target, os.path.join(fd_dir, str(fd)))
+    return owners
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=2000)
+    parser.add_argument("--fds", type=int, default=50)
+    parser.add_argument("--changes", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    uid = os.getuid()
+    # Like /proc/<pid>/fd, tmpfs directories report a size that follows the
+    # number of entries, which the cache uses to find changed fd tables
+    shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    with tempfile.TemporaryDirectory(dir=shm) as root:
+        owners = make_proc(root, args.processes, args.fds)
+        print(f"{args.processes} processes, {len(owners)} sockets")
+
+        def timed(label, cache, sockets):
+            began = time.perf_counter()
+            found = cache.resolve(sockets)
+            elapsed = (time.perf_counter() - began) * 1000
+            stats = cache.stats()
+            print(
+                f"{label:<32} {elapsed:8.2f} ms  ({len(found)}/{len(sockets)} found, "
+                f"{stats['pids_scanned']} pids scanned so far)"
+            )
+
+        everything = dict.fromkeys(owners, uid)
+        timed("cold, every socket (full walk)", SocketOwnerCache(root), everything)
+
+        cache = SocketOwnerCache(root)
+        changed = dict.fromkeys(rng.sample(list(owners), args.changes), uid)
+        timed("cold, changed sockets only", cache, changed)
+        cache.resolve(everything)
+        changed = dict.fromkeys(rng.sample(list(owners), args.changes), uid)
+        timed("warm, changed sockets", cache, changed)
+
+        # A known process opens a new socket
+        pid = rng.randrange(1, args.processes + 1)
+        os.symlink("socket:[1]", os.path.join(root, str(pid), "fd", "new"))
+        timed("warm, one new socket", cache, {1: uid})
+
+
+if __name__ == "__main__":
+    main()
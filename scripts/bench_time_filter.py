@@ -0,0 +1,69 @@
+"""
+Per-line cost of time-range filtering: is_in_range() vs a compiled TimeRange.
+
+    python scripts/bench_time_filter.py --lines 200000
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from tracer.store.log_reader import _scan_line
+from tracer.utils import TimeRange, is_in_range
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    args = parser.parse_args()
+
+    base = datetime.utcnow() - timedelta(hours=1)
+    timestamps = [
+        (base + timedelta(milliseconds=i * 17)).isoformat() for i in range(args.lines)
+    ]
+    lines = [
+        json.dumps(
+            {
+                "event": "modified",
+                "name": "a.txt",
+                "is_directory": False,
+                "full_path": "/tmp/a.txt",
+                "timestamp": ts,
+            }
+        ).encode()
+        for ts in timestamps
+    ]
+    start, end = "45m", "now"
+
+    def timed(label, fn):
+        began = time.perf_counter()
+        matched = fn()
+        elapsed = time.perf_counter() - began
+        per_line = elapsed / args.lines * 1e9
+        print(f"{label:<32} {per_line:10,.0f} ns/line  ({matched} in range)")
+
+    timed(
+        "is_in_range (reparses bounds)",
+        lambda: sum(is_in_range(ts, start, end) for ts in timestamps),
+    )
+
+    time_range = TimeRange(start, end)
+    timed(
+        "TimeRange.contains (ISO string)",
+        lambda: sum(time_range.contains(ts) for ts in timestamps),
+    )
+    timed(
+        "json.loads + is_in_range",
+        lambda: sum(
+            is_in_range(json.loads(line)["timestamp"], start, end) for line in lines
+        ),
+    )
+    timed(
+        "raw line scan with TimeRange",
+        lambda: sum(_scan_line(line, time_range)[0] == 0 for line in lines),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Regression checks for execute_sql_query's result cache invalidation.
+
+Writes that name a table differently from the models (other case, schema
+qualified, quoted) must still invalidate the cached results reading it.
+Runs against a scratch database, never the real tracer.db:
+
+    python scripts/check_result_cache.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+scratch = tempfile.mkdtemp(prefix="tracer-cache-")
+os.environ["TRACER_DB_URL"] = f"sqlite:///{scratch}/tracer.db"
+
+from tracer.db.connection import init_db  # noqa: E402
+from tracer.server.tools import execute_sql_query  # noqa: E402
+
+SELECT = "SELECT id, full_path FROM file_system ORDER BY id"
+INSERT = (
+    "INSERT INTO {table} (event, name, is_directory, full_path, timestamp) "
+    "VALUES ('created', '{name}', 0, '/tmp/{name}', '2025-01-01 00:00:00')"
+)
+
+
+def paths():
+    response = json.loads(execute_sql_query(SELECT))
+    assert response["status"] == "success", response
+    return [row["full_path"] for row in response["data"]]
+
+
+def write(sql_query):
+    response = json.loads(execute_sql_query(sql_query))
+    assert response["status"] == "success", response
+
+
+def check(label, sql_query, expected):
+    paths()  # Cache the result
+    write(sql_query)
+    result = paths()
+    status = "ok" if result == expected else "FAILED"
+    print(f"{status:<7} {label}: {result}")
+    return result == expected
+
+
+def main():
+    init_db()
+    write(INSERT.format(table="file_system", name="a"))
+
+    results = [
+        check("DELETE FROM FILE_SYSTEM", "DELETE FROM FILE_SYSTEM", []),
+        check(
+            "INSERT INTO main.file_system",
+            INSERT.format(table="main.file_system", name="b"),
+            ["/tmp/b"],
+        ),
+        check(
+            'UPDATE "main"."File_System"',
+            'UPDATE "main"."File_System" SET full_path = \'/tmp/c\'',
+            ["/tmp/c"],
+        ),
+    ]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
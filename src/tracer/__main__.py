@@ -1,6 +1,8 @@
 import sys
+import json
 import asyncio
 from collections.abc import Sequence
+from tracer.utils import decode_columnar
 from tracer.cli import (
     CommandParser,
     MCPClient,
@@ -8,24 +10,149 @@ from tracer.cli import (
 )
 
 
+# How often show --follow asks for new events
+FOLLOW_INTERVAL_S = 1.0
+
+
+async def print_query(
+    client: MCPClient,
+    sql_query: str,
+    limit: int = None,
+    query_id: str = None,
+    timeout_s: float = None,
+):
+    """Print a query's rows as one JSON array, fetching pages as they are printed."""
+    printed = 0
+    truncated = False
+    # Columnar pages are a fraction of the size of lists of objects
+    pages = CommandInterface.iter_sql_query(
+        client, sql_query, limit, query_id, timeout_s, encoding="compact"
+    )
+    async for page in pages:
+        if "row_count" not in page:
+            # Error, statement without rows or no rows at all
+            if page.get("encoding") == "compact":
+                page["data"] = decode_columnar(page["data"])
+            if printed:
+                print("\n]")
+            print(json.dumps(page, indent=2), file=sys.stderr if printed else None)
+            return
+        for row in decode_columnar(page["data"]):
+            row = json.dumps(row, indent=2).replace("\n", "\n  ")
+            print(("[\n  " if not printed else ",\n  ") + row, end="")
+            printed += 1
+        sys.stdout.flush()
+        truncated = page["truncated"]
+    print("\n]" if printed else "[]")
+    if truncated:
+        print(
+            "Result truncated: select an id column to page through it", file=sys.stderr
+        )
+
+
+async def show_logs(
+    client: MCPClient,
+    domain: str,
+    limit: int = None,
+    before: str = None,
+    follow: bool = False,
+):
+    """Print a page of events, then with follow the new ones as they arrive."""
+    page = await CommandInterface.show_logs(client, domain, limit, before)
+    print(json.dumps(page, indent=2))
+    if not follow or page["status"] != "success":
+        return
+
+    # Rows are newest first; poll for the ones after the newest
+    rows = page["data"]
+    cursor = f"{rows[0]['timestamp']}#{rows[0]['id']}" if rows else "0001-01-01#0"
+    while True:
+        await asyncio.sleep(FOLLOW_INTERVAL_S)
+        page = await CommandInterface.show_logs(client, domain, limit, after=cursor)
+        if page["status"] != "success":
+            print(json.dumps(page, indent=2), file=sys.stderr)
+            return
+        for row in page["data"]:
+            print(json.dumps(row))
+        sys.stdout.flush()
+        cursor = page["next_cursor"]
+
+
+async def tail_logs(
+    client: MCPClient,
+    domain: str,
+    path_prefix: str = None,
+    events: list = None,
+    after: str = None,
+    interval_ms: int = None,
+):
+    """Print new events as one JSON line each until interrupted."""
+
+    def print_batch(batch):
+        for row in batch["data"]:
+            print(json.dumps(row))
+        sys.stdout.flush()
+        if batch["dropped"]:
+            print(
+                f"{batch['dropped']} events dropped: reading too slowly",
+                file=sys.stderr,
+            )
+
+    # Each call streams for a while; continue from where the last one ended
+    while True:
+        result = await CommandInterface.tail_logs(
+            client, domain, print_batch, path_prefix, events, after, interval_ms
+        )
+        if result["status"] != "success":
+            print(json.dumps(result, indent=2), file=sys.stderr)
+            return
+        after = result["next_cursor"]
+
+
 async def run_app(argv: Sequence[str] | None = None) -> None:
     args = CommandParser().parse_args(argv)
 
     async with MCPClient("http://127.0.0.1:9999/mcp") as client:
         if args.command == "start":
-            result = await CommandInterface.start_tracing(client, args.domain, args.dir)
+            result = await CommandInterface.start_tracing(
+                client,
+                args.domain,
+                args.dir,
+                args.coalesce_ms,
+                args.transient,
+                args.include,
+                args.exclude,
+                args.interval_ms,
+                args.flow_window_ms,
+            )
             print(result)
         elif args.command == "stop":
             result = await CommandInterface.stop_tracing(client, args.domain, args.dir)
             print(result)
-        elif args.command == "show":
-            result = await CommandInterface.show_logs(client, args.domain)
+        elif args.command == "stop-all":
+            result = await CommandInterface.stop_all_tracers(client)
             print(result)
+        elif args.command == "show":
+            await show_logs(client, args.domain, args.limit, args.before, args.follow)
+        elif args.command == "tail":
+            await tail_logs(
+                client,
+                args.domain,
+                args.prefix,
+                args.event,
+                args.after,
+                args.interval_ms,
+            )
         elif args.command == "clear":
             result = await CommandInterface.clear_logs(client, args.domain)
             print(result)
         elif args.command == "query":
-            result = await CommandInterface.execute_sql_query(client, args.sql_query)
+            await print_query(client, args.sql_query, args.limit, args.id, args.timeout)
+        elif args.command == "list-queries":
+            result = await CommandInterface.list_running_queries(client)
+            print(result)
+        elif args.command == "cancel-query":
+            result = await CommandInterface.cancel_query(client, args.query_id)
             print(result)
         elif args.command == "list-domains":
             result = await CommandInterface.list_domains(client)
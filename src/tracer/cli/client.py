@@ -1,5 +1,6 @@
 from mcp.client.session import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.session import ProgressFnT
 from typing import Any, Dict
 from pydantic import AnyUrl
 import json
@@ -31,13 +32,28 @@ class MCPClient:
     async def call_tool(
         self, name: str, arguments: Dict[str, Any] | None = None
     ) -> Any:
+        result = await self.call_tool_json(name, arguments)
+        result = json.dumps(result, indent=2)  # pretty-print JSON
+        return result
+
+    async def call_tool_json(
+        self,
+        name: str,
+        arguments: Dict[str, Any] | None = None,
+        progress_callback: ProgressFnT | None = None,
+    ) -> Dict[str, Any]:
+        """Call a tool and return its parsed JSON response.
+
+        progress_callback receives the progress notifications the tool sends
+        while it runs (e.g. the batches of tail_logs).
+        """
         if not self.session:
             raise RuntimeError("Not connected")
-        result = await self.session.call_tool(name, arguments)
+        result = await self.session.call_tool(
+            name, arguments, progress_callback=progress_callback
+        )
         result = result.content[0].text  # get the text inside TextContent
-        result = json.loads(result)  # parse JSON string
-        result = json.dumps(result, indent=2)  # pretty-print JSON
-        return result
+        return json.loads(result)  # parse JSON string
 
     async def read_resource(self, uri: AnyUrl) -> Any:
         if not self.session:
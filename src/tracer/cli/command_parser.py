@@ -24,6 +24,42 @@ class CommandParser:
             required=False,
             help="Directory to watch (required for 'file_system' domain)",
         )
+        self.start_parser.add_argument(
+            "--coalesce-ms",
+            metavar="MS",
+            type=int,
+            help="Merge events on the same path within this window (0 disables)",
+        )
+        self.start_parser.add_argument(
+            "--transient",
+            choices=["drop", "summary"],
+            help="Drop or summarize files created and deleted within one window",
+        )
+        self.start_parser.add_argument(
+            "--include",
+            metavar="PATTERN",
+            action="append",
+            help="Only trace paths matching this gitignore-style pattern (repeatable)",
+        )
+        self.start_parser.add_argument(
+            "--exclude",
+            metavar="PATTERN",
+            action="append",
+            help="Ignore paths matching this gitignore-style pattern (repeatable)",
+        )
+        self.start_parser.add_argument(
+            "--interval-ms",
+            metavar="MS",
+            type=int,
+            help="How often network connections are sampled ('network' domain)",
+        )
+        self.start_parser.add_argument(
+            "--flow-window-ms",
+            metavar="MS",
+            type=int,
+            help="Store per-flow rollups over windows of this length instead of "
+            "every connection event ('network' domain, 0 for raw events)",
+        )
 
         # Subcommand: logs
         self.logs_parser = self.subparsers.add_parser("show", help="Print logs")
@@ -32,6 +68,57 @@ class CommandParser:
             choices=[d.value for d in LogDomain],
             help="Domain to print logs for",
         )
+        self.logs_parser.add_argument(
+            "-n",
+            "--limit",
+            metavar="ROWS",
+            type=int,
+            help="Number of events to print (default 10)",
+        )
+        self.logs_parser.add_argument(
+            "--before",
+            metavar="CURSOR",
+            help="Print events older than this next_cursor or time (e.g. '1h')",
+        )
+        self.logs_parser.add_argument(
+            "-f",
+            "--follow",
+            action="store_true",
+            help="Keep printing new events as they are written",
+        )
+
+        # Subcommand: tail
+        self.tail_parser = self.subparsers.add_parser(
+            "tail", help="Stream new events as they are written"
+        )
+        self.tail_parser.add_argument(
+            "domain",
+            choices=[d.value for d in LogDomain],
+            help="Domain to stream events of",
+        )
+        self.tail_parser.add_argument(
+            "--prefix",
+            metavar="PREFIX",
+            help="Only events whose full_path (file_system) or remote_address (network) starts with PREFIX",
+        )
+        self.tail_parser.add_argument(
+            "-e",
+            "--event",
+            metavar="EVENT",
+            action="append",
+            help="Only events of this type, e.g. 'created' or 'opened' (repeatable)",
+        )
+        self.tail_parser.add_argument(
+            "--interval-ms",
+            metavar="MS",
+            type=int,
+            help="How often new events are delivered (default 500)",
+        )
+        self.tail_parser.add_argument(
+            "--after",
+            metavar="CURSOR",
+            help="Start after this next_cursor instead of now",
+        )
 
         # Subcommand: stop
         self.stop_parser = self.subparsers.add_parser("stop", help="Stop tracing")
@@ -48,6 +135,11 @@ class CommandParser:
             help="Directory to stop watching (required for 'file_system' domain)",
         )
 
+        # Subcommand: stop-all
+        self.stop_all_parser = self.subparsers.add_parser(
+            "stop-all", help="Stop every active tracer"
+        )
+
         # Subcommand: query
         self.query_parser = self.subparsers.add_parser(
             "query", help="Execute SQL query"
@@ -56,6 +148,37 @@ class CommandParser:
             "sql_query",
             help="SQL query to execute",
         )
+        self.query_parser.add_argument(
+            "--limit",
+            metavar="ROWS",
+            type=int,
+            help="Rows fetched per page (pages are fetched as they are printed)",
+        )
+        self.query_parser.add_argument(
+            "--id",
+            metavar="QUERY_ID",
+            help="Id to stop the query with ('tracer cancel-query QUERY_ID')",
+        )
+        self.query_parser.add_argument(
+            "--timeout",
+            metavar="SECONDS",
+            type=float,
+            help="Stop the query after this many seconds",
+        )
+
+        # Subcommand: list-queries
+        self.list_queries_parser = self.subparsers.add_parser(
+            "list-queries", help="List running SQL queries"
+        )
+
+        # Subcommand: cancel-query
+        self.cancel_query_parser = self.subparsers.add_parser(
+            "cancel-query", help="Stop a running SQL query"
+        )
+        self.cancel_query_parser.add_argument(
+            "query_id",
+            help="Id of the query (see 'tracer list-queries')",
+        )
 
         # Subcommand: list-domains
         self.list_domains_parser = self.subparsers.add_parser(
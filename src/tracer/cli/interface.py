@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from .client import MCPClient
 import asyncio
 import json
@@ -8,20 +8,83 @@ class CommandInterface:
     """Interface class that wraps MCP tool calls for tracer functionality"""
 
     @staticmethod
-    async def execute_sql_query(client: MCPClient, sql_query: str) -> Dict[str, Any]:
+    async def execute_sql_query(
+        client: MCPClient, sql_query: str, limit: Optional[int] = None
+    ) -> Dict[str, Any]:
         """Executes advanced SQL queries and returns results in JSON format"""
         arguments = {"sql_query": sql_query}
+        if limit is not None:
+            arguments["limit"] = limit
         result = await client.call_tool("execute_sql_query", arguments)
         return result
 
+    @staticmethod
+    async def iter_sql_query(
+        client: MCPClient,
+        sql_query: str,
+        limit: Optional[int] = None,
+        query_id: Optional[str] = None,
+        timeout_s: Optional[float] = None,
+        encoding: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yields the pages of a query's result, fetching each one only when needed"""
+        arguments = {"sql_query": sql_query}
+        if limit is not None:
+            arguments["limit"] = limit
+        if query_id is not None:
+            arguments["query_id"] = query_id
+        if timeout_s is not None:
+            arguments["timeout_s"] = timeout_s
+        if encoding is not None:
+            arguments["encoding"] = encoding
+        while True:
+            page = await client.call_tool_json("execute_sql_query", arguments)
+            yield page
+            if not page.get("next_page_token"):
+                return
+            arguments["page_token"] = page["next_page_token"]
+
+    @staticmethod
+    async def list_running_queries(client: MCPClient) -> Dict[str, Any]:
+        """Returns the SQL queries currently executing"""
+        result = await client.call_tool("list_running_queries", {})
+        return result
+
+    @staticmethod
+    async def cancel_query(client: MCPClient, query_id: str) -> Dict[str, Any]:
+        """Stops a running SQL query"""
+        arguments = {"query_id": query_id}
+        result = await client.call_tool("cancel_query", arguments)
+        return result
+
     @staticmethod
     async def start_tracing(
-        client: MCPClient, domain: str, directory: Optional[str] = None
+        client: MCPClient,
+        domain: str,
+        directory: Optional[str] = None,
+        coalesce_window_ms: Optional[int] = None,
+        coalesce_transient: Optional[str] = None,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        interval_ms: Optional[int] = None,
+        flow_window_ms: Optional[int] = None,
     ) -> Dict[str, Any]:
         """Starts tracing for the specified domain and optional directory"""
         arguments = {"domain": domain}
         if directory is not None:
             arguments["directory"] = directory
+        if coalesce_window_ms is not None:
+            arguments["coalesce_window_ms"] = coalesce_window_ms
+        if coalesce_transient is not None:
+            arguments["coalesce_transient"] = coalesce_transient
+        if include:
+            arguments["include"] = include
+        if exclude:
+            arguments["exclude"] = exclude
+        if interval_ms is not None:
+            arguments["interval_ms"] = interval_ms
+        if flow_window_ms is not None:
+            arguments["flow_window_ms"] = flow_window_ms
         result = await client.call_tool("start_tracing", arguments)
         return result
 
@@ -36,6 +99,12 @@ class CommandInterface:
         result = await client.call_tool("stop_tracing", arguments)
         return result
 
+    @staticmethod
+    async def stop_all_tracers(client: MCPClient) -> Dict[str, Any]:
+        """Stops every active tracer"""
+        result = await client.call_tool("stop_all_tracers", {})
+        return result
+
     @staticmethod
     async def list_tracers(client: MCPClient) -> Dict[str, Any]:
         """Returns JSON formatted list of all active tracers and their configurations"""
@@ -62,12 +131,50 @@ class CommandInterface:
         return result
 
     @staticmethod
-    async def show_logs(client: MCPClient, domain: str) -> Dict[str, Any]:
-        """Executes advanced SQL queries and returns results in JSON format"""
-        arguments = {
-            "sql_query": f"SELECT * FROM {domain} ORDER BY timestamp DESC LIMIT 10"
-        }
-        result = await client.call_tool("execute_sql_query", arguments)
+    async def show_logs(
+        client: MCPClient,
+        domain: str,
+        limit: Optional[int] = None,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Returns the newest events of a domain, or those before/after a cursor"""
+        arguments = {"domain": domain}
+        if limit is not None:
+            arguments["limit"] = limit
+        if before is not None:
+            arguments["before"] = before
+        if after is not None:
+            arguments["after"] = after
+        result = await client.call_tool_json("show_logs", arguments)
+        return result
+
+    @staticmethod
+    async def tail_logs(
+        client: MCPClient,
+        domain: str,
+        on_batch: Callable[[Dict[str, Any]], None],
+        path_prefix: Optional[str] = None,
+        events: Optional[List[str]] = None,
+        after: Optional[str] = None,
+        interval_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Streams new events of a domain to on_batch until the call returns"""
+        arguments = {"domain": domain}
+        if path_prefix is not None:
+            arguments["path_prefix"] = path_prefix
+        if events:
+            arguments["events"] = events
+        if after is not None:
+            arguments["after"] = after
+        if interval_ms is not None:
+            arguments["interval_ms"] = interval_ms
+
+        async def on_progress(progress, total, message):
+            if message:
+                on_batch(json.loads(message))
+
+        result = await client.call_tool_json("tail_logs", arguments, on_progress)
         return result
 
     @staticmethod
@@ -1,4 +1,5 @@
 # Central config (e.g., paths, domains, etc.)
+import os
 from pathlib import Path
 from enum import Enum
 
@@ -32,4 +33,224 @@ FS_LOG_FILE = get_log_file(LogDomain.FS)
 NET_LOG_FILE = get_log_file(LogDomain.NET)
 
 
-DB_URL = f"sqlite:///{LOG_DIR}/tracer.db"
+# Can be overridden, e.g. to point benchmarks at a scratch database
+DB_URL = os.environ.get("TRACER_DB_URL", f"sqlite:///{LOG_DIR}/tracer.db")
+
+
+# Sparse timestamp -> byte offset index kept next to each JSONL log. An entry
+# is added every LOG_INDEX_EVERY_LINES lines or LOG_INDEX_EVERY_BYTES bytes.
+LOG_INDEX_EVERY_LINES = 1000
+LOG_INDEX_EVERY_BYTES = 256 * 1024
+
+# Log rotation: the active <domain>.jsonl is sealed into a numbered segment
+# once it reaches LOG_ROTATE_MAX_BYTES or its oldest line is older than
+# LOG_ROTATE_MAX_AGE_S (None disables either check). Retention then deletes
+# the oldest segments beyond LOG_RETENTION_MAX_SEGMENTS / LOG_RETENTION_MAX_BYTES.
+LOG_ROTATE_MAX_BYTES = 64 * 1024 * 1024
+LOG_ROTATE_MAX_AGE_S = 24 * 60 * 60
+LOG_RETENTION_MAX_SEGMENTS = 50
+LOG_RETENTION_MAX_BYTES = None
+
+
+# Ingestion settings: events are queued and group-committed by a writer thread
+# once INGEST_BATCH_SIZE events or INGEST_FLUSH_INTERVAL_MS milliseconds have
+# accumulated, whichever comes first.
+INGEST_BATCHED = True
+INGEST_BATCH_SIZE = 500
+INGEST_FLUSH_INTERVAL_MS = 200
+# Whether pending events are written (True) or discarded (False) on shutdown
+INGEST_DRAIN_ON_STOP = True
+# At most INGEST_QUEUE_MAX_EVENTS events wait in memory per domain. Beyond
+# that they spill to <domain>.spill in LOG_DIR, up to INGEST_SPILL_MAX_BYTES
+# (None disables spilling). When neither has room, INGEST_OVERFLOW_POLICY
+# applies: "block" makes the producer wait, "drop_oldest" discards the oldest
+# queued event and "sample" keeps one in every INGEST_SAMPLE_EVERY new events.
+INGEST_QUEUE_MAX_EVENTS = 50_000
+INGEST_SPILL_MAX_BYTES = 256 * 1024 * 1024
+INGEST_OVERFLOW_POLICY = "block"
+INGEST_SAMPLE_EVERY = 10
+
+# The newest RECENT_EVENTS_CAPACITY rows written per domain are kept in memory
+# to answer show_logs without touching the database
+RECENT_EVENTS_CAPACITY = 1000
+# Rows returned by show_logs when no limit is given, and the most it returns
+SHOW_LOGS_DEFAULT_LIMIT = 10
+SHOW_LOGS_MAX_LIMIT = 1000
+
+# Live tail: new events are delivered in batches of at most TAIL_MAX_BATCH
+# every TAIL_INTERVAL_MS. Each subscriber buffers at most TAIL_BUFFER_EVENTS
+# undelivered events and drops the oldest beyond that, so a slow consumer
+# never holds up ingestion. A tail call returns after TAIL_DURATION_S (at
+# most TAIL_MAX_DURATION_S) or TAIL_MAX_EVENTS events, to be called again.
+TAIL_INTERVAL_MS = 500
+TAIL_MAX_BATCH = 500
+TAIL_BUFFER_EVENTS = 10_000
+TAIL_DURATION_S = 60.0
+TAIL_MAX_DURATION_S = 3600.0
+TAIL_MAX_EVENTS = 100_000
+
+
+# Filesystem event coalescing (per tracer, 0 disables it): events on the same
+# path arriving within FS_COALESCE_WINDOW_MS of each other are merged into one
+# record, held at most FS_COALESCE_MAX_HOLD_MS (None means 10x the window).
+# Paths created and deleted inside a window are dropped or kept as a single
+# "transient" record depending on FS_COALESCE_TRANSIENT ("drop" or "summary").
+FS_COALESCE_WINDOW_MS = 0
+FS_COALESCE_MAX_HOLD_MS = None
+FS_COALESCE_TRANSIENT = "summary"
+FS_COALESCE_EVENTS = (
+    "created",
+    "deleted",
+    "modified",
+    "opened",
+    "closed",
+    "closed_no_write",
+)
+
+
+# Network tracing samples the kernel connection tables under NET_PROC_ROOT
+# every NET_SAMPLE_INTERVAL_MS and logs connections that were opened, closed
+# or changed state. With NET_REPORT_INITIAL the first sample also logs every
+# connection already open, as "present" events.
+NET_SAMPLE_INTERVAL_MS = 1000
+NET_PROC_ROOT = "/proc"
+NET_PROTOCOLS = ("tcp", "tcp6", "udp", "udp6")
+NET_REPORT_INITIAL = True
+
+# Network events are attributed to a process by finding the socket inode in
+# /proc/<pid>/fd. The mapping is cached: only connections that changed and
+# are not in the cache trigger a scan, which visits the socket owner's and
+# new (or reused, detected by a different /proc/<pid> ctime) PIDs first and
+# stops once everything was found. A socket that could not be found is
+# searched for again after NET_OWNER_RESCAN_MS. Closed connections are only
+# looked up in the cache.
+NET_RESOLVE_OWNERS = True
+NET_OWNER_RESCAN_MS = 1000
+
+# With NET_FLOW_WINDOW_MS > 0 network tracing stores one row per flow
+# (process, protocol, remote address, port) and tumbling window in the
+# network_flows table instead of one row per connection event; 0 keeps the
+# raw events. start_tracing(flow_window_ms=...) overrides it per tracer.
+NET_FLOW_WINDOW_MS = 0
+
+# Interface (/proc/net/dev) and protocol (/proc/net/snmp) counters are sampled
+# every NET_COUNTERS_INTERVAL_MS (0 disables it) and kept delta-encoded in
+# memory for NET_COUNTERS_RING_SECONDS, where get_network_rates reads recent
+# ranges from. Only points downsampled to NET_COUNTERS_RESOLUTIONS_S are
+# written to the network_counters table, and only for counters that moved.
+NET_COUNTERS_INTERVAL_MS = 100
+NET_COUNTERS_RING_SECONDS = 600
+NET_COUNTERS_RESOLUTIONS_S = (1, 60)
+NET_DEV_COUNTERS = (
+    "rx_bytes",
+    "rx_packets",
+    "rx_errs",
+    "rx_drop",
+    "tx_bytes",
+    "tx_packets",
+    "tx_errs",
+    "tx_drop",
+)
+NET_SNMP_COUNTERS = {
+    "Ip": ("InReceives", "OutRequests", "InDiscards", "OutDiscards"),
+    "Tcp": (
+        "ActiveOpens",
+        "PassiveOpens",
+        "AttemptFails",
+        "EstabResets",
+        "InSegs",
+        "OutSegs",
+        "RetransSegs",
+        "InErrs",
+        "OutRsts",
+    ),
+    "Udp": (
+        "InDatagrams",
+        "OutDatagrams",
+        "NoPorts",
+        "InErrors",
+        "RcvbufErrors",
+        "SndbufErrors",
+    ),
+}
+# Largest number of points per series returned by get_network_rates
+NET_RATES_MAX_POINTS = 1000
+
+
+# execute_sql_query returns results in pages of SQL_PAGE_ROWS rows (callers
+# may ask for up to SQL_PAGE_MAX_ROWS) and never more than SQL_PAGE_MAX_BYTES
+# of serialized rows per page; next_page_token fetches the following page.
+SQL_PAGE_ROWS = 500
+SQL_PAGE_MAX_ROWS = 10_000
+SQL_PAGE_MAX_BYTES = 4 * 1024 * 1024
+
+# Budgets of one execute_sql_query call; callers may only lower them. The
+# VM-step budget counts SQLite virtual machine instructions, checked every
+# SQL_PROGRESS_STEPS of them, so an expensive plan is stopped even when the
+# machine is fast enough to stay under the time budget for a while.
+SQL_QUERY_TIMEOUT_S = 30.0
+SQL_QUERY_MAX_VM_STEPS = 1_000_000_000
+SQL_PROGRESS_STEPS = 10_000
+
+# execute_sql_query keeps up to SQL_CACHE_MAX_BYTES of serialized results
+# (least recently used first out, 0 disables the cache). A result stays
+# valid until a write commits to one of the tables it read; results bigger
+# than SQL_CACHE_MAX_ENTRY_BYTES are not kept.
+SQL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+SQL_CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+
+# Database retention per domain, covering the domain's extra tables too
+# (network_flows, network_counters): rows older than max_age_s are deleted,
+# then the oldest rows beyond max_rows, then the oldest beyond max_bytes of
+# table and index pages (None disables a limit). Every limit ships disabled,
+# so nothing is ever deleted unless asked for: set them here, e.g.
+#     "file_system": {"max_age_s": 30 * 24 * 60 * 60, "max_rows": None,
+#                     "max_bytes": 2 * 1024 * 1024 * 1024},
+# or at runtime with the set_retention_policy tool. A background job
+# enforces the policies every RETENTION_INTERVAL_S (0 stops the job),
+# deleting at most RETENTION_CHUNK_ROWS rows per transaction and pausing
+# RETENTION_CHUNK_PAUSE_MS between them so ingestion is never held up for
+# long. Freed pages are then given back to the OS with incremental_vacuum,
+# RETENTION_VACUUM_PAGES at a time, on databases created with
+# auto_vacuum=INCREMENTAL (see STORAGE_PROFILES).
+RETENTION_POLICIES = {
+    "file_system": {"max_age_s": None, "max_rows": None, "max_bytes": None},
+    "network": {"max_age_s": None, "max_rows": None, "max_bytes": None},
+}
+RETENTION_INTERVAL_S = 60 * 60
+RETENTION_CHUNK_ROWS = 5000
+RETENTION_CHUNK_PAUSE_MS = 50
+RETENTION_VACUUM_PAGES = 1000
+
+
+# Longest time stopping a tracer waits for its buffered events to be written
+TRACER_STOP_TIMEOUT_S = 5.0
+
+
+# SQLite storage profiles. Each entry is applied as PRAGMAs on every new
+# connection; checkpoint_interval_s controls how often the writer runs
+# wal_checkpoint(PASSIVE) and read_pool_size the number of read-only
+# connections used for queries. auto_vacuum only takes effect when the
+# database file is created; existing files keep their mode.
+STORAGE_PROFILES = {
+    # Rollback journal and synchronous=FULL, as SQLite ships; only
+    # auto_vacuum differs, so retention can give freed pages back
+    "default": {
+        "auto_vacuum": "INCREMENTAL",
+        "busy_timeout": 5000,
+        "read_pool_size": 1,
+    },
+    # Write-ahead log so queries never block ingestion and vice versa
+    "wal": {
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,  # Negative values are KiB
+        "busy_timeout": 5000,
+        "checkpoint_interval_s": 30,
+        "read_pool_size": 4,
+    },
+}
+STORAGE_PROFILE = os.environ.get("TRACER_STORAGE_PROFILE", "wal")
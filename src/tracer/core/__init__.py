@@ -1,7 +1,10 @@
-from .base_tracer import BaseTracer
+from .base_tracer import BaseTracer, TracerState
 from .fs_tracer import FileTracer
+from .net_tracer import NetTracer
 
 __all__ = [
     "BaseTracer",
+    "TracerState",
     "FileTracer",
+    "NetTracer",
 ]
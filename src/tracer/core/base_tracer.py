@@ -1,14 +1,109 @@
+import threading
+import time
+from enum import Enum
+from typing import List, Optional, Tuple
 from tracer.store import LogWriter
 from tracer import LogDomain
+from tracer.config import TRACER_STOP_TIMEOUT_S
+
+# Number of state transitions kept for list_tracers
+_HISTORY_SIZE = 10
+
+
+class TracerState(Enum):
+    CREATED = "created"
+    STARTING = "starting"
+    RUNNING = "running"
+    DRAINING = "draining"
+    STOPPED = "stopped"
+    FAILED = "failed"
+
+    def __str__(self):
+        return self.value
 
 
 # Abstract base class for tracers
 class BaseTracer:
+    """
+    Tracer lifecycle: created -> starting -> running -> draining -> stopped.
+
+    start() and stop() never block on a polling loop: subclasses implement
+    _start()/_stop(), and tracers that run a thread of their own wait on
+    ``self.stop_event`` so they wake up as soon as a stop is requested.
+    """
+
     def __init__(self, domain: LogDomain):
+        self.domain = domain
         self.writer = LogWriter(domain)
+        self.stop_event = threading.Event()
+        self.error: Optional[str] = None
+        self.state = TracerState.CREATED
+        self.transitions: List[Tuple[str, float]] = [(str(self.state), time.time())]
+        self._state_lock = threading.Lock()
 
     def start(self):
-        raise NotImplementedError
+        """Start tracing; raises if the tracer could not be started."""
+        with self._state_lock:
+            if self.state is not TracerState.CREATED:
+                raise RuntimeError(f"Tracer cannot be started while {self.state}")
+            self._set_state(TracerState.STARTING)
+        try:
+            self._start()
+        except Exception as e:
+            self.error = str(e)
+            self.stop_event.set()
+            self._set_state(TracerState.FAILED)
+            raise
+        self._set_state(TracerState.RUNNING)
+
+    def stop(self, timeout: Optional[float] = TRACER_STOP_TIMEOUT_S) -> bool:
+        """
+        Stop tracing and write out buffered events.
+
+        Args:
+            timeout: Maximum number of seconds to wait for buffered events.
+
+        Returns:
+            True if every buffered event was written before returning.
+        """
+        with self._state_lock:
+            if self.state in (TracerState.DRAINING, TracerState.STOPPED):
+                return True
+            self.stop_event.set()
+            self._set_state(TracerState.DRAINING)
+        try:
+            self._stop()
+        except Exception as e:
+            self.error = str(e)
+            self._set_state(TracerState.FAILED)
+            raise
+        drained = self.drain(timeout)
+        self._set_state(TracerState.STOPPED)
+        return drained
+
+    def drain(self, timeout: Optional[float] = TRACER_STOP_TIMEOUT_S) -> bool:
+        """Wait until events produced so far are written; False on timeout."""
+        return self.writer.flush(timeout)
+
+    def status(self) -> dict:
+        """Current state, when it was entered and the recent transitions."""
+        state, since = self.transitions[-1]
+        return {
+            "state": state,
+            "state_since": since,
+            "error": self.error,
+            "transitions": [
+                {"state": state, "at": at} for state, at in self.transitions
+            ],
+        }
+
+    def _set_state(self, state: TracerState):
+        self.state = state
+        self.transitions.append((str(state), time.time()))
+        del self.transitions[:-_HISTORY_SIZE]
+
+    def _start(self):
+        raise NotImplementedError(f"{type(self).__name__} does not implement tracing")
 
-    def stop(self):
-        raise NotImplementedError
+    def _stop(self):
+        pass
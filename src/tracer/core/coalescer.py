@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from tracer.config import (
+    FS_COALESCE_WINDOW_MS,
+    FS_COALESCE_MAX_HOLD_MS,
+    FS_COALESCE_TRANSIENT,
+    FS_COALESCE_EVENTS,
+)
+
+# When several event types are merged, the record keeps the most significant one
+_PRIORITY = {"created": 4, "deleted": 3, "modified": 2}
+
+
+class EventCoalescer:
+    """
+    Merges bursts of events on the same path into a single record.
+
+    Events on a path are held while new ones keep arriving within
+    ``window_ms`` of the previous one (but never longer than ``max_hold_ms``).
+    The emitted record carries ``count`` plus ``first_timestamp``/``timestamp``
+    for the first/last merged event. A path created and deleted inside one
+    window is either dropped or emitted as a single ``transient`` record.
+
+    Records come out later than events that were not held, with older
+    timestamps. With ``polled`` set, add() hands nothing out: every record
+    and passed-through event waits for expire(), which the writer thread
+    polls, and hold() tells the writer how old the records still held are,
+    so it can write everything in timestamp order.
+    """
+
+    def __init__(
+        self,
+        window_ms: int = FS_COALESCE_WINDOW_MS,
+        max_hold_ms: Optional[int] = FS_COALESCE_MAX_HOLD_MS,
+        transient: str = FS_COALESCE_TRANSIENT,
+        events: Iterable[str] = FS_COALESCE_EVENTS,
+        polled: bool = False,
+    ):
+        """
+        Initialize the coalescer.
+
+        Args:
+            window_ms: Quiet time after the last event before a record is emitted.
+            max_hold_ms: Upper bound on how long a busy path is held.
+            transient: "drop" or "summary" for paths created and deleted in a window.
+            events: Event types that may be merged; others pass straight through.
+            polled: Hand records out from expire() only (see the class docstring).
+        """
+        if transient not in ("drop", "summary"):
+            raise ValueError(f"Invalid transient policy '{transient}'")
+        self.window = window_ms / 1000.0
+        self.max_hold = (
+            max_hold_ms if max_hold_ms is not None else window_ms * 10
+        ) / 1000.0
+        self.transient = transient
+        self.events = set(events)
+        self.polled = polled
+
+        # full_path -> pending record, ordered by time of the last update
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Records and events ready to go, waiting for expire() when polled
+        self._ready: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+        self.received = 0
+        self.emitted = 0
+        self.dropped_transient = 0
+
+    def add(
+        self, event: Dict[str, Any], related: Iterable[str] = ()
+    ) -> List[Dict[str, Any]]:
+        """
+        Feed one event.
+
+        Args:
+            event: The event; it is stamped now if it has no timestamp
+            related: Other paths the event touches (e.g. a move's destination)
+
+        Returns:
+            Records that are ready to be written now (none when polled)
+        """
+        now = time.monotonic()
+        path = event["full_path"]
+
+        with self._lock:
+            self.received += 1
+            event.setdefault("timestamp", datetime.utcnow())
+            pending = self._pending.get(path)
+
+            if event["event"] not in self.events:
+                # Keep ordering for the paths it touches: emit what was held
+                # on them before it
+                for touched in (path, *related):
+                    if touched in self._pending:
+                        self._ready.extend(self._finish(self._pending.pop(touched)))
+                self._ready.append(event)
+            elif pending is None or now - pending["_held_since"] >= self.max_hold:
+                if pending is not None:
+                    self._ready.extend(self._finish(self._pending.pop(path)))
+                self._pending[path] = self._start(event, now)
+            else:
+                self._merge(pending, event, now)
+                self._pending.move_to_end(path)
+
+            if self.polled:
+                return []
+            return self._take(now)
+
+    def expire(self) -> List[Dict[str, Any]]:
+        """Return records whose window has elapsed."""
+        with self._lock:
+            return self._take(time.monotonic())
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """
+        Return every held record, regardless of its window.
+
+        When polled, they are left for the next expire() instead.
+        """
+        with self._lock:
+            while self._pending:
+                _, pending = self._pending.popitem(last=False)
+                self._ready.extend(self._finish(pending))
+            if self.polled:
+                return []
+            return self._take(time.monotonic())
+
+    def hold(self) -> Optional[datetime]:
+        """Oldest timestamp a later call may still return (None if none)."""
+        with self._lock:
+            timestamps = [event["timestamp"] for event in self._ready]
+            if self._pending:
+                # Ordered by last update, so the first one has the oldest
+                timestamps.append(next(iter(self._pending.values()))["timestamp"])
+            return min(timestamps, default=None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "window_ms": int(self.window * 1000),
+            "received": self.received,
+            "emitted": self.emitted,
+            "dropped_transient": self.dropped_transient,
+            "pending": len(self._pending),
+        }
+
+    def _take(self, now: float) -> List[Dict[str, Any]]:
+        """The ready records, then those whose window elapsed."""
+        ready, self._ready = self._ready, []
+        while self._pending:
+            path, pending = next(iter(self._pending.items()))
+            if now - pending["_updated"] < self.window:
+                break
+            del self._pending[path]
+            ready.extend(self._finish(pending))
+        self.emitted += len(ready)
+        return ready
+
+    def _start(self, event: Dict[str, Any], now: float) -> Dict[str, Any]:
+        record = dict(event)
+        record["first_timestamp"] = event["timestamp"]
+        record["count"] = 1
+        record["_created"] = event["event"] == "created"
+        record["_deleted"] = event["event"] == "deleted"
+        record["_held_since"] = now
+        record["_updated"] = now
+        return record
+
+    def _merge(self, record: Dict[str, Any], event: Dict[str, Any], now: float):
+        record["count"] += 1
+        record["timestamp"] = event["timestamp"]
+        record["_updated"] = now
+        if event["event"] == "created":
+            record["_deleted"] = False  # Re-created after a delete
+        elif event["event"] == "deleted":
+            record["_deleted"] = True
+        if _PRIORITY.get(event["event"], 1) >= _PRIORITY.get(record["event"], 1):
+            record["event"] = event["event"]
+
+    def _finish(self, record: Dict[str, Any]) -> List[Dict[str, Any]]:
+        created = record.pop("_created")
+        deleted = record.pop("_deleted")
+        del record["_held_since"], record["_updated"]
+
+        if created and deleted:
+            if self.transient == "drop":
+                self.dropped_transient += 1
+                return []
+            record["event"] = "transient"
+        return [record]
@@ -0,0 +1,381 @@
+import math
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from tracer.config import (
+    NET_PROC_ROOT,
+    NET_COUNTERS_INTERVAL_MS,
+    NET_COUNTERS_RING_SECONDS,
+    NET_COUNTERS_RESOLUTIONS_S,
+    NET_DEV_COUNTERS,
+    NET_SNMP_COUNTERS,
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Columns of /proc/net/dev after the interface name
+_DEV_FIELDS = (
+    "rx_bytes",
+    "rx_packets",
+    "rx_errs",
+    "rx_drop",
+    "rx_fifo",
+    "rx_frame",
+    "rx_compressed",
+    "rx_multicast",
+    "tx_bytes",
+    "tx_packets",
+    "tx_errs",
+    "tx_drop",
+    "tx_fifo",
+    "tx_colls",
+    "tx_carrier",
+    "tx_compressed",
+)
+
+# time -> rate, per series
+RateSeries = Dict[str, List[Tuple[float, float]]]
+
+
+def parse_dev(data: str, counters: Iterable[str] = NET_DEV_COUNTERS) -> Dict[str, int]:
+    """Parse /proc/net/dev into {"<interface>.<counter>": value}."""
+    columns = [(i, name) for i, name in enumerate(_DEV_FIELDS) if name in counters]
+    values = {}
+    for line in data.splitlines()[2:]:
+        interface, _, fields = line.partition(":")
+        fields = fields.split()
+        interface = interface.strip()
+        for i, name in columns:
+            values[f"{interface}.{name}"] = int(fields[i])
+    return values
+
+
+def parse_snmp(
+    data: str, counters: Dict[str, Iterable[str]] = NET_SNMP_COUNTERS
+) -> Dict[str, int]:
+    """Parse /proc/net/snmp into {"<Protocol>.<Counter>": value}."""
+    values = {}
+    lines = data.splitlines()
+    # Each protocol is a line of names followed by a line of values
+    for header, row in zip(lines[::2], lines[1::2]):
+        protocol, _, names = header.partition(":")
+        wanted = counters.get(protocol)
+        if not wanted:
+            continue
+        for name, value in zip(names.split(), row.partition(":")[2].split()):
+            if name in wanted:
+                values[f"{protocol}.{name}"] = int(value)
+    return values
+
+
+def to_datetime(epoch: float) -> datetime:
+    """Epoch seconds to the naive UTC datetimes stored by the tracers."""
+    return _EPOCH + timedelta(seconds=epoch)
+
+
+class CounterRing:
+    """
+    Fixed-size ring of counter samples, delta-encoded in arrays.
+
+    Each slot holds the milliseconds since the previous sample (array "I")
+    and, per series, how much the counter grew in that time (array "q"), so a
+    slot costs 4 + 8 * series bytes and rates need no subtraction. Absolute
+    values are only kept for the newest sample, to encode the next one.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._elapsed = array("I", bytes(4 * capacity))
+        self._deltas: Dict[str, array] = {}
+        self._last: Dict[str, int] = {}
+        self._head = 0  # Slot the next sample goes into
+        self._span_ms = 0  # Time covered by the retained slots
+        self.size = 0
+        self.newest: Optional[float] = None  # Epoch seconds of the newest sample
+
+    @property
+    def oldest(self) -> Optional[float]:
+        """Start of the oldest retained interval (epoch seconds)."""
+        if self.newest is None:
+            return None
+        return self.newest - self._span_ms / 1000
+
+    def append(self, timestamp: float, values: Dict[str, int]) -> Dict[str, int]:
+        """
+        Add the absolute counter values read at timestamp.
+
+        Returns:
+            How much each counter that moved grew since the previous sample
+        """
+        if self.newest is None:
+            self._last, self.newest = values, timestamp
+            return {}
+
+        slot = self._head
+        elapsed = max(0, round((timestamp - self.newest) * 1000))
+        if self.size == self.capacity:
+            self._span_ms -= self._elapsed[slot]
+        self._elapsed[slot] = elapsed
+        self._span_ms += elapsed
+
+        moved = {}
+        for name, value in values.items():
+            deltas = self._deltas.get(name)
+            if deltas is None:
+                deltas = self._deltas[name] = array("q", bytes(8 * self.capacity))
+            # A counter that went backwards was reset (e.g. interface re-created)
+            delta = max(0, value - self._last.get(name, value))
+            deltas[slot] = delta
+            if delta:
+                moved[name] = delta
+        for name, deltas in self._deltas.items():
+            if name not in values:
+                deltas[slot] = 0  # Interface went away
+
+        self._last, self.newest = values, timestamp
+        self._head = (slot + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return moved
+
+    def covers(self, start: float) -> bool:
+        """True if the samples since start are all still in memory."""
+        return self.newest is not None and self.oldest <= start
+
+    def rates(
+        self,
+        start: float,
+        end: Optional[float] = None,
+        names: Optional[List[str]] = None,
+        step: Optional[float] = None,
+    ) -> RateSeries:
+        """
+        Per-second rates of the series between start and end.
+
+        Args:
+            start: Epoch seconds
+            end: Epoch seconds (defaults to the newest sample)
+            names: Series names or name prefixes ("eth0.", "Tcp.RetransSegs")
+            step: Average the samples over buckets of this many seconds
+
+        Returns:
+            Series name -> [(end of interval in epoch seconds, rate), ...]
+        """
+        selected = [
+            name
+            for name in self._deltas
+            if not names or any(name.startswith(prefix) for prefix in names)
+        ]
+        # Walk back from the newest slot, collecting the slots in range
+        slots = []
+        timestamp = self.newest
+        slot = self._head
+        for _ in range(self.size):
+            slot = (slot - 1) % self.capacity
+            if timestamp is None or timestamp <= start:
+                break
+            if end is None or timestamp <= end:
+                slots.append((timestamp, slot))
+            timestamp -= self._elapsed[slot] / 1000
+        slots.reverse()
+
+        series = {name: [] for name in selected}
+        if not slots:
+            return series
+
+        # Group slots into buckets: (bucket end, slots in it)
+        buckets = []
+        for timestamp, slot in slots:
+            bucket = timestamp if not step else math.ceil(timestamp / step) * step
+            if buckets and buckets[-1][0] == bucket:
+                buckets[-1][1].append(slot)
+            else:
+                buckets.append((bucket, [slot]))
+
+        for bucket, bucket_slots in buckets:
+            seconds = sum(self._elapsed[slot] for slot in bucket_slots) / 1000
+            if not seconds:
+                continue
+            for name in selected:
+                deltas = self._deltas[name]
+                series[name].append(
+                    (bucket, sum(deltas[slot] for slot in bucket_slots) / seconds)
+                )
+        return series
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "size": self.size,
+            "series": len(self._deltas),
+            "span_s": round(self._span_ms / 1000, 3),
+            "bytes": self._elapsed.itemsize * self.capacity
+            + sum(d.itemsize * self.capacity for d in self._deltas.values()),
+        }
+
+
+class CounterSampler:
+    """
+    Samples interface and protocol counters into a CounterRing.
+
+    Every sample is kept in the ring; downsampled points (the sum of the
+    deltas over each resolution's buckets) are handed to the writer as
+    "counter" records for the counters that moved in the bucket.
+    """
+
+    def __init__(
+        self,
+        writer,
+        stop_event: threading.Event,
+        interval_ms: Optional[int] = None,
+        proc_root: Optional[str] = None,
+        ring_seconds: Optional[int] = None,
+        resolutions: Optional[Iterable[int]] = None,
+    ):
+        """
+        Initialize the sampler.
+
+        Args:
+            writer: LogWriter the downsampled points are appended to.
+            stop_event: Set when the sampler thread should exit.
+            interval_ms: Time between two samples (defaults to
+                NET_COUNTERS_INTERVAL_MS).
+            proc_root: Directory holding net/dev and net/snmp.
+            ring_seconds: How much history the ring keeps.
+            resolutions: Bucket sizes, in seconds, of the persisted points.
+        """
+        self.writer = writer
+        self.stop_event = stop_event
+        self.interval = (interval_ms or NET_COUNTERS_INTERVAL_MS) / 1000.0
+        self.proc_root = proc_root or NET_PROC_ROOT
+        ring_seconds = ring_seconds or NET_COUNTERS_RING_SECONDS
+        self.ring = CounterRing(max(1, math.ceil(ring_seconds / self.interval)))
+        self.resolutions = tuple(resolutions or NET_COUNTERS_RESOLUTIONS_S)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        # resolution -> (bucket end, seconds covered, summed deltas, last sample)
+        self._buckets: Dict[int, Tuple[float, float, Dict[str, int], float]] = {}
+
+        self.samples = 0
+        self.persisted = 0
+        self.last_sample_ms = 0.0
+
+    def start(self):
+        self.sample()
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="tracer-network-counters"
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Wait for the sampler thread and write out the unfinished buckets."""
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        with self._lock:
+            records = []
+            for resolution in list(self._buckets):
+                records.extend(self._close_bucket(resolution, partial=True))
+        self._write(records)
+
+    def sample(self):
+        """Read the counters once."""
+        started = time.perf_counter()
+        values = {}
+        for name, parse in (("dev", parse_dev), ("snmp", parse_snmp)):
+            try:
+                with open(os.path.join(self.proc_root, "net", name)) as f:
+                    values.update(parse(f.read()))
+            except OSError:
+                pass
+        timestamp = time.time()
+
+        with self._lock:
+            previous = self.ring.newest
+            moved = self.ring.append(timestamp, values)
+            records = []
+            if previous is not None:
+                records = self._downsample(timestamp, timestamp - previous, moved)
+        self._write(records)
+
+        self.samples += 1
+        self.last_sample_ms = (time.perf_counter() - started) * 1000
+
+    def rates(self, start: float, end: Optional[float] = None, **kwargs) -> RateSeries:
+        """Rates from the ring (see CounterRing.rates)."""
+        with self._lock:
+            return self.ring.rates(start, end, **kwargs)
+
+    def covers(self, start: float) -> bool:
+        with self._lock:
+            return self.ring.covers(start)
+
+    def stats(self) -> dict:
+        return {
+            "interval_ms": int(self.interval * 1000),
+            "samples": self.samples,
+            "persisted": self.persisted,
+            "resolutions_s": list(self.resolutions),
+            "last_sample_ms": round(self.last_sample_ms, 3),
+            "ring": self.ring.stats(),
+        }
+
+    def _run(self):
+        next_sample = time.monotonic() + self.interval
+        while not self.stop_event.wait(max(0.0, next_sample - time.monotonic())):
+            next_sample += self.interval
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling network counters: {e}")
+            next_sample = max(next_sample, time.monotonic())
+
+    def _downsample(
+        self, timestamp: float, seconds: float, moved: Dict[str, int]
+    ) -> List[dict]:
+        records = []
+        for resolution in self.resolutions:
+            bucket_end = math.ceil(timestamp / resolution) * resolution
+            bucket = self._buckets.get(resolution)
+            if bucket is not None and bucket[0] != bucket_end:
+                records.extend(self._close_bucket(resolution))
+                bucket = None
+            if bucket is None:
+                bucket = self._buckets[resolution] = (bucket_end, 0.0, {}, timestamp)
+            _, covered, sums, _ = bucket
+            for name, delta in moved.items():
+                sums[name] = sums.get(name, 0) + delta
+            self._buckets[resolution] = (bucket_end, covered + seconds, sums, timestamp)
+        return records
+
+    def _close_bucket(self, resolution: int, partial: bool = False) -> List[dict]:
+        """
+        Points for a bucket's counters.
+
+        A partial bucket (cut short by stop()) ends at its last sample, not at
+        its bucket_end, which may still be up to a resolution in the future.
+        """
+        bucket_end, seconds, sums, last_sample = self._buckets.pop(resolution)
+        if not seconds:
+            return []
+        timestamp = to_datetime(last_sample if partial else bucket_end)
+        return [
+            {
+                "event": "counter",
+                "timestamp": timestamp,
+                "bucket_end": to_datetime(bucket_end),
+                "resolution_s": resolution,
+                "name": name,
+                "delta": delta,
+                "rate": delta / seconds,
+            }
+            for name, delta in sums.items()
+        ]
+
+    def _write(self, records: List[dict]):
+        for record in records:
+            self.writer.append(record)
+        self.persisted += len(records)
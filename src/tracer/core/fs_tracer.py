@@ -1,22 +1,50 @@
-from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 import os
-import time
+from typing import List, Optional
 from tracer.core import BaseTracer
+from tracer.core.coalescer import EventCoalescer
+from tracer.core.inotify_overflow import on_overflow, remove_overflow_callback
+from tracer.core.path_filter import PathFilter
+from tracer.core.shared_observer import SharedObserver
 from tracer.store import LogWriter
 from tracer import LogDomain
+from tracer.config import FS_COALESCE_WINDOW_MS, FS_COALESCE_TRANSIENT
 
 
 class WatchdogEventHandler(FileSystemEventHandler):
-    def __init__(self, writer: LogWriter, log_file: str):
+    def __init__(
+        self,
+        writer: LogWriter,
+        log_file: str,
+        coalescer: Optional[EventCoalescer] = None,
+        root: Optional[str] = None,
+        path_filter: Optional[PathFilter] = None,
+    ):
         self.writer = writer
         self.log_file = os.path.abspath(log_file)
+        # Everything the tracer writes (logs, indexes, segments, database)
+        # lives next to the log file
+        self.log_dir = os.path.dirname(self.log_file) + os.sep
+        self.coalescer = coalescer
+        self.root = os.path.abspath(root) + os.sep if root else None
+        self.path_filter = (
+            path_filter if path_filter and not path_filter.is_empty else None
+        )
+
+        self.received = 0
+        self.filtered = 0
+        self.overflows = 0
 
     def dispatch(self, event: FileSystemEvent):
-        full_path = os.path.abspath(event.src_path)
-        if full_path == self.log_file:
-            return  # Skip events on the log file
+        self.received += 1
+        # Drop unwanted events before doing any other work on them
+        if not self._wanted(event.src_path) and not (
+            event.event_type == "moved" and self._wanted(event.dest_path)
+        ):
+            self.filtered += 1
+            return
 
+        full_path = os.path.abspath(event.src_path)
         event_details = {
             "event": event.event_type,
             "name": os.path.basename(full_path),
@@ -25,49 +53,150 @@ class WatchdogEventHandler(FileSystemEventHandler):
         }
 
         print(event_details)
-        self.writer.append(event_details)
+        if self.coalescer is None:
+            self.writer.append(event_details)
+        else:
+            related = ()
+            if event.event_type == "moved" and event.dest_path:
+                related = (os.path.abspath(os.fsdecode(event.dest_path)),)
+            for record in self.coalescer.add(event_details, related):
+                self.writer.append(record)
+
+    def report_overflow(self):
+        """Log a marker event: the kernel queue overflowed and events were lost."""
+        self.overflows += 1
+        root = self.root.rstrip(os.sep) if self.root else ""
+        print(f"inotify queue overflow while watching {root}, events were lost")
+        # Written straight away; holding it in the coalescer would hide the gap
+        self.writer.append(
+            {
+                "event": "overflow",
+                "name": "IN_Q_OVERFLOW",
+                "is_directory": True,
+                "full_path": root,
+            }
+        )
+
+    def _wanted(self, path) -> bool:
+        if not path:
+            return False
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        if path.startswith(self.log_dir):
+            return False  # Skip events on the tracer's own files
+        if self.path_filter is None:
+            return True
+
+        if self.root and path.startswith(self.root):
+            relative_path = path[len(self.root) :]
+        else:
+            relative_path = os.path.relpath(path, self.root or os.curdir)
+        if os.sep != "/":
+            relative_path = relative_path.replace(os.sep, "/")
+        return self.path_filter.allows(relative_path)
+
+    def stats(self) -> dict:
+        """Counters describing how many events were received and filtered."""
+        return {
+            "received": self.received,
+            "filtered": self.filtered,
+            "overflows": self.overflows,
+            "include": self.path_filter.include_patterns if self.path_filter else [],
+            "exclude": self.path_filter.exclude_patterns if self.path_filter else [],
+        }
 
 
 class FileTracer(BaseTracer):
-    def __init__(self, domain: LogDomain, dir_to_watch: str):
+    def __init__(
+        self,
+        domain: LogDomain,
+        dir_to_watch: str,
+        coalesce_window_ms: Optional[int] = None,
+        coalesce_transient: Optional[str] = None,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+    ):
         """
         Initialize the FileTracer.
 
         Args:
-            writer (LogWriter): The log writer instance for appending events.
+            domain (LogDomain): The domain events are logged under.
             dir_to_watch (str): The directory to monitor.
+            coalesce_window_ms (int): Merge events per path within this window
+                (defaults to FS_COALESCE_WINDOW_MS, 0 disables coalescing).
+            coalesce_transient (str): "drop" or "summary" for paths created and
+                deleted within one window (defaults to FS_COALESCE_TRANSIENT).
+            include (list): Gitignore-style patterns of paths to keep.
+            exclude (list): Gitignore-style patterns of paths to drop.
         """
         super().__init__(domain)
         self.dir_to_watch = dir_to_watch
         self.log_file = self.writer.file_path
-        self.event_handler = WatchdogEventHandler(self.writer, self.log_file)
-        self.observer = Observer()
 
-    def start(self):
+        if coalesce_window_ms is None:
+            coalesce_window_ms = FS_COALESCE_WINDOW_MS
+        self.coalescer = None
+        if coalesce_window_ms > 0:
+            self.coalescer = EventCoalescer(
+                coalesce_window_ms,
+                transient=coalesce_transient or FS_COALESCE_TRANSIENT,
+                # The writer thread takes the records, in timestamp order
+                polled=self.writer.batched,
+            )
+
+        # Compiled once; matching happens first thing in the handler's dispatch
+        self.path_filter = PathFilter(include, exclude)
+        self.event_handler = WatchdogEventHandler(
+            self.writer,
+            self.log_file,
+            self.coalescer,
+            root=dir_to_watch,
+            path_filter=self.path_filter,
+        )
+        # Set while the directory is scheduled on the shared observer
+        self.watch = None
+
+    def _start(self):
         """
         Start monitoring the directory and its subdirectories.
+
+        The watch is added to the observer shared by all filesystem tracers,
+        so this returns right away instead of running a thread of its own.
         """
         if not self.dir_to_watch:
             raise ValueError("No directory specified to watch.")
 
-        self.observer.schedule(self.event_handler, self.dir_to_watch, recursive=True)
-        self.observer.start()
-        print(f"Started monitoring: {self.dir_to_watch} (and subdirectories)")
+        if self.coalescer is not None:
+            # The writer thread emits coalesced records once their window
+            # elapses, and holds back newer events until then
+            self.writer.add_ticker(self.coalescer.expire, self.coalescer.hold)
 
+        # Record kernel queue overflows, which watchdog would drop silently
+        on_overflow(self.dir_to_watch, self.event_handler.report_overflow)
         try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("Stopping monitoring...")
-        except Exception as e:
-            print(f"An error occurred: {e}")
-        finally:
-            self.stop()
-
-    def stop(self):
+            self.watch = SharedObserver.schedule(
+                self.event_handler, os.path.abspath(self.dir_to_watch), recursive=True
+            )
+        except Exception:
+            remove_overflow_callback(self.dir_to_watch)
+            if self.coalescer is not None:
+                self.writer.remove_ticker(self.coalescer.expire)
+            raise
+        print(f"Started monitoring: {self.dir_to_watch} (and subdirectories)")
+
+    def _stop(self):
         """
-        Clean up resources and stop the observer.
+        Remove the watch and hand events held by the coalescer to the writer.
         """
-        self.observer.stop()
-        self.observer.join()
-        print("Cleaned up observer.")
+        if self.watch is not None:
+            SharedObserver.unschedule(self.event_handler, self.watch)
+            self.watch = None
+        remove_overflow_callback(self.dir_to_watch)
+        if self.coalescer is not None:
+            # When polled, drain() leaves the records for the writer thread's
+            # last poll of the ticker
+            records = self.coalescer.drain()
+            self.writer.remove_ticker(self.coalescer.expire)
+            for record in records:
+                self.writer.append(record)
+        print(f"Stopped monitoring: {self.dir_to_watch}")
@@ -0,0 +1,87 @@
+import os
+import threading
+from typing import Callable, Dict
+
+try:
+    from watchdog.observers.inotify_c import Inotify, InotifyConstants
+except ImportError:  # inotify is Linux only
+    Inotify = None
+
+# Watched root (as bytes, like watchdog's own paths) -> overflow callback
+_callbacks: Dict[bytes, Callable[[], None]] = {}
+_lock = threading.Lock()
+_reading = threading.local()
+_installed = False
+
+
+def on_overflow(root: str, callback: Callable[[], None]) -> bool:
+    """
+    Call callback whenever the kernel inotify queue for root overflows.
+
+    watchdog silently skips IN_Q_OVERFLOW records, which means events were
+    lost without any trace. This hooks its buffer parser to report them.
+
+    Returns:
+        False if the inotify backend is not available on this platform, or
+        the installed watchdog no longer has the internals this hooks into
+    """
+    if Inotify is None:
+        return False
+    with _lock:
+        if not _install():
+            return False
+        _callbacks[os.fsencode(os.path.abspath(root))] = callback
+    return True
+
+
+def remove_overflow_callback(root: str):
+    """Stop reporting overflows registered with on_overflow()."""
+    with _lock:
+        _callbacks.pop(os.fsencode(os.path.abspath(root)), None)
+
+
+def _notify():
+    path = getattr(_reading, "path", None)
+    with _lock:
+        callback = _callbacks.get(path)
+    if callback is not None:
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error reporting inotify overflow: {e}")
+
+
+def _install() -> bool:
+    """
+    Hook watchdog's inotify reader, once.
+
+    These are private watchdog internals, so check they are still there
+    rather than let a watchdog upgrade break starting a tracer.
+    """
+    global _installed
+    if _installed:
+        return True
+
+    try:
+        read_events = Inotify.read_events
+        parse_event_buffer = Inotify._parse_event_buffer
+        overflow_mask = InotifyConstants.IN_Q_OVERFLOW
+    except AttributeError as e:
+        print(f"Cannot report inotify overflows with this watchdog version: {e}")
+        return False
+
+    def tracked_read_events(self, *args, **kwargs):
+        # The parser is a staticmethod; remember which watch is being read
+        _reading.path = getattr(self, "_path", None)
+        return read_events(self, *args, **kwargs)
+
+    def checked_parse_event_buffer(event_buffer):
+        for wd, mask, cookie, name in parse_event_buffer(event_buffer):
+            if mask & overflow_mask:
+                _notify()
+            yield wd, mask, cookie, name
+
+    Inotify.read_events = tracked_read_events
+    Inotify._parse_event_buffer = staticmethod(checked_parse_event_buffer)
+    _installed = True
+    return True
@@ -0,0 +1,274 @@
+import os
+import re
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from tracer.core.base_tracer import BaseTracer
+from tracer.core.flow_aggregator import FlowAggregator
+from tracer.core.counter_sampler import CounterSampler
+from tracer.core.socket_owners import SocketOwnerCache
+from tracer import LogDomain
+from tracer.db.models import TCP_STATES
+from tracer.config import (
+    NET_SAMPLE_INTERVAL_MS,
+    NET_PROC_ROOT,
+    NET_PROTOCOLS,
+    NET_REPORT_INITIAL,
+    NET_RESOLVE_OWNERS,
+    NET_FLOW_WINDOW_MS,
+    NET_COUNTERS_INTERVAL_MS,
+)
+
+# One row of /proc/net/{tcp,tcp6,udp,udp6} as two contiguous groups:
+# b"<local> <remote> <state>" and b"<uid> <timeout> <inode>". Matching the
+# whole file with one regex and keeping rows as tuples of bytes leaves the
+# per-row work to C; only changed rows are ever decoded.
+_ROW = re.compile(
+    rb": ([0-9A-Fa-f]{8,32}:[0-9A-Fa-f]{4} [0-9A-Fa-f]{8,32}:[0-9A-Fa-f]{4} "
+    rb"[0-9A-Fa-f]{2}) [^ ]+ [^ ]+ [^ ]+ +(\d+ +-?\d+ \d+)"
+)
+
+Row = Tuple[bytes, bytes]
+
+
+def parse_table(data: bytes) -> Set[Row]:
+    """Parse the contents of one /proc/net table into a set of raw rows."""
+    return set(_ROW.findall(data))
+
+
+def decode_endpoint(endpoint: bytes) -> Tuple[str, int]:
+    """Turn a "0100007F:1F90" style endpoint into ("127.0.0.1", 8080)."""
+    address, port = endpoint.split(b":")
+    raw = bytes.fromhex(address.decode("ascii"))
+    # The kernel prints each 32-bit word in host (little-endian) order
+    raw = b"".join(raw[i : i + 4][::-1] for i in range(0, len(raw), 4))
+    family = socket.AF_INET if len(raw) == 4 else socket.AF_INET6
+    return socket.inet_ntop(family, raw), int(port, 16)
+
+
+def diff_snapshots(
+    previous: Set[Row], current: Set[Row]
+) -> List[Tuple[str, Row, Optional[Row]]]:
+    """
+    Compare two snapshots of a table.
+
+    Returns:
+        (event, row, previous_row) for every connection that was opened,
+        closed or changed state; previous_row is only set for state changes
+    """
+    # Set differences run in C, so only changed rows reach the loop below
+    added = current - previous
+    removed = previous - current
+
+    # A connection that changed state shows up on both sides; pair them up
+    # by 5-tuple + inode
+    old_rows = {_identity(row): row for row in removed}
+    changes = []
+    for row in added:
+        old = old_rows.pop(_identity(row), None)
+        if old is None:
+            changes.append(("opened", row, None))
+        elif old[0] != row[0]:
+            changes.append(("state_changed", row, old))
+        # Otherwise only the probe counter moved, which is not an event
+    changes.extend(("closed", row, None) for row in old_rows.values())
+    return changes
+
+
+def _identity(row: Row) -> Tuple[bytes, bytes]:
+    return row[0][:-3], row[1].rsplit(None, 1)[-1]
+
+
+class NetTracer(BaseTracer):
+    def __init__(
+        self,
+        domain: LogDomain,
+        interval_ms: Optional[int] = None,
+        proc_root: Optional[str] = None,
+        protocols: Optional[Iterable[str]] = None,
+        resolve_owners: Optional[bool] = None,
+        flow_window_ms: Optional[int] = None,
+        counters_interval_ms: Optional[int] = None,
+    ):
+        """
+        Initialize the NetTracer.
+
+        Args:
+            domain (LogDomain): The domain events are logged under.
+            interval_ms (int): Time between two samples of the connection
+                tables (defaults to NET_SAMPLE_INTERVAL_MS).
+            proc_root (str): Directory holding net/tcp etc. (defaults to
+                NET_PROC_ROOT, point it at fixture files for testing).
+            protocols (list): Tables to sample (defaults to NET_PROTOCOLS).
+            resolve_owners (bool): Attribute events to the process holding
+                the socket (defaults to NET_RESOLVE_OWNERS).
+            flow_window_ms (int): Store per-flow rollups over windows of this
+                length instead of raw events (defaults to NET_FLOW_WINDOW_MS,
+                0 stores raw events).
+            counters_interval_ms (int): Time between two samples of the
+                interface and protocol counters (defaults to
+                NET_COUNTERS_INTERVAL_MS, 0 disables them).
+        """
+        super().__init__(domain)
+        self.interval = (interval_ms or NET_SAMPLE_INTERVAL_MS) / 1000.0
+        self.proc_root = proc_root or NET_PROC_ROOT
+        self.protocols = list(protocols or NET_PROTOCOLS)
+        if resolve_owners is None:
+            resolve_owners = NET_RESOLVE_OWNERS
+        self.owners = SocketOwnerCache(self.proc_root) if resolve_owners else None
+        if flow_window_ms is None:
+            flow_window_ms = NET_FLOW_WINDOW_MS
+        self.flows = None
+        if flow_window_ms > 0:
+            self.flows = FlowAggregator(flow_window_ms, self.proc_root)
+        if counters_interval_ms is None:
+            counters_interval_ms = NET_COUNTERS_INTERVAL_MS
+        self.counters = None
+        if counters_interval_ms > 0:
+            self.counters = CounterSampler(
+                self.writer, self.stop_event, counters_interval_ms, self.proc_root
+            )
+
+        # Raw contents and parsed snapshot of each table at the last sample
+        self._raw: Dict[str, bytes] = {}
+        self._tables: Dict[str, Set[Row]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+        self.samples = 0
+        self.events = 0
+        self.last_sample_ms = 0.0
+
+    def _start(self):
+        """Take the first snapshot and start sampling in the background."""
+        self.sample()
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name=f"tracer-{self.domain}"
+        )
+        self._thread.start()
+        if self.counters is not None:
+            # Counters are sampled much more often, on a thread of their own
+            self.counters.start()
+
+    def _stop(self):
+        # The sampler waits on stop_event, so it exits right away
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self.counters is not None:
+            self.counters.stop()
+        if self.flows is not None:
+            # Write out the unfinished window
+            for record in self.flows.drain():
+                self.writer.append(record)
+
+    def sample(self) -> List[dict]:
+        """Read the connection tables once and log what changed since last time."""
+        started = time.perf_counter()
+        initial = self.samples == 0
+        timestamp = datetime.utcnow()
+        events = []
+
+        for protocol in self.protocols:
+            data = self._read_table(protocol)
+            # Tables whose bytes did not change cannot hold any delta
+            if data is None or data == self._raw.get(protocol):
+                continue
+            table = parse_table(data)
+            if not initial:
+                changes = diff_snapshots(self._tables.get(protocol, set()), table)
+            elif NET_REPORT_INITIAL:
+                changes = [("present", row, None) for row in table]
+            else:
+                changes = []
+            self._raw[protocol] = data
+            self._tables[protocol] = table
+            events.extend(
+                self._to_event(protocol, change, timestamp) for change in changes
+            )
+
+        if self.owners is not None:
+            self._attribute(events)
+        records = events
+        if self.flows is not None:
+            records = self.flows.add(events) + self.flows.expire(timestamp)
+        for record in records:
+            self.writer.append(record)
+
+        self.samples += 1
+        self.events += len(events)
+        self.last_sample_ms = (time.perf_counter() - started) * 1000
+        return events
+
+    def stats(self) -> dict:
+        """Counters describing the sampler's activity."""
+        return {
+            "interval_ms": int(self.interval * 1000),
+            "samples": self.samples,
+            "events": self.events,
+            "connections": sum(len(table) for table in self._tables.values()),
+            "last_sample_ms": round(self.last_sample_ms, 3),
+            "attribution": self.owners.stats() if self.owners is not None else None,
+            "flows": self.flows.stats() if self.flows is not None else None,
+            "counters": self.counters.stats() if self.counters is not None else None,
+        }
+
+    def _attribute(self, events: List[dict]):
+        """Set pid/command on events, only resolving sockets that changed."""
+        closed = {e["inode"]: e["uid"] for e in events if e["event"] == "closed"}
+        live = {e["inode"]: e["uid"] for e in events if e["event"] != "closed"}
+        # Closed sockets are gone from /proc/<pid>/fd, only the cache knows them;
+        # look them up before a scan can drop processes that exited meanwhile
+        owners = self.owners.resolve(closed, scan=False)
+        self.owners.release(closed)
+        owners.update(self.owners.resolve(live))
+        for event in events:
+            event["pid"], event["command"] = owners.get(event["inode"], (None, None))
+
+    def _run(self):
+        next_sample = time.monotonic() + self.interval
+        while not self.stop_event.wait(max(0.0, next_sample - time.monotonic())):
+            next_sample += self.interval
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Error sampling network connections: {e}")
+            # Skip samples that could not be taken in time instead of bursting
+            next_sample = max(next_sample, time.monotonic())
+
+    def _read_table(self, protocol: str) -> Optional[bytes]:
+        path = os.path.join(self.proc_root, "net", protocol)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None  # e.g. IPv6 disabled
+
+    @staticmethod
+    def _to_event(protocol: str, change: tuple, timestamp: datetime) -> dict:
+        event, (endpoints, owner), old = change
+        local, remote, state = endpoints.split()
+        uid, _, inode = owner.split()
+        local_address, local_port = decode_endpoint(local)
+        remote_address, remote_port = decode_endpoint(remote)
+        previous_state = None
+        if old is not None:
+            previous_state = _state_name(old[0].rsplit(None, 1)[-1])
+        return {
+            "event": event,
+            "protocol": protocol,
+            "local_address": local_address,
+            "local_port": local_port,
+            "remote_address": remote_address,
+            "remote_port": remote_port,
+            "state": _state_name(state),
+            "previous_state": previous_state,
+            "inode": int(inode),
+            "uid": int(uid),
+            "timestamp": timestamp,
+        }
+
+
+def _state_name(state: bytes) -> str:
+    return TCP_STATES.get(int(state, 16), state.decode("ascii"))
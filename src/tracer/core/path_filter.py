@@ -0,0 +1,116 @@
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+def translate_pattern(pattern: str) -> Tuple[str, bool]:
+    """
+    Translates one gitignore-style pattern into a regular expression.
+
+    The expression matches paths relative to the watched directory (with "/"
+    separators). A pattern also matches everything below the directory it
+    names, so "node_modules/" covers every file inside node_modules.
+
+    Returns:
+        (regex, negated) where negated is True for "!pattern" re-includes
+    """
+    negated = pattern.startswith("!")
+    if negated:
+        pattern = pattern[1:]
+
+    pattern = pattern.rstrip("/")
+    # Patterns containing a slash are anchored to the watched directory,
+    # bare names match at any depth
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            regex.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            regex.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[i + 1 : end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex.append(f"[{body}]")
+                i = end
+        else:
+            regex.append(re.escape(char))
+        i += 1
+
+    prefix = "" if anchored else "(?:.*/)?"
+    return f"{prefix}{''.join(regex)}(?:/.*)?", negated
+
+
+class PathFilter:
+    """
+    Include/exclude filter compiled once from gitignore-style patterns.
+
+    A path is kept when it matches at least one include pattern (or no
+    includes were given) and is not excluded. Exclude patterns follow
+    gitignore precedence: the last matching pattern wins, so "!pattern"
+    re-includes paths excluded by an earlier pattern.
+    """
+
+    def __init__(
+        self,
+        include: Optional[Iterable[str]] = None,
+        exclude: Optional[Iterable[str]] = None,
+    ):
+        self.include_patterns = [p for p in (include or []) if p.strip()]
+        self.exclude_patterns = [p for p in (exclude or []) if p.strip()]
+
+        self._include = _compile_union(
+            translate_pattern(p)[0] for p in self.include_patterns
+        )
+
+        rules = [translate_pattern(p) for p in self.exclude_patterns]
+        self._has_negation = any(negated for _, negated in rules)
+        if self._has_negation:
+            # Ordered rules are needed to honour "last match wins"
+            self._exclude_rules: List[Tuple[Pattern, bool]] = [
+                (re.compile(regex), negated) for regex, negated in rules
+            ]
+            self._exclude = None
+        else:
+            self._exclude_rules = []
+            self._exclude = _compile_union(regex for regex, _ in rules)
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.include_patterns and not self.exclude_patterns
+
+    def allows(self, relative_path: str) -> bool:
+        """Returns True if the event on relative_path should be kept."""
+        if self._include is not None and not self._include.fullmatch(relative_path):
+            return False
+        if self._exclude is not None:
+            return not self._exclude.fullmatch(relative_path)
+
+        excluded = False
+        for regex, negated in self._exclude_rules:
+            if regex.fullmatch(relative_path):
+                excluded = not negated
+        return not excluded
+
+
+def _compile_union(regexes: Iterable[str]) -> Optional[Pattern]:
+    regexes = list(regexes)
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes))
@@ -0,0 +1,71 @@
+import threading
+from typing import Dict, Optional, Set
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver, ObservedWatch
+
+
+class SharedObserver:
+    """
+    One watchdog Observer shared by every filesystem tracer.
+
+    Tracers add and remove watches with schedule()/unschedule(). The observer
+    (and its dispatcher thread) is started with the first watch and stopped
+    once the last one is removed.
+    """
+
+    _observer: Optional[BaseObserver] = None
+    # Handlers attached to each watch; watchdog merges identical watches, so
+    # a watch is only unscheduled when its last handler goes away
+    _handlers: Dict[ObservedWatch, Set[FileSystemEventHandler]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def schedule(
+        handler: FileSystemEventHandler, path: str, recursive: bool = True
+    ) -> ObservedWatch:
+        """Start delivering events under path to handler."""
+        with SharedObserver._lock:
+            observer = SharedObserver._observer
+            if observer is None or not observer.is_alive():
+                observer = Observer()
+                observer.start()
+                SharedObserver._observer = observer
+                SharedObserver._handlers = {}
+
+            try:
+                watch = observer.schedule(handler, path, recursive=recursive)
+            except Exception:
+                if not SharedObserver._handlers:
+                    SharedObserver._stop_observer()
+                raise
+            SharedObserver._handlers.setdefault(watch, set()).add(handler)
+            return watch
+
+    @staticmethod
+    def unschedule(handler: FileSystemEventHandler, watch: ObservedWatch):
+        """Stop delivering events of watch to handler."""
+        with SharedObserver._lock:
+            observer = SharedObserver._observer
+            handlers = SharedObserver._handlers.get(watch)
+            if observer is None or not handlers or handler not in handlers:
+                return
+
+            handlers.discard(handler)
+            if handlers:
+                observer.remove_handler_for_watch(handler, watch)
+                return
+
+            del SharedObserver._handlers[watch]
+            observer.unschedule(watch)
+            if not SharedObserver._handlers:
+                # Last watch gone: release the dispatcher thread as well
+                SharedObserver._stop_observer()
+
+    @staticmethod
+    def _stop_observer():
+        observer = SharedObserver._observer
+        SharedObserver._observer = None
+        if observer is not None:
+            observer.stop()
+            observer.join()
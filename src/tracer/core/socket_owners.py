@@ -0,0 +1,220 @@
+import os
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+from tracer.config import NET_PROC_ROOT, NET_OWNER_RESCAN_MS
+
+Owner = Tuple[int, Optional[str]]
+
+
+class _Process:
+    __slots__ = ("ctime", "uid", "command", "inodes", "fd_size", "scanned", "readable")
+
+    def __init__(self, ctime: int, uid: int):
+        self.ctime = ctime  # Differs when the PID was reused
+        self.uid = uid
+        self.command: Optional[str] = None
+        self.inodes: Set[int] = set()
+        self.fd_size = 0  # st_size of /proc/<pid>/fd when it was scanned
+        self.scanned = False
+        self.readable = True
+
+
+class SocketOwnerCache:
+    """
+    Maps socket inodes to the process holding them.
+
+    Walking every /proc/<pid>/fd is expensive, so the walk is done lazily and
+    incrementally: resolve() only scans when an inode is not cached, visits
+    processes of the socket's uid and new or reused PIDs first, and stops as
+    soon as every wanted inode was found. Exited processes are dropped from
+    the cache when the PID list is refreshed, and sockets that could not be
+    found are not searched for again during the next rescan_ms.
+    """
+
+    def __init__(
+        self, proc_root: Optional[str] = None, rescan_ms: Optional[int] = None
+    ):
+        self.proc_root = proc_root or NET_PROC_ROOT
+        if rescan_ms is None:
+            rescan_ms = NET_OWNER_RESCAN_MS
+        self.retry = rescan_ms / 1000.0
+
+        self._processes: Dict[int, _Process] = {}
+        self._owners: Dict[int, int] = {}  # inode -> pid
+        self._not_found: Dict[int, float] = {}  # inode -> time of the last search
+
+        self.lookups = 0
+        self.hits = 0
+        self.unresolved = 0
+        self.scans = 0
+        self.pids_scanned = 0
+        self.fds_scanned = 0
+        self.scan_seconds = 0.0
+        self.last_scan_ms = 0.0
+
+    def resolve(self, sockets: Dict[int, int], scan: bool = True) -> Dict[int, Owner]:
+        """
+        Find the processes holding some sockets.
+
+        Args:
+            sockets: Socket inode -> uid of the socket, as listed in /proc/net
+            scan: Walk /proc for inodes that are not cached; closed sockets
+                are gone from every fd table, so they are looked up with False
+
+        Returns:
+            Socket inode -> (pid, command) for every socket that was found
+        """
+        found = {}
+        missing = {}
+        now = time.monotonic()
+        for inode, uid in sockets.items():
+            if not inode:
+                continue  # e.g. TIME_WAIT: no socket object left
+            self.lookups += 1
+            pid = self._owners.get(inode)
+            if pid is not None:
+                self.hits += 1
+                found[inode] = (pid, self._processes[pid].command)
+            elif not scan or now - self._not_found.get(inode, -1e9) < self.retry:
+                self.unresolved += 1
+            else:
+                missing[inode] = uid
+
+        if missing:
+            started = time.perf_counter()
+            self._scan(missing, found)
+            self.scans += 1
+            self.last_scan_ms = (time.perf_counter() - started) * 1000
+            self.scan_seconds += self.last_scan_ms / 1000
+            # Owned by a process we cannot read, or the fd is not installed
+            # yet (accept() pending); try again after a while
+            self.unresolved += len(missing)
+            self._not_found.update(dict.fromkeys(missing, now))
+        return found
+
+    def release(self, inodes: Iterable[int]):
+        """Forget sockets that were closed."""
+        for inode in inodes:
+            self._not_found.pop(inode, None)
+            pid = self._owners.pop(inode, None)
+            if pid is not None:
+                self._processes[pid].inodes.discard(inode)
+
+    def stats(self) -> dict:
+        """Cache hit rate and the cost of the /proc scans."""
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else None,
+            "unresolved": self.unresolved,
+            "scans": self.scans,
+            "pids_scanned": self.pids_scanned,
+            "fds_scanned": self.fds_scanned,
+            "scan_ms": round(self.scan_seconds * 1000, 3),
+            "last_scan_ms": round(self.last_scan_ms, 3),
+            "processes": len(self._processes),
+            "sockets": len(self._owners),
+        }
+
+    def _scan(self, missing: Dict[int, int], found: Dict[int, Owner]):
+        self._refresh()
+
+        # Processes of the socket's uid first; among them new or reused PIDs
+        # and those whose fd table changed, then those already known to hold
+        # sockets, most recent first
+        uids = set(missing.values())
+
+        def priority(pid):
+            process = self._processes[pid]
+            if process.uid not in uids:
+                return (True, process.scanned, not process.inodes, -pid)
+            unchanged = process.scanned and self._fd_size(pid) == process.fd_size
+            return (False, unchanged, not process.inodes, -pid)
+
+        candidates = sorted(
+            (pid for pid, process in self._processes.items() if process.readable),
+            key=priority,
+        )
+
+        for pid in candidates:
+            process = self._scan_process(pid)
+            if process is None:
+                continue
+            for inode in process.inodes.intersection(missing):
+                del missing[inode]
+                found[inode] = (pid, process.command)
+            if not missing:
+                break
+
+    def _refresh(self):
+        """Sync the cached PIDs with /proc: add new ones, drop exited ones."""
+        seen = set()
+        with os.scandir(self.proc_root) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue  # Exited while listing
+                pid = int(entry.name)
+                seen.add(pid)
+                process = self._processes.get(pid)
+                if process is None or process.ctime != st.st_ctime_ns:
+                    if process is not None:
+                        self._forget(pid)
+                    self._processes[pid] = _Process(st.st_ctime_ns, st.st_uid)
+
+        for pid in self._processes.keys() - seen:
+            self._forget(pid)
+
+    def _scan_process(self, pid: int) -> Optional[_Process]:
+        """Re-read the socket inodes held by one process."""
+        process = self._processes[pid]
+        base = os.path.join(self.proc_root, str(pid))
+        inodes = set()
+        fds = 0
+        try:
+            process.fd_size = self._fd_size(pid)
+            with os.scandir(os.path.join(base, "fd")) as entries:
+                for entry in entries:
+                    fds += 1
+                    try:
+                        target = os.readlink(entry.path)
+                    except OSError:
+                        continue  # Closed while listing
+                    if target.startswith("socket:["):
+                        inodes.add(int(target[8:-1]))
+            if process.command is None:
+                with open(os.path.join(base, "comm")) as f:
+                    process.command = f.read().rstrip("\n")
+        except PermissionError:
+            process.readable = False  # Until the PID is reused
+            return None
+        except FileNotFoundError:
+            self._forget(pid)
+            return None
+
+        self.pids_scanned += 1
+        self.fds_scanned += fds
+        for inode in process.inodes - inodes:
+            if self._owners.get(inode) == pid:
+                del self._owners[inode]
+        for inode in inodes:
+            self._owners[inode] = pid
+        process.inodes = inodes
+        process.scanned = True
+        return process
+
+    def _fd_size(self, pid: int) -> int:
+        # Number of open fds on Linux >= 6.2, a constant 0 before that
+        try:
+            return os.stat(os.path.join(self.proc_root, str(pid), "fd")).st_size
+        except OSError:
+            return -1
+
+    def _forget(self, pid: int):
+        process = self._processes.pop(pid)
+        for inode in process.inodes:
+            if self._owners.get(inode) == pid:
+                del self._owners[inode]
@@ -1,17 +1,174 @@
-from sqlalchemy import create_engine
+import socket
+import threading
+import time
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
-from tracer.config import DB_URL, LogDomain  # Get your path from config.py
+from tracer.config import (  # Get your path from config.py
+    DB_URL,
+    LogDomain,
+    STORAGE_PROFILE,
+    STORAGE_PROFILES,
+)
+from tracer.db.result_cache import track_writes
+
+if STORAGE_PROFILE not in STORAGE_PROFILES:
+    raise ValueError(
+        f"Unknown storage profile '{STORAGE_PROFILE}'. "
+        f"Valid profiles are: {', '.join(STORAGE_PROFILES)}"
+    )
+storage_profile = STORAGE_PROFILES[STORAGE_PROFILE]
+
+# PRAGMAs from the storage profile, in the order they have to be applied
+# (auto_vacuum first: it has to be set before anything is written)
+_PRAGMAS = (
+    "auto_vacuum",
+    "journal_mode",
+    "synchronous",
+    "mmap_size",
+    "cache_size",
+    "busy_timeout",
+)
+# PRAGMAs only the writer sets
+_WRITER_PRAGMAS = {"auto_vacuum"}
+_is_sqlite = DB_URL.startswith("sqlite")
+
+
+def _ip_address(packed):
+    """SQL function turning a packed 4/16 byte address back into text."""
+    if not isinstance(packed, bytes) or len(packed) not in (4, 16):
+        return None
+    family = socket.AF_INET6 if len(packed) == 16 else socket.AF_INET
+    return socket.inet_ntop(family, packed)
+
+
+def _apply_pragmas(dbapi_connection, read_only: bool):
+    # Used by the network_events view
+    dbapi_connection.create_function("ip_address", 1, _ip_address, deterministic=True)
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _PRAGMAS:
+            if pragma in storage_profile and not (
+                read_only and pragma in _WRITER_PRAGMAS
+            ):
+                cursor.execute(f"PRAGMA {pragma}={storage_profile[pragma]}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=1")
+    finally:
+        cursor.close()
+
+
+# Single connection for everything that writes (ingestion, clear, reset) ...
+engine = create_engine(DB_URL, pool_size=1, max_overflow=0)
+# ... and a pool of read-only connections for queries, so they never hold
+# the writer's connection
+read_engine = create_engine(
+    DB_URL, pool_size=storage_profile.get("read_pool_size", 1), max_overflow=0
+)
+
+if _is_sqlite:
+    event.listen(engine, "connect", lambda conn, _: _apply_pragmas(conn, False))
+    event.listen(read_engine, "connect", lambda conn, _: _apply_pragmas(conn, True))
+
+# Invalidates the cached query results of the tables written through engine
+track_writes(engine)
 
-engine = create_engine(DB_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sessions for CRUD reads (show_logs, network_rates), on the reader pool
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
+_checkpoint_lock = threading.Lock()
+_last_checkpoint = {"at": time.monotonic(), "result": None}
 
-def init_db():
-    # This creates the tables if they don't exist
+
+def checkpoint_if_due(force: bool = False):
+    """
+    Run wal_checkpoint(PASSIVE) if the profile's checkpoint interval elapsed.
+
+    PASSIVE checkpoints never wait on readers, so this is cheap enough to call
+    from the ingestion path after each batch.
+    """
+    interval = storage_profile.get("checkpoint_interval_s")
+    if not _is_sqlite or not interval:
+        return None
+    if not force and time.monotonic() - _last_checkpoint["at"] < interval:
+        return None
+    if not _checkpoint_lock.acquire(blocking=False):
+        return None
+
+    try:
+        with engine.connect() as connection:
+            busy, log_frames, checkpointed = connection.execute(
+                text("PRAGMA wal_checkpoint(PASSIVE)")
+            ).one()
+        _last_checkpoint["result"] = {
+            "busy": busy,
+            "log_frames": log_frames,
+            "checkpointed_frames": checkpointed,
+        }
+        return _last_checkpoint["result"]
+    finally:
+        _last_checkpoint["at"] = time.monotonic()
+        _checkpoint_lock.release()
+
+
+def storage_info() -> dict:
+    """Describe the active storage profile and the PRAGMAs actually in effect."""
+    info = {
+        "profile": STORAGE_PROFILE,
+        "settings": dict(storage_profile),
+        "db_url": DB_URL,
+        "writer_pool": engine.pool.status(),
+        "reader_pool": read_engine.pool.status(),
+    }
+    if not _is_sqlite:
+        return info
+
+    pragmas = {}
+    with read_engine.connect() as connection:
+        extra = (
+            "query_only",
+            "page_size",
+            "page_count",
+            "freelist_count",
+            "user_version",
+        )
+        for pragma in _PRAGMAS + extra:
+            pragmas[pragma] = connection.execute(text(f"PRAGMA {pragma}")).scalar()
+    info["pragmas"] = pragmas
+    info["schema_version"] = pragmas["user_version"]
+    info["db_size_bytes"] = pragmas["page_size"] * pragmas["page_count"]
+    info["last_checkpoint"] = _last_checkpoint["result"]
+    info["seconds_since_checkpoint"] = round(
+        time.monotonic() - _last_checkpoint["at"], 1
+    )
+    return info
+
+
+def init_db() -> list:
+    """
+    Create missing tables and upgrade an existing database to the latest schema.
+
+    Returns:
+        Descriptions of the migrations that were applied
+    """
     from tracer.db.models import Base
+    from tracer.db import migrations
 
+    fresh = not migrations.has_tables(engine)
+
+    # This creates the tables if they don't exist
     Base.metadata.create_all(bind=engine)
 
+    if fresh:
+        # New files already match the models, only record the version
+        migrations.set_schema_version(engine, migrations.SCHEMA_VERSION)
+        applied = []
+    else:
+        applied = migrations.migrate(engine)
+    if _is_sqlite:
+        migrations.create_views(engine)
+    return applied
+
 
 def reset_db():
     """
@@ -19,13 +176,20 @@ def reset_db():
     WARNING: This will delete all data in the database!
     """
     from tracer.db.models import Base
+    from tracer.db import migrations
 
     # Drop all tables
+    if _is_sqlite:
+        migrations.drop_views(engine)
     Base.metadata.drop_all(bind=engine)
 
     # Recreate all tables
     Base.metadata.create_all(bind=engine)
 
+    migrations.set_schema_version(engine, migrations.SCHEMA_VERSION)
+    if _is_sqlite:
+        migrations.create_views(engine)
+
 
 def drop_db():
     """
@@ -33,7 +197,10 @@ def drop_db():
     WARNING: This will delete all data in the database!
     """
     from tracer.db.models import Base
+    from tracer.db import migrations
 
+    if _is_sqlite:
+        migrations.drop_views(engine)
     Base.metadata.drop_all(bind=engine)
 
 
@@ -57,12 +224,18 @@ def clear_domain_table(domain: str) -> str:
     if table_name not in metadata.tables:
         raise ValueError(f"Table '{table_name}' does not exist for domain '{domain}'")
 
-    # Get the table and clear all data
-    table = metadata.tables[table_name]
+    from tracer.db.models import DOMAIN_EXTRA_TABLES
+
+    # Clear the domain's table and the tables derived from it
+    table_names = [table_name] + [
+        name for name in DOMAIN_EXTRA_TABLES.get(domain, ()) if name in metadata.tables
+    ]
 
+    rows_deleted = 0
     with engine.connect() as connection:
-        result = connection.execute(delete(table))
+        for name in table_names:
+            result = connection.execute(delete(metadata.tables[name]))
+            rows_deleted += result.rowcount
         connection.commit()
-        rows_deleted = result.rowcount
 
     return f"Successfully cleared {rows_deleted} rows from table '{table_name}' for domain '{domain}'"
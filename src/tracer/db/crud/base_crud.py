@@ -1,13 +1,23 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Type
-from tracer.db.connection import SessionLocal
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Type, Union
+from sqlalchemy import tuple_
+from tracer.db.connection import ReadSessionLocal, SessionLocal
 
 
 class BaseCRUD(ABC):
     """Abstract base class for CRUD operations"""
 
+    def __init__(self, read_only: bool = False):
+        """
+        Args:
+            read_only: Use a read-only session from the reader pool, so the
+                reads never hold the connection ingestion writes with
+        """
+        self.read_only = read_only
+
     def __enter__(self):
-        self.session = SessionLocal()
+        self.session = ReadSessionLocal() if self.read_only else SessionLocal()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
@@ -32,6 +42,23 @@ class BaseCRUD(ABC):
         """
         pass
 
+    @abstractmethod
+    def add_many(
+        self, events: List[Dict[str, Any]], return_ids: bool = False
+    ) -> Union[int, Tuple[int, int]]:
+        """
+        Add several entries in a single transaction, without loading them
+        back into the session
+
+        Args:
+            events: List of dictionaries containing the event data
+            return_ids: Return the (first_id, last_id) range instead of the count
+
+        Returns:
+            Number of inserted rows, or the inserted id range
+        """
+        pass
+
     @abstractmethod
     def get_by_id(self, entry_id: int):
         """
@@ -71,3 +98,100 @@ class BaseCRUD(ABC):
             True if deleted, False if not found
         """
         pass
+
+    def get_page(
+        self,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+    ) -> List:
+        """
+        Get entries by keyset on (timestamp, id)
+
+        Args:
+            limit: Largest number of entries
+            before: Only entries older than this (timestamp, id), newest first
+            after: Only entries newer than this (timestamp, id), oldest first
+
+        Returns:
+            List of entries
+        """
+        model = self.model_class
+        key = tuple_(model.timestamp, model.id)
+        query = self.session.query(model)
+        if after is not None:
+            query = query.filter(key > tuple_(*after))
+            order = (model.timestamp, model.id)
+        else:
+            if before is not None:
+                query = query.filter(key < tuple_(*before))
+            order = (model.timestamp.desc(), model.id.desc())
+        return query.order_by(*order).limit(limit).all()
+
+    def get_max_timestamp(self, below_id: Optional[int] = None) -> Optional[datetime]:
+        """
+        Get the newest timestamp
+
+        Args:
+            below_id: Only consider entries with a smaller id
+
+        Returns:
+            The timestamp, or None if there are no entries
+        """
+        model = self.model_class
+        query = self.session.query(model.timestamp)
+        if below_id is not None:
+            query = query.filter(model.id < below_id)
+        # Walks the timestamp index backwards instead of aggregating
+        return query.order_by(model.timestamp.desc()).limit(1).scalar()
+
+    def as_dict(self, entry) -> Dict[str, Any]:
+        """
+        Turn an entry into a plain dictionary
+
+        Args:
+            entry: An entry returned by this CRUD
+
+        Returns:
+            Column name -> value
+        """
+        return {
+            column: getattr(entry, column)
+            for column in self.model_class.__table__.columns.keys()
+        }
+
+    @staticmethod
+    def table_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Select the events add_many() stores in the domain's own table
+
+        Args:
+            events: Events passed to add_many()
+
+        Returns:
+            Those events, in insertion order
+        """
+        return events
+
+    def event_row(self, event: Dict[str, Any], entry_id: int) -> Dict[str, Any]:
+        """
+        Build the row add_many() stored for an event, as as_dict() returns it
+
+        Args:
+            event: One of the events returned by table_events()
+            entry_id: The id the row was given
+
+        Returns:
+            Column name -> value
+        """
+        row = {}
+        for column in self.model_class.__table__.columns:
+            default = column.default
+            if column.name in event:
+                row[column.name] = event[column.name]
+            elif default is not None and default.is_scalar:
+                row[column.name] = default.arg
+            else:
+                row[column.name] = None
+        row["id"] = entry_id
+        return row
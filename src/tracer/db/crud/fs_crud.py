@@ -1,19 +1,14 @@
-from typing import Optional, List, Dict, Any, Type
+from typing import Optional, List, Dict, Any, Tuple, Type, Union
 from datetime import datetime
+from sqlalchemy import insert, text
 from tracer.db.models import FileLog
-from tracer.db.connection import SessionLocal
+from tracer.db.crud.base_crud import BaseCRUD
+from tracer.utils import TimeRange
 
 
-class FileCRUD:
+class FileCRUD(BaseCRUD):
     """CRUD operations for FileLog (file_system table)"""
 
-    def __enter__(self):
-        self.session = SessionLocal()
-        return self
-
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        self.session.close()
-
     @property
     def model_class(self) -> Type[FileLog]:
         return FileLog
@@ -48,6 +43,56 @@ class FileCRUD:
             self.session.rollback()
             raise e
 
+    def add_many(
+        self, events: List[Dict[str, Any]], return_ids: bool = False
+    ) -> Union[int, Tuple[int, int]]:
+        """
+        Add several file system events with one executemany INSERT
+
+        Rows go through a Core insert on the session's connection, so no ORM
+        objects are built and nothing is refreshed after the commit.
+
+        Args:
+            events: List of dictionaries with the same keys accepted by add()
+            return_ids: Return the (first_id, last_id) range instead of the count
+
+        Returns:
+            Number of inserted rows, or the inserted id range
+        """
+        if not events:
+            return (0, -1) if return_ids else 0
+
+        columns = FileLog.__table__.columns.keys()
+        now = datetime.utcnow()
+        rows = []
+        for event_details in events:
+            row = {key: value for key, value in event_details.items() if key in columns}
+            row.setdefault("timestamp", now)
+            # executemany needs the same keys in every row, and coalesced
+            # records are mixed with plain events
+            row.setdefault("count", 1)
+            row.setdefault("first_timestamp", None)
+            rows.append(row)
+
+        try:
+            connection = self.session.connection()
+            connection.execute(insert(FileLog.__table__), rows)
+            last_id = None
+            if return_ids:
+                # Rowids are handed out sequentially while we hold the write lock
+                last_id = connection.execute(
+                    text("SELECT last_insert_rowid()")
+                ).scalar()
+            self.session.commit()
+
+            if return_ids:
+                return last_id - len(rows) + 1, last_id
+            return len(rows)
+
+        except Exception as e:
+            self.session.rollback()
+            raise e
+
     def get_by_id(self, log_id: int) -> Optional[FileLog]:
         """
         Get a file log entry by ID
@@ -105,6 +150,23 @@ class FileCRUD:
             .all()
         )
 
+    def get_entries_in_range(self, time_range: TimeRange) -> List[FileLog]:
+        """
+        Get file log entries within an already resolved time range
+
+        Args:
+            time_range: TimeRange whose bounds (either may be open) filter the entries
+
+        Returns:
+            List of FileLog entries within the range, newest first
+        """
+        query = self.session.query(FileLog)
+        if time_range.start_dt is not None:
+            query = query.filter(FileLog.timestamp >= time_range.start_dt)
+        if time_range.end_dt is not None:
+            query = query.filter(FileLog.timestamp <= time_range.end_dt)
+        return query.order_by(FileLog.timestamp.desc()).all()
+
     def update(self, log_id: int, update_data: Dict[str, Any]) -> Optional[FileLog]:
         """
         Update a file log entry
@@ -0,0 +1,379 @@
+import socket
+from typing import Optional, List, Dict, Any, Tuple, Type, Union
+from datetime import datetime
+from sqlalchemy import insert, or_, text
+from tracer.db.models import (
+    NetLog,
+    NetFlowLog,
+    NetCounterLog,
+    NET_EVENT_CODES,
+    NET_PROTOCOL_CODES,
+    NET_DIRECTION_CODES,
+    TCP_STATES,
+)
+from tracer.db.crud.base_crud import BaseCRUD
+from tracer.utils import TimeRange
+
+_STATE_CODES = {name: code for code, name in TCP_STATES.items()}
+_EVENT_NAMES = {code: name for name, code in NET_EVENT_CODES.items()}
+_PROTOCOL_NAMES = {code: name for name, code in NET_PROTOCOL_CODES.items()}
+# Records add_many() writes to network_flows and network_counters
+_ROUTED_EVENTS = ("flow", "counter")
+_COUNTER_COLUMNS = (
+    "timestamp",
+    "bucket_end",
+    "resolution_s",
+    "name",
+    "delta",
+    "rate",
+)
+
+
+def pack_address(address: Union[str, bytes]) -> bytes:
+    """Pack a textual IPv4/IPv6 address into 4/16 bytes."""
+    if isinstance(address, bytes):
+        return address
+    family = socket.AF_INET6 if ":" in address else socket.AF_INET
+    return socket.inet_pton(family, address)
+
+
+def unpack_address(packed: Optional[bytes]) -> Optional[str]:
+    """Inverse of pack_address()."""
+    if packed is None:
+        return None
+    family = socket.AF_INET6 if len(packed) == 16 else socket.AF_INET
+    return socket.inet_ntop(family, packed)
+
+
+def _code(value, codes: Dict[str, int]) -> Optional[int]:
+    if value is None or isinstance(value, int):
+        return value
+    if value in codes:
+        return codes[value]
+    return int(value, 16)  # Raw kernel state the tracer had no name for
+
+
+def encode_event(event_details: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a NetTracer event into a network table row (codes, packed addresses)."""
+    protocol = event_details["protocol"]
+    if isinstance(protocol, str):
+        protocol = NET_PROTOCOL_CODES[protocol.rstrip("6")]
+    return {
+        "timestamp": event_details.get("timestamp"),
+        "event": _code(event_details["event"], NET_EVENT_CODES),
+        "protocol": protocol,
+        "state": _code(event_details["state"], _STATE_CODES),
+        "previous_state": _code(event_details.get("previous_state"), _STATE_CODES),
+        "local_address": pack_address(event_details["local_address"]),
+        "local_port": event_details["local_port"],
+        "remote_address": pack_address(event_details["remote_address"]),
+        "remote_port": event_details["remote_port"],
+        "inode": event_details.get("inode"),
+        "uid": event_details.get("uid"),
+        "pid": event_details.get("pid"),
+        "command": event_details.get("command"),
+    }
+
+
+def encode_flow(flow: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a FlowAggregator record into a network_flows row."""
+    row = {
+        key: flow.get(key) for key in NetFlowLog.__table__.columns.keys() if key != "id"
+    }
+    row["protocol"] = NET_PROTOCOL_CODES[flow["protocol"].rstrip("6")]
+    row["direction"] = NET_DIRECTION_CODES[flow["direction"]]
+    row["remote_address"] = pack_address(flow["remote_address"])
+    return row
+
+
+class NetCRUD(BaseCRUD):
+    """CRUD operations for NetLog (network table)"""
+
+    @property
+    def model_class(self) -> Type[NetLog]:
+        return NetLog
+
+    def add(self, event_details: Dict[str, Any]) -> NetLog:
+        """
+        Add a new network event to the database
+
+        Args:
+            event_details: Dictionary as produced by NetTracer:
+                - event: str - present, opened, closed or state_changed
+                - protocol: str - tcp, tcp6, udp or udp6
+                - local_address/remote_address: str - IPv4 or IPv6 address
+                - local_port/remote_port: int
+                - state/previous_state: str - TCP state name
+                - inode/uid: int (optional)
+                - pid: int, command: str (optional) - Process holding the socket
+                - timestamp: datetime (optional) - Event timestamp
+
+        Returns:
+            NetLog: The created network log entry
+        """
+        try:
+            row = encode_event(event_details)
+            row["timestamp"] = row["timestamp"] or datetime.utcnow()
+
+            net_log = NetLog(**row)
+            self.session.add(net_log)
+            self.session.commit()
+            self.session.refresh(net_log)
+            return net_log
+
+        except Exception as e:
+            self.session.rollback()
+            raise e
+
+    def add_many(
+        self, events: List[Dict[str, Any]], return_ids: bool = False
+    ) -> Union[int, Tuple[int, int]]:
+        """
+        Add several network events with one executemany INSERT
+
+        Args:
+            events: List of dictionaries with the same keys accepted by add();
+                flow records (event "flow") go to the network_flows table and
+                counter points (event "counter") to network_counters
+            return_ids: Return the (first_id, last_id) range of the network
+                rows instead of the count
+
+        Returns:
+            Number of inserted rows, or the inserted id range
+        """
+        now = datetime.utcnow()
+        rows = []
+        flows = []
+        counters = []
+        for event_details in events:
+            if event_details["event"] == "flow":
+                flows.append(encode_flow(event_details))
+            elif event_details["event"] == "counter":
+                counters.append({key: event_details[key] for key in _COUNTER_COLUMNS})
+            else:
+                row = encode_event(event_details)
+                row["timestamp"] = row["timestamp"] or now
+                rows.append(row)
+
+        if not rows and not flows and not counters:
+            return (0, -1) if return_ids else 0
+
+        try:
+            connection = self.session.connection()
+            last_id = len(rows) - 1
+            if rows:
+                connection.execute(insert(NetLog.__table__), rows)
+                if return_ids:
+                    # Rowids are handed out sequentially while we hold the write lock
+                    last_id = connection.execute(
+                        text("SELECT last_insert_rowid()")
+                    ).scalar()
+            if flows:
+                connection.execute(insert(NetFlowLog.__table__), flows)
+            if counters:
+                connection.execute(insert(NetCounterLog.__table__), counters)
+            self.session.commit()
+
+            if return_ids:
+                return last_id - len(rows) + 1, last_id
+            return len(rows) + len(flows) + len(counters)
+
+        except Exception as e:
+            self.session.rollback()
+            raise e
+
+    @staticmethod
+    def table_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Select the events add_many() stores in the network table
+
+        Args:
+            events: Events passed to add_many()
+
+        Returns:
+            The events that are not flow or counter records, in insertion order
+        """
+        return [event for event in events if event["event"] not in _ROUTED_EVENTS]
+
+    def event_row(self, event: Dict[str, Any], entry_id: int) -> Dict[str, Any]:
+        """
+        Build the row add_many() stored for an event, as as_dict() returns it
+
+        Args:
+            event: One of the events returned by table_events()
+            entry_id: The id the row was given
+
+        Returns:
+            Column name -> value, decoded like the network_events view
+        """
+        return self.as_dict(NetLog(id=entry_id, **encode_event(event)))
+
+    def as_dict(self, entry: NetLog) -> Dict[str, Any]:
+        """
+        Decode a network table row like the network_events view does
+
+        Args:
+            entry: A NetLog entry
+
+        Returns:
+            Column name -> value, with names instead of codes and textual addresses
+        """
+        row = super().as_dict(entry)
+        row["event"] = _EVENT_NAMES.get(row["event"], row["event"])
+        protocol = _PROTOCOL_NAMES.get(row["protocol"], row["protocol"])
+        suffix = "6" if len(row["local_address"]) == 16 else ""
+        row["protocol"] = f"{protocol}{suffix}"
+        row["local_address"] = unpack_address(row["local_address"])
+        row["remote_address"] = unpack_address(row["remote_address"])
+        row["state"] = TCP_STATES.get(row["state"], row["state"])
+        row["previous_state"] = TCP_STATES.get(
+            row["previous_state"], row["previous_state"]
+        )
+        return row
+
+    def get_by_id(self, log_id: int) -> Optional[NetLog]:
+        """
+        Get a network log entry by ID
+
+        Args:
+            log_id: The ID of the log entry
+
+        Returns:
+            NetLog or None if not found
+        """
+        return self.session.query(NetLog).filter(NetLog.id == log_id).first()
+
+    def get_by_remote(
+        self, remote_address: str, remote_port: Optional[int] = None
+    ) -> List[NetLog]:
+        """
+        Get all network log entries for a remote endpoint
+
+        Args:
+            remote_address: IPv4 or IPv6 address of the peer
+            remote_port: Restrict to this peer port (optional)
+
+        Returns:
+            List of NetLog entries, newest first
+        """
+        query = self.session.query(NetLog).filter(
+            NetLog.remote_address == pack_address(remote_address)
+        )
+        if remote_port is not None:
+            query = query.filter(NetLog.remote_port == remote_port)
+        return query.order_by(NetLog.timestamp.desc()).all()
+
+    def get_entries_in_range(self, time_range: TimeRange) -> List[NetLog]:
+        """
+        Get network log entries within an already resolved time range
+
+        Args:
+            time_range: TimeRange whose bounds (either may be open) filter the entries
+
+        Returns:
+            List of NetLog entries within the range, newest first
+        """
+        query = self.session.query(NetLog)
+        if time_range.start_dt is not None:
+            query = query.filter(NetLog.timestamp >= time_range.start_dt)
+        if time_range.end_dt is not None:
+            query = query.filter(NetLog.timestamp <= time_range.end_dt)
+        return query.order_by(NetLog.timestamp.desc()).all()
+
+    def get_flows_in_range(self, time_range: TimeRange) -> List[NetFlowLog]:
+        """
+        Get flow rollups whose window ended within a resolved time range
+
+        Args:
+            time_range: TimeRange whose bounds (either may be open) filter the flows
+
+        Returns:
+            List of NetFlowLog entries within the range, newest first
+        """
+        query = self.session.query(NetFlowLog)
+        if time_range.start_dt is not None:
+            query = query.filter(NetFlowLog.timestamp >= time_range.start_dt)
+        if time_range.end_dt is not None:
+            query = query.filter(NetFlowLog.timestamp <= time_range.end_dt)
+        return query.order_by(NetFlowLog.timestamp.desc()).all()
+
+    def get_counters(
+        self,
+        time_range: TimeRange,
+        resolution_s: int,
+        names: Optional[List[str]] = None,
+    ) -> List[NetCounterLog]:
+        """
+        Get downsampled counter points within an already resolved time range
+
+        Args:
+            time_range: TimeRange whose bounds (either may be open) filter the points
+            resolution_s: Bucket size of the points to return
+            names: Counter names or name prefixes (optional)
+
+        Returns:
+            List of NetCounterLog entries, oldest first
+        """
+        query = self.session.query(NetCounterLog).filter(
+            NetCounterLog.resolution_s == resolution_s
+        )
+        if names:
+            query = query.filter(
+                or_(*(NetCounterLog.name.startswith(name) for name in names))
+            )
+        if time_range.start_dt is not None:
+            query = query.filter(NetCounterLog.timestamp > time_range.start_dt)
+        if time_range.end_dt is not None:
+            query = query.filter(NetCounterLog.timestamp <= time_range.end_dt)
+        return query.order_by(NetCounterLog.timestamp).all()
+
+    def update(self, log_id: int, update_data: Dict[str, Any]) -> Optional[NetLog]:
+        """
+        Update a network log entry
+
+        Args:
+            log_id: The ID of the log entry to update
+            update_data: Dictionary containing (already encoded) fields to update
+
+        Returns:
+            Updated NetLog entry or None if not found
+        """
+        try:
+            net_log = self.session.query(NetLog).filter(NetLog.id == log_id).first()
+            if not net_log:
+                return None
+
+            for key, value in update_data.items():
+                if hasattr(net_log, key):
+                    setattr(net_log, key, value)
+
+            self.session.commit()
+            self.session.refresh(net_log)
+            return net_log
+
+        except Exception as e:
+            self.session.rollback()
+            raise e
+
+    def delete(self, log_id: int) -> bool:
+        """
+        Delete a network log entry
+
+        Args:
+            log_id: The ID of the log entry to delete
+
+        Returns:
+            True if deleted, False if not found
+        """
+        try:
+            net_log = self.session.query(NetLog).filter(NetLog.id == log_id).first()
+            if not net_log:
+                return False
+
+            self.session.delete(net_log)
+            self.session.commit()
+            return True
+
+        except Exception as e:
+            self.session.rollback()
+            raise e
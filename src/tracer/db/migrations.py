@@ -0,0 +1,176 @@
+"""
+Versioned schema migrations for existing tracer databases.
+
+The schema version is stored in SQLite's ``PRAGMA user_version``. Fresh
+databases are created from the models and stamped with the latest version;
+older files are upgraded in place by running the missing steps in order.
+"""
+
+import re
+from typing import List, Tuple
+from sqlalchemy import Engine, inspect, text
+from tracer.db.models import (
+    NET_EVENT_CODES,
+    NET_PROTOCOL_CODES,
+    NET_DIRECTION_CODES,
+    TCP_STATES,
+)
+
+# (version, description, statements). Statements run one per transaction, so
+# a long index build only holds the write lock for that single statement.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (
+        1,
+        "Add time, path and event indexes to file_system",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_file_system_timestamp "
+            "ON file_system (timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_file_system_full_path_timestamp "
+            "ON file_system (full_path, timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_file_system_event_timestamp "
+            "ON file_system (event, timestamp)",
+        ],
+    ),
+    (
+        2,
+        "Add coalescing columns (count, first_timestamp) to file_system",
+        [
+            "ALTER TABLE file_system ADD COLUMN count INTEGER DEFAULT 1",
+            "ALTER TABLE file_system ADD COLUMN first_timestamp DATETIME",
+        ],
+    ),
+    (
+        3,
+        "Add time and remote endpoint indexes to network",
+        [
+            # The table itself is created by create_all() in init_db()
+            "CREATE INDEX IF NOT EXISTS ix_network_timestamp ON network (timestamp)",
+            "CREATE INDEX IF NOT EXISTS ix_network_remote_timestamp "
+            "ON network (remote_address, remote_port, timestamp)",
+        ],
+    ),
+    (
+        4,
+        "Add process attribution to network",
+        [
+            "ALTER TABLE network ADD COLUMN pid INTEGER",
+            "ALTER TABLE network ADD COLUMN command VARCHAR",
+        ],
+    ),
+    (
+        5,
+        "Add the bucket boundary to network_counters",
+        [
+            "ALTER TABLE network_counters ADD COLUMN bucket_end DATETIME",
+        ],
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_ADD_COLUMN = re.compile(r"ALTER TABLE (\w+) ADD COLUMN (\w+)", re.IGNORECASE)
+
+
+def _case(column: str, names: dict) -> str:
+    whens = " ".join(f"WHEN {code} THEN '{name}'" for code, name in names.items())
+    return f"CASE {column} {whens} ELSE {column} END"
+
+
+# Readable views over tables that store codes. They are recreated by
+# create_views() on every init, so changing a definition needs no migration.
+VIEWS = {
+    "network_events": f"""
+        SELECT id, timestamp,
+            {_case("event", {c: n for n, c in NET_EVENT_CODES.items()})} AS event,
+            {_case("protocol", {c: n for n, c in NET_PROTOCOL_CODES.items()})}
+                || CASE length(local_address) WHEN 16 THEN '6' ELSE '' END
+                AS protocol,
+            ip_address(local_address) AS local_address, local_port,
+            ip_address(remote_address) AS remote_address, remote_port,
+            {_case("state", TCP_STATES)} AS state,
+            {_case("previous_state", TCP_STATES)} AS previous_state,
+            inode, uid, pid, command
+        FROM network
+    """,
+    "network_flow_summary": f"""
+        SELECT id, window_start, timestamp AS window_end, first_seen, last_seen,
+            {_case("protocol", {c: n for n, c in NET_PROTOCOL_CODES.items()})}
+                || CASE length(remote_address) WHEN 16 THEN '6' ELSE '' END
+                AS protocol,
+            {_case("direction", {c: n for n, c in NET_DIRECTION_CODES.items()})}
+                AS direction,
+            ip_address(remote_address) AS remote_address, port, pid, command,
+            count, present, opened, closed, state_changed,
+            process_read_bytes, process_write_bytes
+        FROM network_flows
+    """,
+}
+
+
+def create_views(engine: Engine):
+    """(Re)create the views in VIEWS."""
+    with engine.begin() as connection:
+        for name, select in VIEWS.items():
+            connection.execute(text(f"DROP VIEW IF EXISTS {name}"))
+            connection.execute(text(f"CREATE VIEW {name} AS {select}"))
+
+
+def drop_views(engine: Engine):
+    """Drop the views in VIEWS."""
+    with engine.begin() as connection:
+        for name in VIEWS:
+            connection.execute(text(f"DROP VIEW IF EXISTS {name}"))
+
+
+def get_schema_version(engine: Engine) -> int:
+    """Return the schema version recorded in the database file."""
+    with engine.connect() as connection:
+        return connection.execute(text("PRAGMA user_version")).scalar()
+
+
+def set_schema_version(engine: Engine, version: int):
+    """Record the schema version in the database file."""
+    with engine.begin() as connection:
+        connection.execute(text(f"PRAGMA user_version = {int(version)}"))
+
+
+def has_tables(engine: Engine) -> bool:
+    """Return True if the database already contains any table."""
+    return bool(inspect(engine).get_table_names())
+
+
+def _adds_existing_column(engine: Engine, statement: str) -> bool:
+    match = _ADD_COLUMN.match(statement)
+    if match is None:
+        return False
+    table, column = match.groups()
+    return column in {c["name"] for c in inspect(engine).get_columns(table)}
+
+
+def migrate(engine: Engine) -> List[str]:
+    """
+    Apply every migration newer than the database's schema version.
+
+    Args:
+        engine: Engine connected to the database to upgrade
+
+    Returns:
+        Descriptions of the migrations that were applied
+    """
+    current = get_schema_version(engine)
+    applied = []
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        for statement in statements:
+            if _adds_existing_column(engine, statement):
+                # Tables added after this file was created by create_all()
+                # already have every column of the model
+                continue
+            with engine.begin() as connection:
+                connection.execute(text(statement))
+        set_schema_version(engine, version)
+        applied.append(f"v{version}: {description}")
+
+    return applied
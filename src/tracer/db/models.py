@@ -1,4 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import (
+    Column,
+    Integer,
+    SmallInteger,
+    String,
+    DateTime,
+    Float,
+    Boolean,
+    Index,
+    LargeBinary,
+)
 from sqlalchemy.orm import DeclarativeBase
 from datetime import datetime
 
@@ -9,6 +19,12 @@ class Base(DeclarativeBase):
 
 class FileLog(Base):
     __tablename__ = "file_system"
+    # Keep in sync with the migrations in db/migrations.py
+    __table_args__ = (
+        Index("ix_file_system_timestamp", "timestamp"),
+        Index("ix_file_system_full_path_timestamp", "full_path", "timestamp"),
+        Index("ix_file_system_event_timestamp", "event", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True)
     event = Column(String, nullable=False)
@@ -16,3 +32,122 @@ class FileLog(Base):
     is_directory = Column(Boolean, default=False)
     full_path = Column(String, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
+    # Set when several events on the same path were coalesced into this row
+    count = Column(Integer, default=1)
+    first_timestamp = Column(DateTime, nullable=True)
+
+
+# Small-integer codes stored in the network table (decoded by the
+# network_events view)
+NET_EVENT_CODES = {"present": 0, "opened": 1, "closed": 2, "state_changed": 3}
+NET_PROTOCOL_CODES = {"tcp": 6, "udp": 17}  # IANA protocol numbers
+NET_DIRECTION_CODES = {"out": 0, "in": 1}
+# Kernel TCP state numbers, as printed in /proc/net/tcp
+TCP_STATES = {
+    1: "ESTABLISHED",
+    2: "SYN_SENT",
+    3: "SYN_RECV",
+    4: "FIN_WAIT1",
+    5: "FIN_WAIT2",
+    6: "TIME_WAIT",
+    7: "CLOSE",
+    8: "CLOSE_WAIT",
+    9: "LAST_ACK",
+    10: "LISTEN",
+    11: "CLOSING",
+    12: "NEW_SYN_RECV",
+}
+
+
+class NetLog(Base):
+    __tablename__ = "network"
+    # Keep in sync with the migrations in db/migrations.py
+    __table_args__ = (
+        Index("ix_network_timestamp", "timestamp"),
+        Index(
+            "ix_network_remote_timestamp",
+            "remote_address",
+            "remote_port",
+            "timestamp",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    # NET_EVENT_CODES / NET_PROTOCOL_CODES / TCP_STATES
+    event = Column(SmallInteger, nullable=False)
+    protocol = Column(SmallInteger, nullable=False)
+    state = Column(SmallInteger, nullable=False)
+    previous_state = Column(SmallInteger, nullable=True)
+    # Packed addresses: 4 bytes for IPv4, 16 bytes for IPv6
+    local_address = Column(LargeBinary, nullable=False)
+    local_port = Column(Integer, nullable=False)
+    remote_address = Column(LargeBinary, nullable=False)
+    remote_port = Column(Integer, nullable=False)
+    inode = Column(Integer, nullable=True)
+    uid = Column(Integer, nullable=True)
+    # Process holding the socket, when it could be found
+    pid = Column(Integer, nullable=True)
+    command = Column(String, nullable=True)
+
+
+class NetFlowLog(Base):
+    """One flow (process, protocol, remote endpoint) over one window."""
+
+    __tablename__ = "network_flows"
+    __table_args__ = (
+        Index("ix_network_flows_timestamp", "timestamp"),
+        Index(
+            "ix_network_flows_remote_timestamp", "remote_address", "port", "timestamp"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # End of the window; window_start is its beginning
+    timestamp = Column(DateTime, nullable=False)
+    window_start = Column(DateTime, nullable=False)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    # NET_PROTOCOL_CODES / NET_DIRECTION_CODES
+    protocol = Column(SmallInteger, nullable=False)
+    direction = Column(SmallInteger, nullable=False)
+    remote_address = Column(LargeBinary, nullable=False)
+    # Remote port for outgoing flows, our listening port for incoming ones
+    port = Column(Integer, nullable=False)
+    pid = Column(Integer, nullable=True)
+    command = Column(String, nullable=True)
+    # Connection events in the window, in total and per kind
+    count = Column(Integer, nullable=False)
+    present = Column(Integer, default=0)
+    opened = Column(Integer, default=0)
+    closed = Column(Integer, default=0)
+    state_changed = Column(Integer, default=0)
+    # rchar/wchar growth of the whole process during the window, when readable
+    process_read_bytes = Column(Integer, nullable=True)
+    process_write_bytes = Column(Integer, nullable=True)
+
+
+class NetCounterLog(Base):
+    """Growth of one interface/protocol counter over one downsampled bucket."""
+
+    __tablename__ = "network_counters"
+    __table_args__ = (
+        Index("ix_network_counters_timestamp", "timestamp"),
+        Index(
+            "ix_network_counters_name_timestamp", "name", "resolution_s", "timestamp"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # End of the bucket, or its last sample if the tracer stopped inside it
+    timestamp = Column(DateTime, nullable=False)
+    bucket_end = Column(DateTime, nullable=True)
+    resolution_s = Column(Integer, nullable=False)
+    # "<interface>.<counter>" (/proc/net/dev) or "<Protocol>.<Counter>" (snmp)
+    name = Column(String, nullable=False)
+    delta = Column(Integer, nullable=False)
+    rate = Column(Float, nullable=False)  # Per second
+
+
+# Tables of a domain besides the one named after it (cleared along with it)
+DOMAIN_EXTRA_TABLES = {"network": ("network_flows", "network_counters")}
@@ -0,0 +1,310 @@
+"""
+Keyset pagination for arbitrary read-only SQL.
+
+The query is wrapped as ``SELECT * FROM (<query>) WHERE <keys after the
+last page's keys> ORDER BY <keys> LIMIT n``, so every page costs an index
+seek instead of re-reading the rows skipped by OFFSET. The keys are the
+columns of the query's own trailing ORDER BY (when they are plain result
+columns in one direction) followed by ``id``; results without an ``id``
+column are returned as a single, possibly truncated, page. Keys may be
+NULL, and ``id`` may repeat: a page never ends between rows with the same
+keys, and a page made only of such rows is returned as truncated.
+"""
+
+import base64
+import hashlib
+import json
+import re
+from typing import Any, Iterator, List, Optional, Tuple
+from sqlalchemy import Connection, text
+from tracer.db.query_guard import RunningQuery
+from tracer.utils import dumps_columnar
+
+_ORDER_ITEM = re.compile(
+    r'^\s*(?:[\w"]+\.)?(?:"([^"]+)"|(\w+))\s*(ASC|DESC)?\s*$', re.IGNORECASE
+)
+_KEYWORD = re.compile(r"\b(ORDER\s+BY|LIMIT|OFFSET)\b", re.IGNORECASE)
+
+
+class PageTokenError(ValueError):
+    pass
+
+
+class Page:
+    """Rows of one page and the token of the next one."""
+
+    def __init__(
+        self,
+        rows: List[Any],
+        next_token: Optional[str],
+        truncated: bool,
+        columns: Optional[List[str]] = None,
+    ):
+        # Serialized JSON objects, or row tuples for the compact encoding
+        self.rows = rows
+        self.next_token = next_token
+        # More rows exist but cannot be paged to (no id column)
+        self.truncated = truncated
+        self.columns = columns
+
+    def to_json(self, **extra: Any) -> str:
+        """The tool response; serialized rows are joined without re-encoding them."""
+        head = {
+            "status": "success",
+            "row_count": len(self.rows),
+            "next_page_token": self.next_token,
+            "truncated": self.truncated,
+            **extra,
+        }
+        if self.columns is not None:
+            head["encoding"] = "compact"
+            head = json.dumps(head, separators=(",", ":"))
+            return (
+                head[:-1] + ',"data":' + dumps_columnar(self.columns, self.rows) + "}"
+            )
+        head = json.dumps(head)
+        return head[:-1] + ', "data": [' + ", ".join(self.rows) + "]}"
+
+
+def fetch_page(
+    connection: Connection,
+    sql_query: str,
+    limit: int,
+    max_bytes: int,
+    page_token: Optional[str] = None,
+    progress: Optional[RunningQuery] = None,
+    compact: bool = False,
+) -> Page:
+    """
+    Run one page of a SELECT.
+
+    Args:
+        connection: Connection to run the query on
+        sql_query: A SELECT/WITH/VALUES statement
+        limit: Largest number of rows in the page
+        max_bytes: Largest total size of the serialized rows in the page
+        page_token: next_page_token of the previous page
+        progress: Running query whose fetched row count is kept up to date
+        compact: Keep the rows as tuples, for the columnar encoding
+
+    Returns:
+        The page; rows are serialized JSON objects unless compact is set
+    """
+    sql_query = sql_query.strip().rstrip(";")
+    fingerprint = hashlib.sha1(sql_query.encode()).hexdigest()[:16]
+    order = _trailing_order(sql_query)
+
+    wrapped, params = f"SELECT * FROM ({sql_query})", {}
+    if page_token is None:
+        # Only prepares the statement, to learn the result columns
+        columns = list(connection.execute(text(wrapped + " LIMIT 0")).keys())
+        keys, descending = _choose_keys(columns, order)
+    else:
+        keys, descending, last = _decode_token(page_token, fingerprint)
+        wrapped += _after(keys, descending, last, params)
+    if keys is not None:
+        # Same order on every page, with id breaking ties
+        wrapped += _order_by(keys, descending)
+
+    result = connection.execute(text(wrapped + f" LIMIT {int(limit) + 1}"), params)
+    columns = list(result.keys())
+
+    positions = [columns.index(key) for key in keys] if keys is not None else []
+    rows, row_keys, size, more = [], [], 0, False
+    next_row = None
+    for row in _rows(result):
+        if len(rows) == limit:
+            more, next_row = True, row
+            break
+        if compact:
+            # The encoded page is smaller than this, as values are not quoted
+            # or dictionary-encoded; good enough for a budget
+            encoded, length = row, sum(len(str(value)) + 3 for value in row)
+        else:
+            encoded = json.dumps(dict(zip(columns, row)), default=_default)
+            length = len(encoded)
+        if rows and size + length > max_bytes:
+            more, next_row = True, row
+            break
+        rows.append(encoded)
+        row_keys.append(tuple(row[i] for i in positions))
+        size += length
+        if progress is not None:
+            progress.rows = len(rows)
+    result.close()
+
+    page_columns = columns if compact else None
+    if not more:
+        return Page(rows, None, False, page_columns)
+    if keys is not None:
+        # id need not be unique (joins, UNION ALL): rows sharing the last
+        # row's keys would be skipped by the next page, so they all go to it
+        boundary = tuple(next_row[i] for i in positions)
+        end = len(rows)
+        while end and row_keys[end - 1] == boundary:
+            end -= 1
+        if end:
+            del rows[end:], row_keys[end:]
+            if progress is not None:
+                progress.rows = len(rows)
+    if keys is None or not row_keys or row_keys[-1] == boundary:
+        # Nothing to page on, or the whole page shares the same keys
+        return Page(rows, None, True, page_columns)
+    token = _encode_token(keys, descending, list(row_keys[-1]), fingerprint)
+    return Page(rows, token, False, page_columns)
+
+
+def _rows(result) -> Iterator[Tuple]:
+    while True:
+        row = result.fetchone()
+        if row is None:
+            return
+        yield tuple(row)
+
+
+def _choose_keys(
+    columns: List[str], order: Optional[List[Tuple[str, bool]]]
+) -> Tuple[Optional[List[str]], bool]:
+    if "id" not in columns:
+        return None, False
+    if order is None:
+        return ["id"], False
+    keys = [column for column, _ in order]
+    directions = {descending for _, descending in order}
+    if len(directions) != 1 or not all(key in columns for key in keys):
+        return None, False
+    if "id" not in keys:
+        keys.append("id")  # Unique tie-breaker
+    return keys, directions.pop()
+
+
+def _trailing_order(sql_query: str) -> Optional[List[Tuple[str, bool]]]:
+    """
+    Parse the top-level ORDER BY at the end of a query.
+
+    Returns:
+        [(column, descending), ...], None if there is none, or [] if it is
+        not made of plain columns (so the query cannot be paged)
+    """
+    positions = _top_level_keywords(sql_query)
+    order_at = [pos for pos, kw in positions if kw.startswith("ORDER")]
+    if not order_at:
+        return None
+    start = order_at[-1]
+    end = next((pos for pos, kw in positions if pos > start), len(sql_query))
+    clause = _KEYWORD.sub("", sql_query[start:end], count=1)
+
+    items = []
+    for item in _split_top_level(clause):
+        match = _ORDER_ITEM.match(item)
+        if match is None:
+            return []
+        column = match.group(1) or match.group(2)
+        items.append((column, (match.group(3) or "").upper() == "DESC"))
+    return items
+
+
+def _top_level_keywords(sql_query: str) -> List[Tuple[int, str]]:
+    """Positions of ORDER BY/LIMIT/OFFSET outside parentheses and quotes."""
+    depth = [0] * (len(sql_query) + 1)
+    quote = None
+    level = 0
+    for i, char in enumerate(sql_query):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`[":
+            quote = "]" if char == "[" else char
+        elif char == "(":
+            level += 1
+        elif char == ")":
+            level -= 1
+        depth[i] = level if not quote else -1
+    return [
+        (match.start(), re.sub(r"\s+", " ", match.group(1).upper()))
+        for match in _KEYWORD.finditer(sql_query)
+        if depth[match.start()] == 0
+    ]
+
+
+def _split_top_level(clause: str) -> List[str]:
+    items, level, current = [], 0, []
+    for char in clause:
+        if char == "(":
+            level += 1
+        elif char == ")":
+            level -= 1
+        if char == "," and level == 0:
+            items.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    items.append("".join(current))
+    return items
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _after(keys: List[str], descending: bool, last: List[Any], params: dict) -> str:
+    """
+    Rows sorting after the last page's keys.
+
+    Spelled out key by key rather than as a row value comparison, which is
+    NULL as soon as one of the values is: NULL sorts first in SQLite, so
+    it is before every value ascending and after every value descending.
+    """
+    terms = []
+    for i, (key, value) in enumerate(zip(keys, last)):
+        column = _quote(key)
+        if value is None:
+            if descending:
+                continue  # Nothing sorts after NULL
+            after = f"{column} IS NOT NULL"
+        else:
+            params[f"k{i}"] = value
+            after = (
+                f"({column} < :k{i} OR {column} IS NULL)"
+                if descending
+                else f"{column} > :k{i}"
+            )
+        ties = [f"{_quote(k)} IS :k{j}" for j, k in enumerate(keys[:i])]
+        terms.append(" AND ".join(ties + [after]))
+    for j, value in enumerate(last):
+        params.setdefault(f"k{j}", value)
+    if not terms:
+        return " WHERE 0"
+    return " WHERE " + " OR ".join(f"({term})" for term in terms)
+
+
+def _order_by(keys: List[str], descending: bool) -> str:
+    direction = " DESC" if descending else ""
+    return " ORDER BY " + ", ".join(_quote(key) + direction for key in keys)
+
+
+def _default(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def _encode_token(
+    keys: List[str], descending: bool, values: List[Any], fingerprint: str
+) -> str:
+    values = [{"hex": v.hex()} if isinstance(v, bytes) else v for v in values]
+    payload = {"q": fingerprint, "k": keys, "d": descending, "v": values}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _decode_token(token: str, fingerprint: str) -> Tuple[List[str], bool, List[Any]]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        keys, descending, values = payload["k"], payload["d"], payload["v"]
+        query = payload["q"]
+    except (ValueError, KeyError, TypeError):
+        raise PageTokenError("Invalid page token")
+    if query != fingerprint:
+        raise PageTokenError("Page token belongs to a different query")
+    values = [bytes.fromhex(v["hex"]) if isinstance(v, dict) else v for v in values]
+    return keys, descending, values
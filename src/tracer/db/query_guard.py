@@ -0,0 +1,136 @@
+"""
+Time and VM-step budgets for SQL queries, and cancellation of running ones.
+
+SQLite calls a connection's progress handler every SQL_PROGRESS_STEPS
+virtual machine instructions while a statement runs; returning non-zero
+makes the statement fail with "interrupted". QueryGuard installs a handler
+that counts the steps and stops the statement once its deadline or step
+budget is exceeded, or once cancel() was called for it from another thread.
+The handler is removed before the connection goes back to its pool, so
+connections shared with ingestion are never affected.
+"""
+
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import Connection
+from tracer.config import SQL_PROGRESS_STEPS
+
+
+class RunningQuery:
+    """One query registered with QueryGuard and its progress so far."""
+
+    def __init__(
+        self, query_id: str, sql_query: str, timeout_s: float, max_vm_steps: int
+    ):
+        self.query_id = query_id
+        self.sql_query = sql_query
+        self.timeout_s = timeout_s
+        self.max_vm_steps = max_vm_steps
+        self.started_at = datetime.utcnow()
+        self.started = time.monotonic()
+        self.vm_steps = 0
+        self.rows = 0  # Rows fetched so far
+        # Why the query was stopped: "cancelled", "timeout" or "vm_step_budget"
+        self.stop_reason: Optional[str] = None
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def progress(self) -> dict:
+        return {
+            "query_id": self.query_id,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "vm_steps": self.vm_steps,
+            "rows_fetched": self.rows,
+        }
+
+    def describe(self) -> dict:
+        return {
+            **self.progress(),
+            "sql_query": self.sql_query,
+            "started_at": self.started_at.isoformat(),
+            "timeout_s": self.timeout_s,
+            "max_vm_steps": self.max_vm_steps,
+        }
+
+    def _check(self) -> int:
+        # Runs inside sqlite3_step(): keep it cheap
+        self.vm_steps += SQL_PROGRESS_STEPS
+        if self.stop_reason is None:
+            if self.vm_steps > self.max_vm_steps:
+                self.stop_reason = "vm_step_budget"
+            elif time.monotonic() - self.started > self.timeout_s:
+                self.stop_reason = "timeout"
+        return 1 if self.stop_reason is not None else 0
+
+
+class QueryGuard:
+    # query_id -> query currently executing
+    running_queries: Dict[str, RunningQuery] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def run(
+        connection: Connection,
+        sql_query: str,
+        timeout_s: float,
+        max_vm_steps: int,
+        query_id: Optional[str] = None,
+    ) -> Iterator[RunningQuery]:
+        """
+        Register a query and enforce its budgets on the connection it runs on.
+
+        Args:
+            connection: Connection the query runs on
+            sql_query: The statement, for list_running()
+            timeout_s: Wall-clock budget
+            max_vm_steps: SQLite VM instruction budget
+            query_id: Id to cancel the query with (generated if None)
+
+        Yields:
+            The RunningQuery; its stop_reason is set if the query was stopped
+        """
+        query = RunningQuery(
+            query_id or uuid.uuid4().hex[:12], sql_query, timeout_s, max_vm_steps
+        )
+        with QueryGuard._lock:
+            if query.query_id in QueryGuard.running_queries:
+                raise ValueError(f"Query '{query.query_id}' is already running")
+            QueryGuard.running_queries[query.query_id] = query
+
+        dbapi_connection = connection.connection.driver_connection
+        # Only SQLite connections have a progress handler
+        guarded = hasattr(dbapi_connection, "set_progress_handler")
+        if guarded:
+            dbapi_connection.set_progress_handler(query._check, SQL_PROGRESS_STEPS)
+        try:
+            yield query
+        finally:
+            if guarded:
+                dbapi_connection.set_progress_handler(None, 0)
+            with QueryGuard._lock:
+                QueryGuard.running_queries.pop(query.query_id, None)
+
+    @staticmethod
+    def cancel(query_id: str) -> RunningQuery:
+        """Stop a running query at its next progress check."""
+        with QueryGuard._lock:
+            query = QueryGuard.running_queries.get(query_id)
+        if query is None:
+            raise ValueError(f"No running query with id '{query_id}'")
+        query.stop_reason = "cancelled"
+        return query
+
+    @staticmethod
+    def list_running() -> List[dict]:
+        """Queries currently executing, longest running first."""
+        with QueryGuard._lock:
+            queries = list(QueryGuard.running_queries.values())
+        queries.sort(key=lambda query: query.started)
+        return [query.describe() for query in queries]
@@ -0,0 +1,247 @@
+"""
+LRU cache of SQL query results, invalidated by per-table write generations.
+
+Every table has a generation counter that is bumped whenever a transaction
+writing to it commits on the writer engine (ingestion, clear, retention,
+writes sent through execute_sql_query). A cached result remembers the
+generations of the tables its query reads and is only served while they
+are unchanged, so it goes stale exactly when new rows land in one of them.
+Writes made by other processes are not seen; the server is the only writer.
+"""
+
+import functools
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Hashable, Iterable, Optional, Set, Tuple
+from sqlalchemy import Engine, event
+from tracer.config import SQL_CACHE_MAX_BYTES, SQL_CACHE_MAX_ENTRY_BYTES
+
+# Generation bumped by DDL; part of every cached result
+SCHEMA = "sqlite_schema"
+
+# A table name, optionally quoted and qualified by the main/temp schema,
+# capturing the bare name
+_TABLE_NAME = r"[\"`\[]?(?:(?:main|temp)[\"`\]]?\s*\.\s*[\"`\[]?)?(\w+)"
+_WRITTEN_TABLE = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?"
+    r"|DELETE\s+FROM)\s+" + _TABLE_NAME,
+    re.IGNORECASE,
+)
+_DDL = re.compile(r"^\s*(CREATE|DROP|ALTER)\b", re.IGNORECASE)
+_SOURCE = re.compile(
+    r"\b(?:FROM|JOIN)\s+" + _TABLE_NAME + r"[\"`\]]?\s*(\()?", re.IGNORECASE
+)
+_CTE = re.compile(r"(?:\bWITH(?:\s+RECURSIVE)?|,)\s+(\w+)\s+AS\s*\(", re.IGNORECASE)
+_WORD = re.compile(r"\w+")
+# Results that change without any write
+_VOLATILE = re.compile(
+    r"\b(random|randomblob|now|current_date|current_time|current_timestamp"
+    r"|changes|total_changes|last_insert_rowid)\b",
+    re.IGNORECASE,
+)
+_LITERALS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+# Only single quotes make a string; "name" is a quoted identifier
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+
+
+class WriteGenerations:
+    # table -> number of committed transactions that wrote to it
+    generations: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def bump(tables: Iterable[str]):
+        with WriteGenerations._lock:
+            for table in tables:
+                WriteGenerations.generations[table] = (
+                    WriteGenerations.generations.get(table, 0) + 1
+                )
+
+    @staticmethod
+    def snapshot(tables: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+        with WriteGenerations._lock:
+            return tuple(
+                (table, WriteGenerations.generations.get(table, 0))
+                for table in sorted(tables)
+            )
+
+
+def track_writes(engine: Engine):
+    """Bump the generations of the tables written by transactions on engine."""
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def note_write(connection, cursor, statement, parameters, context, executemany):
+        # SQLite names are case-insensitive: match tables_read()
+        tables = {name.lower() for name in _WRITTEN_TABLE.findall(statement)}
+        if _DDL.match(statement):
+            tables.add(SCHEMA)
+        if tables:
+            connection.info.setdefault("written_tables", set()).update(tables)
+
+    @event.listens_for(engine, "commit")
+    def bump_on_commit(connection):
+        # Fires just before the commit itself: bump now so no new result is
+        # cached under the old generation, and again once the connection is
+        # returned (after the commit) for results cached in between
+        tables = connection.info.pop("written_tables", None)
+        if tables:
+            WriteGenerations.bump(tables)
+            connection.info.setdefault("committed_tables", set()).update(tables)
+
+    @event.listens_for(engine, "rollback")
+    def forget_on_rollback(connection):
+        connection.info.pop("written_tables", None)
+
+    @event.listens_for(engine.pool, "checkin")
+    def bump_on_checkin(dbapi_connection, connection_record):
+        tables = connection_record.info.pop("committed_tables", None)
+        if tables:
+            WriteGenerations.bump(tables)
+
+
+def normalize_sql(sql_query: str) -> str:
+    """Collapse whitespace outside string literals and drop the trailing ';'."""
+    parts = _LITERALS.split(sql_query.strip().rstrip(";").strip())
+    # Odd parts are the literals
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _known_sources() -> Dict[str, FrozenSet[str]]:
+    """Table and view names -> the tables they read."""
+    from tracer.db.models import Base
+    from tracer.db.migrations import VIEWS
+
+    # Keys are lowercase: SQLite names are case-insensitive
+    sources = {name: frozenset([name]) for name in Base.metadata.tables}
+    for view, select in VIEWS.items():
+        sources[view.lower()] = frozenset(
+            word for word in _WORD.findall(select) if word in Base.metadata.tables
+        )
+    sources[SCHEMA] = sources["sqlite_master"] = frozenset([SCHEMA])
+    return sources
+
+
+def tables_read(sql_query: str) -> Optional[Set[str]]:
+    """
+    The tables a query reads, or None if that cannot be told.
+
+    Tables and views named after FROM/JOIN must all be known (or CTEs);
+    known names used anywhere else (comma joins, subqueries) count too.
+    """
+    if _VOLATILE.search(sql_query):
+        return None
+    sources = _known_sources()
+    without_literals = _STRINGS.sub("''", sql_query)
+
+    ctes = {name.lower() for name in _CTE.findall(without_literals)}
+    tables = {SCHEMA}
+    for name, call in _SOURCE.findall(without_literals):
+        if call:
+            return None  # Table-valued function: json_each(), pragma_*()...
+        name = name.lower()
+        if name in ctes:
+            continue
+        if name not in sources:
+            return None
+    for word in _WORD.findall(without_literals):
+        tables.update(sources.get(word.lower(), ()))
+    return tables
+
+
+class ResultCache:
+    """
+    Size-bounded LRU of serialized results.
+
+    Entries are keyed by the normalized SQL and the call's parameters, and
+    hold the write generations of the tables read when the query started.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_entry_bytes: Optional[int] = None,
+    ):
+        self.max_bytes = SQL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.max_entry_bytes = (
+            SQL_CACHE_MAX_ENTRY_BYTES if max_entry_bytes is None else max_entry_bytes
+        )
+        # key -> (generations, result)
+        self._entries: OrderedDict[Hashable, Tuple[tuple, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.too_large = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """The cached result, if the tables it read were not written since."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                generations, result = entry
+                if WriteGenerations.snapshot(t for t, _ in generations) == generations:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                self._remove(key)
+                self.stale += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, generations: tuple, result: str):
+        """
+        Store a result.
+
+        Args:
+            key: Cache key of the call
+            generations: WriteGenerations.snapshot() taken before the query ran
+            result: The serialized response
+        """
+        size = len(result)
+        if not self.max_bytes:
+            return
+        if size > self.max_entry_bytes:
+            self.too_large += 1
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (generations, result)
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "too_large": self.too_large,
+            "generations": dict(WriteGenerations.generations),
+        }
+
+    def _remove(self, key: Hashable):
+        _, result = self._entries.pop(key)
+        self.bytes -= len(result)
+
+
+result_cache = ResultCache()
@@ -1,7 +1,13 @@
+import functools
+import anyio
 from mcp.server.fastmcp import FastMCP
 from tracer.server import tools
 from tracer.server import resources
 from tracer.config import LogDomain
+from tracer.store import LogWriter
+from tracer.store.retention import retention_job
+from tracer.tracer_core import TracerCore
+from tracer.db.connection import init_db
 
 # Create the MCP server
 mcp = FastMCP(
@@ -10,23 +16,62 @@ mcp = FastMCP(
     port=9999,
 )
 
+
+def in_worker_thread(tool):
+    """Run a blocking tool off the event loop, so other calls (e.g. cancel_query) are served meanwhile."""
+
+    @functools.wraps(tool)
+    async def run(**arguments):
+        return await anyio.to_thread.run_sync(functools.partial(tool, **arguments))
+
+    return run
+
+
 # --- Register Tools ---
-mcp.tool()(tools.execute_sql_query)
+mcp.tool()(in_worker_thread(tools.execute_sql_query))
+mcp.tool()(tools.cancel_query)
+mcp.tool()(tools.list_running_queries)
+mcp.tool()(tools.get_query_cache_stats)
 mcp.tool()(tools.start_tracing)
 mcp.tool()(tools.stop_tracing)
+mcp.tool()(tools.stop_all_tracers)
+mcp.tool()(tools.show_logs)
+mcp.tool()(tools.tail_logs)
+mcp.tool()(tools.list_tail_subscriptions)
 mcp.tool()(tools.list_tracers)
 mcp.tool()(tools.list_domains)
 mcp.tool()(tools.clear_logs)
 mcp.tool()(tools.initialize_database)
 mcp.tool()(tools.reset_database)
 mcp.tool()(tools.drop_database)
+mcp.tool()(tools.get_storage_info)
+mcp.tool()(tools.get_retention_status)
+mcp.tool()(tools.set_retention_policy)
+mcp.tool()(tools.get_ingest_stats)
+mcp.tool()(tools.get_network_rates)
 
 # --- Register Resources ---
 mcp.resource(f"schema://{LogDomain.FS}")(resources.get_filesystem_schema)
+mcp.resource(f"schema://{LogDomain.NET}")(resources.get_network_schema)
 
 
 def main():
-    mcp.run(transport="streamable-http")
+    # Create missing tables and upgrade older tracer.db files in place
+    for migration in init_db():
+        print(f"Applied migration {migration}")
+    # Replay events spilled to disk before an unclean shutdown
+    LogWriter.resume_spilled()
+    # Delete expired rows and give their pages back, in the background
+    retention_job.start()
+
+    try:
+        mcp.run(transport="streamable-http")
+    finally:
+        # Stop the tracers, then write out events still queued in the
+        # ingestion pipelines
+        TracerCore.stop_all()
+        retention_job.stop(timeout=5)
+        LogWriter.shutdown()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,14 @@
 from sqlalchemy import inspect
-from tracer.db.models import FileLog
+from tracer.db.models import (
+    FileLog,
+    NetLog,
+    NetFlowLog,
+    NetCounterLog,
+    NET_EVENT_CODES,
+    NET_PROTOCOL_CODES,
+    NET_DIRECTION_CODES,
+    TCP_STATES,
+)
 
 
 def _generate_schema_description(model) -> str:
@@ -24,3 +33,37 @@ def _generate_schema_description(model) -> str:
 def get_filesystem_schema() -> str:
     """Returns the live schema for the filesystem logs directly from the DB model."""
     return _generate_schema_description(FileLog)
+
+
+def get_network_schema() -> str:
+    """Returns the live schema for the network logs, with the value encodings."""
+    codes = ", ".join
+    return "\n".join(
+        [
+            _generate_schema_description(NetLog),
+            "Encodings:",
+            f"- event: {codes(f'{c}={n}' for n, c in NET_EVENT_CODES.items())}",
+            f"- protocol: {codes(f'{c}={n}' for n, c in NET_PROTOCOL_CODES.items())}"
+            " (IPv6 when local_address is 16 bytes)",
+            f"- state/previous_state: {codes(f'{c}={n}' for c, n in TCP_STATES.items())}",
+            "- local_address/remote_address: packed 4 (IPv4) or 16 (IPv6) bytes",
+            "View network_events shows the same rows with names and textual "
+            "addresses (ip_address(blob) converts a packed address).",
+            "",
+            _generate_schema_description(NetFlowLog),
+            "Rows are written instead of network rows when tracing with a flow "
+            "window: one per (pid, protocol, direction, remote_address, port) "
+            "and window, timestamp being the end of the window.",
+            f"- direction: {codes(f'{c}={n}' for n, c in NET_DIRECTION_CODES.items())}"
+            " (port is the remote port for out, our listening port for in)",
+            "- process_read_bytes/process_write_bytes: I/O of the whole process "
+            "during the window, shared by all of its flows",
+            "View network_flow_summary shows the same rows decoded.",
+            "",
+            _generate_schema_description(NetCounterLog),
+            "Interface (/proc/net/dev) and protocol (/proc/net/snmp) counters "
+            "downsampled to resolution_s buckets ending at timestamp; buckets "
+            "in which a counter did not move have no row. Recent rates are "
+            "also available from the get_network_rates tool.",
+        ]
+    )
@@ -1,46 +1,269 @@
 import json
+import re
+import time
+from typing import List
+import anyio
+from mcp.server.fastmcp import Context
 from sqlalchemy import text
-from tracer.db.connection import engine, reset_db, drop_db, init_db
+from tracer.db.connection import (
+    engine,
+    read_engine,
+    reset_db,
+    drop_db,
+    init_db,
+    storage_info,
+)
+from tracer.db.paging import fetch_page
+from tracer.db.query_guard import QueryGuard
+from tracer.db.result_cache import (
+    WriteGenerations,
+    normalize_sql,
+    result_cache,
+    tables_read,
+)
+from tracer.store import LogWriter
+from tracer.store.live_tail import LiveTail, to_json_row
+from tracer.store.retention import retention_job
+from tracer.store.recent_events import encode_cursor
 from tracer.tracer_core import TracerCore
-from tracer.config import LogDomain
-
-
-def execute_sql_query(sql_query: str) -> str:
-    """Executes advanced SQL queries and returns results in JSON format."""
+from tracer.utils import encode_columnar
+from tracer.config import (
+    LogDomain,
+    SQL_PAGE_ROWS,
+    SQL_PAGE_MAX_ROWS,
+    SQL_PAGE_MAX_BYTES,
+    SQL_QUERY_TIMEOUT_S,
+    SQL_QUERY_MAX_VM_STEPS,
+    SHOW_LOGS_MAX_LIMIT,
+    TAIL_INTERVAL_MS,
+    TAIL_MAX_BATCH,
+    TAIL_DURATION_S,
+    TAIL_MAX_DURATION_S,
+    TAIL_MAX_EVENTS,
+)
+
+# Leading keywords of statements that can be served by the read-only engine
+_READ_STATEMENTS = {"SELECT", "WITH", "EXPLAIN", "VALUES"}
+# Statements whose rows can be paged by wrapping them in another SELECT
+_PAGED_STATEMENTS = {"SELECT", "WITH", "VALUES"}
+_WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+
+def _is_pageable(sql_query: str) -> bool:
+    """Returns True for statements that can be wrapped in a paging SELECT."""
+    words = sql_query.lstrip().split(None, 1)
+    return bool(words) and words[0].upper() in _PAGED_STATEMENTS
+
+
+def _is_read_only(sql_query: str) -> bool:
+    """Returns True if the statement can run on a read-only connection."""
+    words = sql_query.lstrip().split(None, 1)
+    if not words or words[0].upper() not in _READ_STATEMENTS:
+        return False
+    # A CTE can prefix a write ("WITH ... DELETE ..."); send those to the writer
+    return words[0].upper() != "WITH" or not _WRITE_KEYWORDS.search(sql_query)
+
+
+_ENCODINGS = ("json", "compact")
+
+_STOP_MESSAGES = {
+    "cancelled": "Query cancelled",
+    "timeout": "Query exceeded its time budget",
+    "vm_step_budget": "Query exceeded its VM-step budget",
+}
+
+
+def execute_sql_query(
+    sql_query: str,
+    limit: int = None,
+    page_token: str = None,
+    query_id: str = None,
+    timeout_s: float = None,
+    max_vm_steps: int = None,
+    encoding: str = "json",
+) -> str:
+    """Executes advanced SQL queries and returns results in JSON format.
+
+    SELECT results come in pages of at most `limit` rows (default
+    SQL_PAGE_ROWS) and SQL_PAGE_MAX_BYTES bytes. When more rows exist the
+    response holds a next_page_token; call again with the same sql_query and
+    that page_token for the next page. Paging follows the query's trailing
+    ORDER BY (plain columns, one direction) and needs an id column in the
+    result; other results are cut at one page and marked "truncated".
+
+    Each call is stopped after timeout_s seconds or max_vm_steps SQLite VM
+    instructions (both capped by SQL_QUERY_TIMEOUT_S and
+    SQL_QUERY_MAX_VM_STEPS). Pass a query_id to be able to stop the query
+    with cancel_query; list_running_queries shows the ids of running queries.
+
+    encoding="compact" returns data as {"columns": [...], "rows": [[...]],
+    "dictionaries": {column: [values]}, "prefixes": {column: [directories]}}:
+    values of a column listed in dictionaries are indexes into its list, and
+    values of a column listed in prefixes are [directory index, rest of path].
+
+    SELECT results are cached until new rows are written to the tables they
+    read (see get_query_cache_stats).
+    """
+    query = None
     try:
-        with engine.connect() as connection:
-            result = connection.execute(text(sql_query))
-
-            if result.returns_rows:
-                # Use result.mappings() for cleaner dict conversion in SQLAlchemy 2.0
-                rows = [dict(row) for row in result.mappings()]
-
-                if not rows:
-                    return json.dumps(
+        if encoding not in _ENCODINGS:
+            return json.dumps(
+                {
+                    "status": "error",
+                    "message": f"Invalid encoding '{encoding}'. Valid encodings are: {', '.join(_ENCODINGS)}",
+                }
+            )
+        compact = encoding == "compact"
+        limit = min(limit or SQL_PAGE_ROWS, SQL_PAGE_MAX_ROWS)
+        timeout_s = min(timeout_s or SQL_QUERY_TIMEOUT_S, SQL_QUERY_TIMEOUT_S)
+        max_vm_steps = min(
+            max_vm_steps or SQL_QUERY_MAX_VM_STEPS, SQL_QUERY_MAX_VM_STEPS
+        )
+        read_only = _is_read_only(sql_query)
+        pageable = read_only and _is_pageable(sql_query)
+        # Cached while the tables it reads are unchanged; looked up before
+        # taking a connection, so hits never wait for a busy reader pool
+        tables = tables_read(sql_query) if pageable else None
+        if tables is not None:
+            key = (normalize_sql(sql_query), limit, page_token, encoding)
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+            generations = WriteGenerations.snapshot(tables)
+
+        # Read-only statements run on the reader pool so they never hold the
+        # connection used by ingestion
+        query_engine = read_engine if read_only else engine
+        with (
+            query_engine.connect() as connection,
+            QueryGuard.run(
+                connection, sql_query, timeout_s, max_vm_steps, query_id
+            ) as query,
+        ):
+            if pageable:
+                page = fetch_page(
+                    connection,
+                    sql_query,
+                    limit,
+                    SQL_PAGE_MAX_BYTES,
+                    page_token,
+                    progress=query,
+                    compact=compact,
+                )
+                if not page.rows:
+                    response = json.dumps(
                         {
                             "status": "success",
                             "message": "Query executed successfully. No rows returned.",
                             "data": [],
                         }
                     )
+                else:
+                    # Rows are serialized once, while they are fetched
+                    response = page.to_json()
+                if tables is not None:
+                    result_cache.put(key, generations, response)
+                return response
 
-                # Returning JSON makes it easier for the LLM to parse
-                return json.dumps(
-                    {"status": "success", "data": rows}, indent=2, default=str
-                )
+            result = connection.execute(text(sql_query))
+
+            if result.returns_rows:
+                # EXPLAIN, PRAGMA...: small results, still bounded to one page
+                if compact:
+                    data = encode_columnar(list(result.keys()), result.fetchmany(limit))
+                    return json.dumps(
+                        {"status": "success", "encoding": encoding, "data": data},
+                        separators=(",", ":"),
+                        default=str,
+                    )
+                rows = [dict(row) for row in result.mappings().fetchmany(limit)]
+                return json.dumps({"status": "success", "data": rows}, default=str)
 
             connection.commit()
+            # The rows may no longer match what the ingestion path wrote
+            LogWriter.reset_recent()
             return json.dumps(
                 {"status": "success", "message": f"Rows affected: {result.rowcount}"}
             )
 
     except Exception as e:
+        if query is not None and query.stop_reason is not None:
+            # SQLite aborted the statement; a write is rolled back with it
+            return json.dumps(
+                {
+                    "status": "error",
+                    "message": _STOP_MESSAGES[query.stop_reason],
+                    "reason": query.stop_reason,
+                    "progress": query.progress(),
+                }
+            )
         # Return the error so the LLM can try to fix its own SQL syntax
         return json.dumps({"status": "error", "message": f"SQL Error: {str(e)}"})
 
 
-def start_tracing(domain: str, directory: str = None) -> str:
-    """Starts tracing for the specified domain and optional directory."""
+def cancel_query(query_id: str) -> str:
+    """Stops a query started by execute_sql_query with this query_id."""
+    try:
+        query = QueryGuard.cancel(query_id)
+        return json.dumps(
+            {
+                "status": "success",
+                "message": f"Cancelling query '{query_id}'",
+                "data": query.progress(),
+            }
+        )
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error cancelling query: {str(e)}"}
+        )
+
+
+def get_query_cache_stats() -> str:
+    """Reports hits, misses and evictions of the SQL result cache and its size."""
+    try:
+        return json.dumps({"status": "success", "data": result_cache.stats()}, indent=2)
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error reading cache stats: {str(e)}"}
+        )
+
+
+def list_running_queries() -> str:
+    """Returns the SQL queries currently executing, with their elapsed time."""
+    try:
+        return json.dumps(
+            {"status": "success", "data": QueryGuard.list_running()}, indent=2
+        )
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error listing queries: {str(e)}"}
+        )
+
+
+def start_tracing(
+    domain: str,
+    directory: str = None,
+    coalesce_window_ms: int = None,
+    coalesce_transient: str = None,
+    include: List[str] = None,
+    exclude: List[str] = None,
+    interval_ms: int = None,
+    flow_window_ms: int = None,
+) -> str:
+    """Starts tracing for the specified domain and optional directory.
+
+    For file_system tracing, coalesce_window_ms merges bursts of events on the
+    same path into one record (0 disables it), and coalesce_transient ("drop"
+    or "summary") decides what happens to files created and deleted in a window.
+    include/exclude take gitignore-style patterns (e.g. "node_modules/", "*.pyc",
+    "!keep.log") relative to the directory; filtered events are never stored.
+
+    For network tracing, interval_ms sets how often the connection tables are
+    sampled; only opened/closed/state-changed connections are stored. With
+    flow_window_ms > 0 they are rolled up per (process, remote address, port,
+    protocol) over windows of that length into the network_flows table
+    instead (0 stores every event).
+    """
     try:
         # Validate domain
         valid_domains = [d.value for d in LogDomain]
@@ -53,7 +276,16 @@ def start_tracing(domain: str, directory: str = None) -> str:
             )
 
         # TracerCore will handle validation and return success message
-        result = TracerCore.start_tracing(domain, directory)
+        result = TracerCore.start_tracing(
+            domain,
+            directory,
+            coalesce_window_ms,
+            coalesce_transient,
+            include,
+            exclude,
+            interval_ms,
+            flow_window_ms,
+        )
         return json.dumps({"status": "success", "message": result})
 
     except Exception as e:
@@ -85,6 +317,190 @@ def stop_tracing(domain: str, directory: str = None) -> str:
         )
 
 
+def stop_all_tracers() -> str:
+    """Stops every active tracer in parallel, writing out their buffered events."""
+    try:
+        result = TracerCore.stop_all()
+        return json.dumps(
+            {
+                "status": "success",
+                "message": f"Stopped {len(result)} tracer(s)",
+                "data": result,
+            }
+        )
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error stopping tracers: {str(e)}"}
+        )
+
+
+def show_logs(
+    domain: str, limit: int = None, before: str = None, after: str = None
+) -> str:
+    """Returns the newest events of a domain, newest first.
+
+    Recent events are served from memory. For older ones pass the
+    next_cursor of the previous response as before; a time ("5m", ISO) works
+    too. after returns the events newer than a cursor, oldest first, and a
+    next_cursor to poll for the following ones.
+    """
+    try:
+        # Validate domain
+        valid_domains = [d.value for d in LogDomain]
+        if domain not in valid_domains:
+            return json.dumps(
+                {
+                    "status": "error",
+                    "message": f"Invalid domain '{domain}'. Valid domains are: {', '.join(valid_domains)}",
+                }
+            )
+
+        page = TracerCore.show_logs(domain, limit, before, after)
+        return json.dumps(
+            {
+                "status": "success",
+                "source": page["source"],
+                "next_cursor": page["next_cursor"],
+                "data": page["rows"],
+            },
+            default=str,
+        )
+
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error showing logs: {str(e)}"}
+        )
+
+
+async def tail_logs(
+    domain: str,
+    ctx: Context,
+    path_prefix: str = None,
+    events: List[str] = None,
+    after: str = None,
+    interval_ms: int = None,
+    duration_s: float = None,
+    max_events: int = None,
+) -> str:
+    """Streams the events of a domain as they are written.
+
+    Every interval_ms the new events are sent as progress notifications whose
+    message is JSON {"data": [events], "dropped": n}; a client that does not
+    ask for progress gets them in the response instead. path_prefix filters on
+    full_path (file_system) or remote_address (network), events on event
+    names, e.g. ["created", "deleted"]. Returns after duration_s or max_events
+    with a next_cursor; pass it as after to the next call to miss nothing in
+    between. dropped counts events lost because they were read too slowly.
+    """
+    log_domain = next((d for d in LogDomain if d.value == domain), None)
+    if log_domain is None:
+        valid_domains = [d.value for d in LogDomain]
+        return json.dumps(
+            {
+                "status": "error",
+                "message": f"Invalid domain '{domain}'. Valid domains are: {', '.join(valid_domains)}",
+            }
+        )
+
+    try:
+        interval = (TAIL_INTERVAL_MS if interval_ms is None else interval_ms) / 1000
+        duration = min(
+            TAIL_DURATION_S if duration_s is None else duration_s, TAIL_MAX_DURATION_S
+        )
+        max_events = min(max_events or TAIL_MAX_EVENTS, TAIL_MAX_EVENTS)
+        meta = ctx.request_context.meta
+        streaming = meta is not None and meta.progressToken is not None
+        collected = []
+        delivered = dropped = 0
+
+        async def deliver(rows, dropped_now):
+            nonlocal delivered, dropped
+            rows = [to_json_row(row) for row in rows]
+            delivered += len(rows)
+            dropped += dropped_now
+            if streaming:
+                message = {"data": rows, "dropped": dropped_now}
+                await ctx.report_progress(
+                    delivered, message=json.dumps(message, default=str)
+                )
+            else:
+                collected.extend(rows)
+
+        def show_after(cursor, limit):
+            return TracerCore.show_logs(domain, limit, after=cursor)
+
+        with LiveTail.subscribe(log_domain, path_prefix, events) as subscription:
+            # Subscribed first, so rows written from here on are not missed;
+            # those already in the table are skipped by id
+            if after is None:
+                newest = await anyio.to_thread.run_sync(TracerCore.show_logs, domain, 1)
+                rows = newest["rows"]
+                cursor = encode_cursor(rows[0]) if rows else "0001-01-01#0"
+                last_id = rows[0]["id"] if rows else 0
+            else:
+                # Catch up on the rows written after the cursor
+                cursor, last_id = after, 0
+                while delivered < max_events:
+                    page = await anyio.to_thread.run_sync(
+                        show_after, cursor, SHOW_LOGS_MAX_LIMIT
+                    )
+                    batch = []
+                    for row in page["rows"]:
+                        last_id = max(last_id, row["id"])
+                        cursor = encode_cursor(row)
+                        if subscription.matches(row):
+                            batch.append(row)
+                            if delivered + len(batch) >= max_events:
+                                break
+                    for start in range(0, len(batch), TAIL_MAX_BATCH):
+                        await deliver(batch[start : start + TAIL_MAX_BATCH], 0)
+                    if len(page["rows"]) < SHOW_LOGS_MAX_LIMIT:
+                        break
+
+            deadline = time.monotonic() + duration
+            while delivered < max_events and time.monotonic() < deadline:
+                await anyio.sleep(max(0, min(interval, deadline - time.monotonic())))
+                while delivered < max_events:
+                    rows, dropped_now = subscription.take(
+                        min(TAIL_MAX_BATCH, max_events - delivered)
+                    )
+                    rows = [row for row in rows if row["id"] > last_id]
+                    if rows:
+                        cursor = encode_cursor(rows[-1])
+                    if rows or dropped_now:
+                        await deliver(rows, dropped_now)
+                    if not rows:
+                        break
+
+        return json.dumps(
+            {
+                "status": "success",
+                "delivered": delivered,
+                "dropped": dropped,
+                "next_cursor": cursor,
+                "data": collected,
+            },
+            default=str,
+        )
+
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error tailing logs: {str(e)}"}
+        )
+
+
+def list_tail_subscriptions() -> str:
+    """Returns the active tail_logs subscriptions with their buffer usage."""
+    try:
+        return json.dumps(
+            {"status": "success", "data": LiveTail.list_subscriptions()}, indent=2
+        )
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error listing subscriptions: {str(e)}"}
+        )
+
+
 def list_tracers() -> str:
     """Returns JSON formatted list of all active tracers and their configurations."""
     try:
@@ -143,13 +559,14 @@ def clear_logs(domain: str) -> str:
 
 
 def initialize_database() -> str:
-    """Initializes the database by creating all required tables."""
+    """Initializes the database, creating missing tables and applying migrations."""
     try:
-        init_db()
+        applied = init_db()
         return json.dumps(
             {
                 "status": "success",
                 "message": "Successfully initialized database and created all tables",
+                "migrations_applied": applied,
             }
         )
     except Exception as e:
@@ -162,6 +579,7 @@ def reset_database() -> str:
     """Resets the database by dropping and recreating all tables."""
     try:
         reset_db()
+        LogWriter.reset_recent(empty=True)
         return json.dumps(
             {
                 "status": "success",
@@ -178,6 +596,7 @@ def drop_database() -> str:
     """Drops all tables in the database."""
     try:
         drop_db()
+        LogWriter.reset_recent(empty=True)
         return json.dumps(
             {"status": "success", "message": "Successfully dropped all database tables"}
         )
@@ -185,3 +604,111 @@ def drop_database() -> str:
         return json.dumps(
             {"status": "error", "message": f"Error dropping database: {str(e)}"}
         )
+
+
+def get_storage_info() -> str:
+    """Reports the active SQLite storage profile and the PRAGMAs in effect."""
+    try:
+        return json.dumps({"status": "success", "data": storage_info()}, indent=2)
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error reading storage info: {str(e)}"}
+        )
+
+
+def get_retention_status() -> str:
+    """Reports the retention policies and the progress, last run and bytes
+    reclaimed of the background retention job."""
+    try:
+        return json.dumps(
+            {"status": "success", "data": retention_job.status()}, indent=2
+        )
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error reading retention status: {str(e)}"}
+        )
+
+
+def set_retention_policy(
+    domain: str,
+    max_age_s: int = None,
+    max_rows: int = None,
+    max_bytes: int = None,
+    run_now: bool = False,
+) -> str:
+    """Sets the limits of a domain's retention policy until the server restarts.
+
+    Only the limits given change; pass 0 to disable one. Rows older than
+    max_age_s, then the oldest beyond max_rows and max_bytes, are deleted by
+    the next run, which run_now starts right away in the background.
+    """
+    try:
+        # Validate domain
+        valid_domains = [d.value for d in LogDomain]
+        if domain not in valid_domains:
+            return json.dumps(
+                {
+                    "status": "error",
+                    "message": f"Invalid domain '{domain}'. Valid domains are: {', '.join(valid_domains)}",
+                }
+            )
+
+        limits = {
+            key: value or None
+            for key, value in (
+                ("max_age_s", max_age_s),
+                ("max_rows", max_rows),
+                ("max_bytes", max_bytes),
+            )
+            if value is not None
+        }
+        retention_job.set_policy(domain, **limits)
+        if run_now:
+            retention_job.trigger()
+        return json.dumps(
+            {"status": "success", "data": retention_job.policies[domain]}, indent=2
+        )
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error setting retention policy: {str(e)}"}
+        )
+
+
+def get_network_rates(
+    start: str = "30s",
+    end: str = None,
+    series: List[str] = None,
+    step_s: float = None,
+) -> str:
+    """Returns per-second rates of network interface and protocol counters.
+
+    start/end take ISO timestamps or fuzzy times like "30s", "5m", "2h".
+    series filters by counter name or prefix, e.g. ["eth0.rx_bytes", "Tcp."]
+    (interface counters are "<interface>.rx_bytes" etc., protocol counters
+    "Tcp.RetransSegs" etc.). step_s averages the samples over buckets of that
+    many seconds. Recent ranges are served from memory while network tracing
+    runs; older ones from the downsampled points in network_counters.
+    """
+    try:
+        return json.dumps(
+            {
+                "status": "success",
+                "data": TracerCore.network_rates(start, end, series, step_s),
+            }
+        )
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error reading network rates: {str(e)}"}
+        )
+
+
+def get_ingest_stats() -> str:
+    """Reports ingestion queue depth and dropped/spilled event counts per domain."""
+    try:
+        return json.dumps(
+            {"status": "success", "data": TracerCore.ingest_stats()}, indent=2
+        )
+    except Exception as e:
+        return json.dumps(
+            {"status": "error", "message": f"Error reading ingest stats: {str(e)}"}
+        )
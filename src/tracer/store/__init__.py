@@ -2,8 +2,10 @@
 
 from .log_reader import LogReader
 from .log_writer import LogWriter
+from .ingest import IngestPipeline
 
 __all__ = [
     "LogReader",
     "LogWriter",
+    "IngestPipeline",
 ]
@@ -0,0 +1,620 @@
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from tracer.config import (
+    INGEST_BATCH_SIZE,
+    INGEST_FLUSH_INTERVAL_MS,
+    INGEST_DRAIN_ON_STOP,
+    INGEST_QUEUE_MAX_EVENTS,
+    INGEST_OVERFLOW_POLICY,
+    INGEST_SAMPLE_EVERY,
+    INGEST_SPILL_MAX_BYTES,
+)
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "sample")
+
+# Key under which a spilled event lists its datetime fields
+_DATETIME_KEYS = "__datetimes__"
+
+
+class SpillFile:
+    """
+    Append-only JSONL file holding events that did not fit in memory.
+
+    Events are read back in the order they were written and the file is
+    truncated once the reader catches up. A file left behind by a previous
+    run is replayed, so events spilled before a crash are not lost.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.pending = 0
+        self._out = None
+        self._in = None
+
+        if self.path.exists():
+            self.size = self.path.stat().st_size
+            with open(self.path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    self.pending += block.count(b"\n")
+            if not self.pending:
+                self._reset()
+
+    @property
+    def active(self) -> bool:
+        return self.pending > 0
+
+    def write(self, event: Dict[str, Any]) -> bool:
+        """Append an event, returning False if the file is full."""
+        if self.size >= self.max_bytes:
+            return False
+        if self._out is None:
+            self._out = open(self.path, "ab")
+        line = _encode(event)
+        self._out.write(line)
+        self.size += len(line)
+        self.pending += 1
+        return True
+
+    def claim(self, limit: int) -> int:
+        """
+        Reserve up to limit of the oldest spilled events for read().
+
+        Called with the pipeline's lock held, like write().
+        """
+        count = min(self.pending, limit)
+        if count and self._out is not None:
+            self._out.flush()  # So read() finds them on disk
+        self.pending -= count
+        return count
+
+    def read(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Return the events reserved by claim().
+
+        Only the writer thread reads, and without the pipeline's lock:
+        producers only ever append after the reserved lines.
+        """
+        if self._in is None:
+            self._in = open(self.path, "rb")
+
+        events = []
+        for _ in range(count):
+            line = self._in.readline()
+            if not line:
+                break
+            try:
+                events.append(_decode(line))
+            except ValueError as e:
+                print(f"Skipping unreadable spilled event: {e}")
+        return events
+
+    def release(self):
+        """Truncate the file once every event was read (pipeline's lock held)."""
+        if not self.pending:
+            self._reset()
+
+    def discard(self) -> int:
+        """Drop every spilled event, returning how many there were."""
+        count = self.pending
+        self._reset()
+        return count
+
+    def close(self):
+        """Close the file handles, keeping unread events for the next run."""
+        for handle in (self._out, self._in):
+            if handle is not None:
+                handle.close()
+        self._out = self._in = None
+
+    def _reset(self):
+        self.close()
+        with open(self.path, "wb"):
+            pass
+        self.size = 0
+        self.pending = 0
+
+
+class IngestPipeline:
+    """
+    Bounded in-memory queue drained by a dedicated writer thread.
+
+    Events are collected into batches and handed to ``sink`` once
+    ``batch_size`` events or ``flush_interval_ms`` milliseconds have
+    accumulated, so the producer (e.g. the watchdog thread) never waits
+    on SQLite or the JSONL file.
+
+    At most ``max_queue`` events are held in memory. Beyond that, events go
+    to the spill file (if one is configured) until the writer catches up;
+    when they cannot be spilled either, ``overflow_policy`` decides whether
+    the producer blocks, the oldest queued event is dropped, or only one in
+    ``sample_every`` new events is kept.
+
+    Events are written in timestamp order. put() stamps the events that have
+    no timestamp, so the queue is in that order; tickers may hand out older
+    events (e.g. coalesced records carry the time of their last event), and
+    report through their ``hold`` the oldest timestamp they may still hand
+    out. Events newer than that wait in the writer thread until it passes.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[Dict[str, Any]]], None],
+        name: str = "ingest",
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval_ms: int = INGEST_FLUSH_INTERVAL_MS,
+        drain_on_stop: bool = INGEST_DRAIN_ON_STOP,
+        max_queue: int = INGEST_QUEUE_MAX_EVENTS,
+        overflow_policy: str = INGEST_OVERFLOW_POLICY,
+        sample_every: int = INGEST_SAMPLE_EVERY,
+        spill_path: Optional[Path] = None,
+        spill_max_bytes: Optional[int] = INGEST_SPILL_MAX_BYTES,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            sink: Callable that persists a list of events in one go.
+            name: Name of the writer thread.
+            batch_size: Maximum number of events per batch.
+            flush_interval_ms: Maximum time an event waits before being written.
+            drain_on_stop: Whether pending events are written or discarded on stop.
+            max_queue: Maximum number of events held in memory.
+            overflow_policy: "block", "drop_oldest" or "sample".
+            sample_every: Keep one in this many events under the "sample" policy.
+            spill_path: File receiving events beyond max_queue (None disables it).
+            spill_max_bytes: Size limit of the spill file (None/0 disables it).
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Invalid overflow policy '{overflow_policy}'. "
+                f"Valid policies are: {', '.join(OVERFLOW_POLICIES)}"
+            )
+        self.sink = sink
+        self.name = name
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000.0
+        self.drain_on_stop = drain_on_stop
+        self.max_queue = max(1, max_queue)
+        self.overflow_policy = overflow_policy
+        self.sample_every = max(1, sample_every)
+
+        self._events: Deque[Dict[str, Any]] = deque()
+        self._spill: Optional[SpillFile] = None
+        if spill_path is not None and spill_max_bytes:
+            self._spill = SpillFile(spill_path, spill_max_bytes)
+
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Wakes the writer thread / producers waiting for room / flush() callers
+        self._wakeup = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)
+        self._done = threading.Condition(self._lock)
+        self._flush_requested = False
+        self._stop_request: Optional[bool] = None
+
+        # Sequence counters used by flush() to wait for already queued events
+        # (events replayed from a previous run's spill file count as queued)
+        self._enqueued = self._spill.pending if self._spill else 0
+        self._processed = 0
+
+        # Callables polled by the writer thread for events that became due
+        # (e.g. coalesced records whose window elapsed), their holds, and
+        # those to poll one last time before removing them
+        self._tickers: List[Callable[[], List[Dict[str, Any]]]] = []
+        self._holds: Dict[Callable, Callable[[], Optional[datetime]]] = {}
+        self._retiring: List[Callable[[], List[Dict[str, Any]]]] = []
+
+        # Writer thread only: events taken but newer than a hold, oldest
+        # first, and the oldest timestamp the queue may still give
+        self._held: List[Dict[str, Any]] = []
+        self._queue_floor: Optional[datetime] = None
+
+        self.written = 0
+        self.discarded = 0
+        self.failed = 0
+        self.batches = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.blocked = 0
+        self.blocked_seconds = 0.0
+        self.high_water = 0
+        self._overflowed = 0
+
+    def start(self):
+        """Start the writer thread (no-op if already running)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_request = None
+            self._thread = threading.Thread(
+                target=self._run, daemon=True, name=self.name
+            )
+            self._thread.start()
+
+    def put(self, event: Dict[str, Any]):
+        """Queue a single event for writing, applying the overflow policy if full."""
+        with self._lock:
+            # Stamped under the lock, so queue order is timestamp order
+            if event.get("timestamp") is None:
+                event["timestamp"] = datetime.utcnow()
+            self._enqueued += 1
+            waited = False
+
+            while True:
+                spill = self._spill
+                if spill is not None and (spill.active or self._is_full()):
+                    # Once spilling started, later events follow the spilled
+                    # ones so they are written in order
+                    if spill.write(event):
+                        self.spilled += 1
+                        self._wakeup.notify()
+                        return
+                elif not self._is_full():
+                    break
+
+                # Neither memory nor the spill file has room
+                if self.overflow_policy == "block":
+                    if not waited:
+                        self.blocked += 1
+                        waited = True
+                    if self._wait_for_space():
+                        continue
+                    break  # Writer thread is gone, queue it anyway
+
+                if self.overflow_policy == "sample":
+                    self._overflowed += 1
+                    if self._overflowed % self.sample_every:
+                        self._drop(1)
+                        return
+                if spill is not None and spill.active:
+                    # The oldest events are on disk; give up the new one
+                    # rather than write it out of order
+                    self._drop(1)
+                    return
+                self._events.popleft()
+                self._drop(1)
+                break
+
+            self._events.append(event)
+            self.high_water = max(self.high_water, len(self._events))
+            self._wakeup.notify()
+
+    def add_ticker(
+        self,
+        ticker: Callable[[], List[Dict[str, Any]]],
+        hold: Optional[Callable[[], Optional[datetime]]] = None,
+    ):
+        """
+        Register a callable polled every flush interval for extra events.
+
+        Args:
+            ticker: Returns the events that became due
+            hold: Returns the oldest timestamp ticker may still return (None
+                if it holds nothing); newer events are not written until then
+        """
+        with self._lock:
+            self._tickers.append(ticker)
+            if hold is not None:
+                self._holds[ticker] = hold
+        self.start()
+        # Wake the writer thread so it starts polling on its next wait
+        with self._lock:
+            self._flush_requested = True
+            self._wakeup.notify()
+
+    def remove_ticker(self, ticker: Callable[[], List[Dict[str, Any]]]):
+        """
+        Stop polling a ticker registered with add_ticker().
+
+        The writer thread polls it one last time first, so what it still
+        had is written in order; this waits for that poll.
+        """
+        with self._lock:
+            if ticker not in self._tickers:
+                return
+            if self._running():
+                self._retiring.append(ticker)
+                self._flush_requested = True
+                self._wakeup.notify()
+                while ticker in self._tickers and self._running():
+                    self._done.wait(0.5)
+            if ticker not in self._tickers:
+                return
+            # No writer thread to poll it: queue what it has for the next one
+            self._tickers.remove(ticker)
+            self._holds.pop(ticker, None)
+        for event in ticker():
+            self.put(event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every event queued before this call has been written.
+
+        Args:
+            timeout: Maximum number of seconds to wait (None waits forever).
+
+        Returns:
+            True if all pending events were processed, False on timeout.
+        """
+        with self._lock:
+            target = self._enqueued
+            if self._processed >= target:
+                return True
+            if not self._running():
+                return False
+            self._flush_requested = True
+            self._wakeup.notify()
+            return self._done.wait_for(lambda: self._processed >= target, timeout)
+
+    def stop(self, drain: Optional[bool] = None, timeout: Optional[float] = None):
+        """
+        Stop the writer thread.
+
+        Args:
+            drain: Write pending events before stopping (defaults to drain_on_stop).
+            timeout: Maximum number of seconds to wait for the thread.
+        """
+        thread = self._thread
+        if not thread or not thread.is_alive():
+            return
+        with self._lock:
+            self._stop_request = self.drain_on_stop if drain is None else drain
+            self._wakeup.notify()
+            self._space.notify_all()
+        thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters describing the pipeline's activity."""
+        with self._lock:
+            pending = self._enqueued - self._processed
+            queue_depth = len(self._events)
+            spill_pending = self._spill.pending if self._spill else 0
+            spill_bytes = self._spill.size if self._spill else 0
+        return {
+            "held_for_order": len(self._held),
+            "pending": pending,
+            "queue_depth": queue_depth,
+            "max_queue": self.max_queue,
+            "high_water": self.high_water,
+            "overflow_policy": self.overflow_policy,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "spilled": self.spilled,
+            "spill_pending": spill_pending,
+            "spill_bytes": spill_bytes,
+            "written": self.written,
+            "discarded": self.discarded,
+            "failed": self.failed,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "running": self._running(),
+        }
+
+    # ========== Producer side (callers hold self._lock) ==========
+
+    def _is_full(self) -> bool:
+        return len(self._events) >= self.max_queue
+
+    def _wait_for_space(self) -> bool:
+        # Re-checked periodically so a writer thread that died cannot hang us
+        if not self._running() or self._stop_request is not None:
+            return False
+        started = time.monotonic()
+        self._space.wait(0.5)
+        self.blocked_seconds += time.monotonic() - started
+        return True
+
+    def _drop(self, count: int):
+        self.dropped += count
+        self._processed += count
+        self._done.notify_all()
+
+    def _running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    # ========== Writer thread ==========
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = None
+
+        while True:
+            with self._lock:
+                timed_out = False
+                while not self._has_work():
+                    wait = None if deadline is None else deadline - time.monotonic()
+                    if wait is None and (self._tickers or self._held):
+                        wait = self.flush_interval
+                    if (wait is not None and wait <= 0) or not self._wakeup.wait(wait):
+                        timed_out = True  # Flush interval elapsed
+                        break
+
+                force = timed_out or self._flush_requested
+                self._flush_requested = False
+                stop = self._stop_request
+                if stop is False:
+                    discarded = len(self._events) + (
+                        self._spill.discard() if self._spill else 0
+                    )
+                    self._events.clear()
+                    items = []
+                    claimed = 0
+                else:
+                    items, claimed = self._take(self.batch_size - len(batch))
+                # Later puts are stamped after this
+                drained = not self._has_queued()
+                taken_at = datetime.utcnow()
+                self._space.notify_all()
+
+            if claimed:
+                # Off the lock, so producers never wait on the disk
+                items.extend(self._read_spill(claimed))
+            if drained:
+                self._queue_floor = taken_at
+            elif items:
+                # What is still queued is no older than what was just taken
+                self._queue_floor = items[-1]["timestamp"]
+
+            # Ticker events are newer than the items queued before the poll
+            batch.extend(items)
+            if force:
+                batch.extend(self._poll_tickers())
+
+            if stop is not None:
+                if stop:
+                    self._write(batch, final=True)
+                    batch = []
+                    with self._lock:
+                        if self._has_queued():
+                            continue  # Keep draining in batch_size chunks
+                else:
+                    self._discard(batch + self._held, discarded)
+                    self._held = []
+                if self._spill is not None:
+                    with self._lock:
+                        self._spill.close()
+                return
+
+            if items and deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if deadline is not None and time.monotonic() >= deadline:
+                force = True
+
+            if force or len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def _has_queued(self) -> bool:
+        return bool(self._events) or bool(self._spill and self._spill.active)
+
+    def _has_work(self) -> bool:
+        return (
+            self._has_queued()
+            or self._flush_requested
+            or self._stop_request is not None
+        )
+
+    def _take(self, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        # Memory holds the oldest events, the spill file the ones after them
+        items = []
+        while self._events and len(items) < limit:
+            items.append(self._events.popleft())
+        claimed = 0
+        if len(items) < limit and self._spill is not None:
+            claimed = self._spill.claim(limit - len(items))
+        return items, claimed
+
+    def _read_spill(self, count: int) -> List[Dict[str, Any]]:
+        events = self._spill.read(count)
+        with self._lock:
+            self._spill.release()
+        lost = count - len(events)
+        if lost:
+            # Unreadable lines: nothing will ever write them
+            self.failed += lost
+            self._mark_processed(lost)
+        return events
+
+    def _poll_tickers(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            tickers = list(self._tickers)
+            retiring = [ticker for ticker in self._retiring if ticker in tickers]
+        events = []
+        for ticker in tickers:
+            try:
+                events.extend(ticker())
+            except Exception as e:
+                print(f"Error polling {ticker}: {e}")
+        with self._lock:
+            self._enqueued += len(events)
+            for ticker in retiring:
+                self._tickers.remove(ticker)
+                self._holds.pop(ticker, None)
+                self._retiring.remove(ticker)
+            if retiring:
+                self._done.notify_all()
+        return events
+
+    def _in_order(
+        self, batch: List[Dict[str, Any]], final: bool
+    ) -> List[Dict[str, Any]]:
+        """The events that can be written now, oldest first; the rest are held."""
+        if not self._holds and not self._held:
+            return batch  # Nothing hands out old events: already in order
+        events = self._held + batch
+        events.sort(key=lambda event: event["timestamp"])
+        if final:
+            self._held = []
+            return events
+
+        bounds = [self._queue_floor] if self._queue_floor is not None else []
+        with self._lock:
+            holds = list(self._holds.values())
+        for hold in holds:
+            try:
+                bound = hold()
+            except Exception as e:
+                print(f"Error asking {hold} for its oldest event: {e}")
+                continue
+            if bound is not None:
+                bounds.append(bound)
+        if not bounds:
+            self._held = []
+            return events
+        bound = min(bounds)
+        end = len(events)
+        while end and events[end - 1]["timestamp"] > bound:
+            end -= 1
+        self._held = events[end:]
+        return events[:end]
+
+    def _write(self, batch: List[Dict[str, Any]], final: bool = False):
+        batch = self._in_order(batch, final)
+        if batch:
+            try:
+                self.sink(batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Error writing batch of {len(batch)} events: {e}")
+        self._mark_processed(len(batch))
+
+    def _discard(self, batch: List[Dict[str, Any]], queued: int = 0):
+        self.discarded += len(batch) + queued
+        self._mark_processed(len(batch) + queued)
+
+    def _mark_processed(self, count: int):
+        with self._done:
+            self._processed += count
+            self._done.notify_all()
+
+
+def _encode(event: Dict[str, Any]) -> bytes:
+    record = {}
+    datetimes = []
+    for key, value in event.items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+            datetimes.append(key)
+        record[key] = value
+    if datetimes:
+        record[_DATETIME_KEYS] = datetimes
+    return (json.dumps(record, default=str) + "\n").encode("utf-8")
+
+
+def _decode(line: bytes) -> Dict[str, Any]:
+    event = json.loads(line)
+    for key in event.pop(_DATETIME_KEYS, []):
+        event[key] = datetime.fromisoformat(event[key])
+    return event
@@ -0,0 +1,170 @@
+"""
+Live subscriptions to the events written by the ingestion pipelines.
+
+LogWriter publishes the rows of every committed batch. Each Subscription
+keeps the rows matching its filters in a bounded buffer that its consumer
+drains once per delivery interval. A consumer that falls behind loses the
+oldest undelivered rows and is told how many; it never holds up the writer.
+"""
+
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from tracer.config import LogDomain, TAIL_BUFFER_EVENTS
+
+# Column path_prefix is matched against, per domain
+PATH_FIELDS = {LogDomain.FS: "full_path", LogDomain.NET: "remote_address"}
+
+
+def to_json_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """A row with its datetimes as ISO strings."""
+    return {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row.items()
+    }
+
+
+class Subscription:
+    """One consumer's filters and its buffer of undelivered rows."""
+
+    def __init__(
+        self,
+        domain: LogDomain,
+        path_prefix: Optional[str] = None,
+        events: Optional[Iterable[str]] = None,
+        capacity: int = TAIL_BUFFER_EVENTS,
+    ):
+        self.subscription_id = uuid.uuid4().hex[:12]
+        self.domain = domain
+        self.path_prefix = path_prefix
+        self.events = frozenset(events) if events else None
+        self.capacity = capacity
+        self.created_at = datetime.utcnow()
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+
+        self.matched = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._unreported_drops = 0  # Dropped since the last take()
+
+    def matches(self, row: Dict[str, Any]) -> bool:
+        if self.events is not None and row.get("event") not in self.events:
+            return False
+        if self.path_prefix is not None:
+            value = row.get(PATH_FIELDS[self.domain])
+            return isinstance(value, str) and value.startswith(self.path_prefix)
+        return True
+
+    def offer(self, rows: List[Dict[str, Any]]):
+        """Buffer the matching rows, dropping the oldest past capacity."""
+        matching = [row for row in rows if self.matches(row)]
+        if not matching:
+            return
+        with self._lock:
+            self._buffer.extend(matching)
+            self.matched += len(matching)
+            overflow = len(self._buffer) - self.capacity
+            if overflow > 0:
+                for _ in range(overflow):
+                    self._buffer.popleft()
+                self.dropped += overflow
+                self._unreported_drops += overflow
+
+    def take(self, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Remove the oldest buffered rows.
+
+        Args:
+            limit: Largest number of rows
+
+        Returns:
+            (rows, rows dropped since the previous take)
+        """
+        with self._lock:
+            rows = [
+                self._buffer.popleft() for _ in range(min(limit, len(self._buffer)))
+            ]
+            dropped, self._unreported_drops = self._unreported_drops, 0
+        self.delivered += len(rows)
+        return rows, dropped
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "subscription_id": self.subscription_id,
+            "domain": self.domain.value,
+            "path_prefix": self.path_prefix,
+            "events": sorted(self.events) if self.events else None,
+            "created_at": self.created_at.isoformat(),
+            "buffered": len(self._buffer),
+            "capacity": self.capacity,
+            "matched": self.matched,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class LiveTail:
+    # subscription_id -> active subscription
+    subscriptions: Dict[str, Subscription] = {}
+    # Active subscriptions per domain, replaced (never mutated) on change so
+    # publish() can read it without the lock
+    _by_domain: Dict[LogDomain, Tuple[Subscription, ...]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def subscribe(
+        domain: LogDomain,
+        path_prefix: Optional[str] = None,
+        events: Optional[Iterable[str]] = None,
+        capacity: Optional[int] = None,
+    ) -> Iterator[Subscription]:
+        """
+        Receive the rows written to a domain's table while the block runs.
+
+        Args:
+            domain: Domain whose rows to receive
+            path_prefix: Only rows whose PATH_FIELDS column starts with this
+            events: Only rows with one of these event names
+            capacity: Most rows buffered (TAIL_BUFFER_EVENTS if None)
+
+        Yields:
+            The Subscription to take() the rows from
+        """
+        subscription = Subscription(
+            domain,
+            path_prefix,
+            events,
+            TAIL_BUFFER_EVENTS if capacity is None else capacity,
+        )
+        with LiveTail._lock:
+            LiveTail.subscriptions[subscription.subscription_id] = subscription
+            LiveTail._refresh(domain)
+        try:
+            yield subscription
+        finally:
+            with LiveTail._lock:
+                LiveTail.subscriptions.pop(subscription.subscription_id, None)
+                LiveTail._refresh(domain)
+
+    @staticmethod
+    def publish(domain: LogDomain, rows: List[Dict[str, Any]]):
+        """Hand rows just committed to the domain's subscribers."""
+        for subscription in LiveTail._by_domain.get(domain, ()):
+            subscription.offer(rows)
+
+    @staticmethod
+    def list_subscriptions() -> List[Dict[str, Any]]:
+        with LiveTail._lock:
+            subscriptions = list(LiveTail.subscriptions.values())
+        return [subscription.describe() for subscription in subscriptions]
+
+    @staticmethod
+    def _refresh(domain: LogDomain):
+        LiveTail._by_domain[domain] = tuple(
+            s for s in LiveTail.subscriptions.values() if s.domain == domain
+        )
@@ -0,0 +1,167 @@
+import bisect
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+from tracer.config import LOG_INDEX_EVERY_LINES, LOG_INDEX_EVERY_BYTES
+from tracer.utils import to_epoch
+
+
+class LogIndex:
+    """
+    Sparse timestamp -> byte offset index stored next to a JSONL log.
+
+    The sidecar file (``<log>.idx``) holds one ``"<epoch> <offset>"`` line for
+    every LOG_INDEX_EVERY_LINES lines or LOG_INDEX_EVERY_BYTES bytes of the
+    log. Since events are appended in time order, readers can binary-search
+    it to jump close to a start time instead of parsing the whole file.
+    """
+
+    def __init__(
+        self,
+        log_path: Path,
+        every_lines: int = LOG_INDEX_EVERY_LINES,
+        every_bytes: int = LOG_INDEX_EVERY_BYTES,
+    ):
+        self.log_path = Path(log_path)
+        self.path = self.log_path.with_name(self.log_path.name + ".idx")
+        self.every_lines = max(1, every_lines)
+        self.every_bytes = max(1, every_bytes)
+
+        # Writer-side state
+        self._last_offset: Optional[int] = None
+        self._lines_since = 0
+        self._pending: List[Tuple[float, int]] = []
+
+    # ========== Writer side ==========
+
+    def begin(self, log_size: int):
+        """Prepare for appending lines to a log that is currently log_size bytes."""
+        if self._last_offset is None or log_size <= self._last_offset:
+            # First batch, or the log was truncated (e.g. cleared) since the last one
+            entries = self._read_entries()
+            self._last_offset = entries[-1][1] if entries else -1
+            self._lines_since = 0
+            if log_size <= self._last_offset:
+                self._last_offset = -1
+
+    def note(self, offset: int, timestamp: str):
+        """Record that a line with the given timestamp starts at offset."""
+        due = (
+            self._last_offset < 0
+            or self._lines_since >= self.every_lines
+            or offset - self._last_offset >= self.every_bytes
+        )
+        if due:
+            self._pending.append((to_epoch(timestamp), offset))
+            self._last_offset = offset
+            self._lines_since = 0
+        self._lines_since += 1
+
+    def commit(self):
+        """Append the entries noted since the last commit to the sidecar file."""
+        if not self._pending:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{ts:.6f} {offset}\n" for ts, offset in self._pending))
+        self._pending = []
+
+    def clear(self):
+        """Empty the sidecar file (used together with truncating the log)."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.truncate(0)
+        self._last_offset = None
+        self._pending = []
+
+    # ========== Reader side ==========
+
+    def load(self) -> List[Tuple[float, int]]:
+        """Return the index entries, rebuilding the sidecar if it is missing or stale."""
+        entries = self._read_entries()
+        if self._is_stale(entries):
+            entries = self.rebuild()
+        return entries
+
+    def find_offset(self, start_epoch: float) -> int:
+        """Byte offset from which every line at or after start_epoch can be found."""
+        entries = self.load()
+        timestamps = [ts for ts, _ in entries]
+        # Last indexed line strictly older than start; lines before it are older too
+        pos = bisect.bisect_left(timestamps, start_epoch) - 1
+        return entries[pos][1] if pos >= 0 else 0
+
+    def rebuild(self) -> List[Tuple[float, int]]:
+        """Recreate the sidecar file by scanning the whole log."""
+        entries = []
+        last_offset = -1
+        lines_since = 0
+        offset = 0
+
+        if self.log_path.exists():
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    due = (
+                        last_offset < 0
+                        or lines_since >= self.every_lines
+                        or offset - last_offset >= self.every_bytes
+                    )
+                    if due:
+                        timestamp = line_timestamp(line)
+                        if timestamp is not None:
+                            entries.append((timestamp, offset))
+                            last_offset = offset
+                            lines_since = 0
+                    lines_since += 1
+                    offset += len(line)
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(f"{ts:.6f} {offset}\n" for ts, offset in entries))
+        os.replace(tmp_path, self.path)
+        return entries
+
+    def _read_entries(self) -> List[Tuple[float, int]]:
+        entries = []
+        if not self.path.exists():
+            return entries
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2:
+                    entries.append((float(parts[0]), int(parts[1])))
+        return entries
+
+    def _is_stale(self, entries: List[Tuple[float, int]]) -> bool:
+        log_size = self.log_path.stat().st_size if self.log_path.exists() else 0
+        if not entries:
+            return log_size > 0
+        if not self.path.exists():
+            return True
+
+        # The first and last entries must still point at the start of a line
+        # carrying their timestamp
+        return any(
+            not self._entry_matches(entry, log_size)
+            for entry in (entries[0], entries[-1])
+        )
+
+    def _entry_matches(self, entry: Tuple[float, int], log_size: int) -> bool:
+        timestamp, offset = entry
+        if offset >= log_size:
+            return False
+        with open(self.log_path, "rb") as f:
+            if offset > 0:
+                f.seek(offset - 1)
+                if f.read(1) != b"\n":
+                    return False
+            found = line_timestamp(f.readline())
+        return found is not None and abs(found - timestamp) <= 1e-6
+
+
+def line_timestamp(line: bytes) -> Optional[float]:
+    """Epoch timestamp of a raw JSONL line, or None if it has none."""
+    try:
+        timestamp = json.loads(line).get("timestamp")
+        return to_epoch(timestamp) if timestamp else None
+    except (ValueError, AttributeError):
+        return None
@@ -1,82 +1,177 @@
 import os
+import re
 import json
 from tracer import get_log_file, LogDomain
-from tracer.utils import is_in_range
+from tracer.utils import TimeRange
+from tracer.store.log_index import LogIndex
+from tracer.store.log_writer import LogWriter
+from tracer.store.segments import LogSegments
 from rich.console import Console
 from rich.table import Table
 
+# Size of the chunks read when scanning a log file backwards
+REVERSE_BLOCK_SIZE = 64 * 1024
+
+
+def iter_lines_reverse(f, block_size: int = REVERSE_BLOCK_SIZE):
+    """
+    Yields the non-empty lines of a binary file from last to first.
+
+    The file is read in blocks from the end and split on newlines, carrying
+    the partial first line of each block over to the next one.
+    """
+    f.seek(0, os.SEEK_END)
+    position = f.tell()
+    remainder = b""
+
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        f.seek(position)
+        lines = (f.read(read_size) + remainder).split(b"\n")
+        remainder = lines[0]
+        for line in reversed(lines[1:]):
+            if line:
+                yield line
+
+    if remainder:
+        yield remainder
+
+
+# Raw "timestamp" field of a JSONL line, checked before decoding the line
+_TIMESTAMP_FIELD = re.compile(rb'"timestamp": "([^"]*)"')
+
+
+def _scan_line(line: bytes, time_range: TimeRange):
+    """
+    Locates a raw line relative to time_range and decodes it only if it is inside.
+
+    Returns:
+        (position, event) where position is -1/0/1 as in TimeRange.position and
+        event is None unless the line is in range. Unusable lines return (None, None).
+    """
+    if time_range.is_bounded:
+        match = _TIMESTAMP_FIELD.search(line)
+        if match:
+            try:
+                position = time_range.position(match.group(1).decode())
+            except ValueError:
+                return None, None
+            if position != 0:
+                return position, None
+
+    try:
+        event = json.loads(line)
+        return time_range.position(event["timestamp"]), event
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None, None
+
 
 class LogReader:
     def __init__(self, domain: LogDomain):
         # Initialize the LogReader with the log file path for the given domain
+        self.domain = domain
         self.file_path = get_log_file(domain)
+        self.index = LogIndex(self.file_path)
+        self.segments = LogSegments(domain)
 
-    def read_logs_iter(self, start_time=None, end_time=None):
+    def iter_reverse(self, start_time=None, end_time=None, limit=None, time_range=None):
         """
-        Yields log entries in chronological order (oldest to newest), optionally filtered by a timestamp range.
+        Yields log entries newest first, optionally filtered by a timestamp range.
 
         Args:
             start_time: The start of the timestamp range (inclusive).
             end_time: The end of the timestamp range (inclusive).
+            limit: Stop after this many entries (e.g. the last N events).
+            time_range: An already resolved TimeRange, used instead of start/end.
 
-        This method first reads backwards to find the oldest log in range, then reads
-        from the beginning of the file to yield logs in chronological order.
+        Files are read backwards in fixed-size blocks, newest segment first, so
+        the cost depends on how far back the entries are, not on the log size.
         """
-        # First phase: scan backwards to check if any logs are in range
-        found_in_range = False
-
-        # Open the file and scan backwards to check if any logs match our criteria
-        with open(self.file_path, "rb") as f:
-            f.seek(0, os.SEEK_END)
-            buffer = b""
-            pointer = f.tell()
-
-            while pointer > 0:
-                pointer -= 1
-                f.seek(pointer)
-                byte = f.read(1)
-
-                if byte == b"\n":
-                    if buffer:
-                        line = buffer[::-1].decode()
-                        try:
-                            event = json.loads(line)
-                            if self._is_in_range(event, start_time, end_time):
-                                found_in_range = True
-                                break
-                        except json.JSONDecodeError:
-                            pass
-                        buffer = b""
-                else:
-                    buffer += byte
-
-            # Check first line if we haven't found anything yet
-            if buffer and not found_in_range:
-                line = buffer[::-1].decode()
-                try:
-                    event = json.loads(line)
-                    if self._is_in_range(event, start_time, end_time):
-                        found_in_range = True
-                except json.JSONDecodeError:
-                    pass
-
-        # If no logs match our criteria, stop here
-        if not found_in_range:
+        if limit is not None and limit <= 0:
             return
 
-        # Second phase: read forward and yield logs in chronological order
-        with open(self.file_path, "r") as f:
-            for line in f:
-                try:
-                    event = json.loads(line.strip())
-                    if self._is_in_range(event, start_time, end_time):
+        time_range = time_range or TimeRange(start_time, end_time)
+        count = 0
+
+        files = self._open_segments(time_range)
+        try:
+            for f, _ in reversed(files):
+                for line in iter_lines_reverse(f):
+                    position, event = _scan_line(line, time_range)
+                    if position == -1:
+                        return  # Everything further back is older
+                    if event is None:
+                        continue
+                    yield event
+                    count += 1
+                    if limit is not None and count >= limit:
+                        return
+        finally:
+            for f, _ in files:
+                f.close()
+
+    def read_logs_iter(self, start_time=None, end_time=None, time_range=None):
+        """
+        Yields log entries in chronological order (oldest to newest), optionally filtered by a timestamp range.
+
+        Args:
+            start_time: The start of the timestamp range (inclusive).
+            end_time: The end of the timestamp range (inclusive).
+            time_range: An already resolved TimeRange, used instead of start/end.
+
+        Segments outside the range are skipped using their manifests, the
+        sidecar index is used to seek close to start_time inside a segment, and
+        reading stops at the first entry after end_time since logs are
+        appended in time order.
+        """
+        time_range = time_range or TimeRange(start_time, end_time)
+
+        files = self._open_segments(time_range, seek=True)
+        try:
+            for f, offset in files:
+                f.seek(offset)
+                for line in f:
+                    position, event = _scan_line(line, time_range)
+                    if position == 1:
+                        return
+                    if event is not None:
                         yield event
-                except json.JSONDecodeError:
-                    continue
+        finally:
+            for f, _ in files:
+                f.close()
 
-    def _is_in_range(self, event, start, end):
-        ts = event.get("timestamp")  # Extract the timestamp from the event
-        return ts is not None and is_in_range(ts, start, end)  # Check the range
+    def _open_segments(self, time_range: TimeRange, seek: bool = False):
+        """
+        Open the segments that may hold lines in time_range, oldest first.
+
+        Listed and opened under the writer's file lock, so no rotation runs
+        in between; once open, a handle keeps reading the same file after it
+        is sealed into a segment or deleted.
+
+        Args:
+            time_range: Range the segments must overlap
+            seek: Also look up the offset of time_range.start in each index
+
+        Returns:
+            [(binary file, offset to start reading at)]
+        """
+        files = []
+        with LogWriter._file_locks[self.domain]:
+            try:
+                for path in self.segments.overlapping(time_range.start, time_range.end):
+                    offset = 0
+                    if seek and time_range.start is not None:
+                        offset = LogIndex(path).find_offset(time_range.start)
+                    try:
+                        files.append((open(path, "rb"), offset))
+                    except FileNotFoundError:
+                        continue  # Removed by hand
+            except BaseException:
+                for f, _ in files:
+                    f.close()
+                raise
+        return files
 
     def print_logs(self, start_time=None, end_time=None):
         """
@@ -93,8 +188,11 @@ class LogReader:
         table.add_column("Timestamp", style="cyan", no_wrap=True)
         table.add_column("Event", style="magenta")
 
+        # Resolve the bounds once for the whole scan
+        time_range = TimeRange(start_time, end_time)
+
         # Iterate over logs and add rows to the table
-        for event in self.read_logs_iter(start_time, end_time):
+        for event in self.read_logs_iter(time_range=time_range):
             timestamp = event.get("timestamp", "N/A")
             event_copy = dict(event)  # Make a copy
             event_copy.pop("timestamp", None)  # Remove the timestamp
@@ -1,26 +1,163 @@
 import json
+import os
+import threading
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 from tracer import get_log_file, LogDomain
+from tracer.config import INGEST_BATCHED, LOG_DIR, RECENT_EVENTS_CAPACITY
 from tracer.db.crud import get_crud_class
-from tracer.db.connection import clear_domain_table
+from tracer.db.connection import clear_domain_table, checkpoint_if_due
+from tracer.store.ingest import IngestPipeline
+from tracer.store.live_tail import LiveTail
+from tracer.store.recent_events import RecentEvents
+from tracer.store.log_index import LogIndex
+from tracer.store.segments import LogSegments
 
 
 class LogWriter:
-    def __init__(self, domain: LogDomain):
+    # One group-commit pipeline per domain, shared by every writer of that domain
+    pipelines: Dict[LogDomain, IngestPipeline] = {}
+    _pipelines_lock = threading.Lock()
+    # Serializes writes to (and truncation of) each domain's log and index
+    _file_locks: Dict[LogDomain, threading.Lock] = {
+        domain: threading.Lock() for domain in LogDomain
+    }
+    # Newest rows of each domain's table, filled after every committed batch
+    recent: Dict[LogDomain, RecentEvents] = {
+        domain: RecentEvents(RECENT_EVENTS_CAPACITY) for domain in LogDomain
+    }
+
+    def __init__(self, domain: LogDomain, batched: bool = INGEST_BATCHED):
         self.domain = domain
         self.file_path = get_log_file(domain)
         self.crud = get_crud_class(domain)
+        self.batched = batched
+        self.index = LogIndex(self.file_path)
+        self.segments = LogSegments(domain)
 
     def append(self, event: dict):
+        if self.batched:
+            # Stamped when queued, so batching does not shift its time
+            self._get_pipeline().put(event)
+        else:
+            event["timestamp"] = event.get("timestamp") or datetime.utcnow()
+            self.write_batch([event])
+
+    def write_batch(self, events: List[Dict[str, Any]]):
+        """Persist events with one database transaction and one file write."""
         with self.crud() as crud_instance:
-            crud_instance.add(event.copy())
+            first_id, _ = crud_instance.add_many(events, return_ids=True)
+            rows = [
+                crud_instance.event_row(event, row_id)
+                for row_id, event in enumerate(
+                    crud_instance.table_events(events), first_id
+                )
+            ]
+        # Keep the newest rows around for show_logs, and hand them to tails
+        LogWriter.recent[self.domain].extend(rows)
+        LiveTail.publish(self.domain, rows)
+
+        with LogWriter._file_locks[self.domain]:
+            if self.segments.should_rotate():
+                self.segments.rotate()
+                self.segments.enforce_retention()
+
+            with open(self.file_path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                self.index.begin(offset)
+
+                lines = []
+                for event in events:
+                    record = {
+                        key: value.isoformat() if isinstance(value, datetime) else value
+                        for key, value in event.items()
+                    }
+                    line = (json.dumps(record) + "\n").encode("utf-8")
+                    self.index.note(offset, record["timestamp"])
+                    offset += len(line)
+                    lines.append(line)
+
+                f.write(b"".join(lines))
+            self.index.commit()
+
+        checkpoint_if_due()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued events for this domain have been written."""
+        pipeline = LogWriter.pipelines.get(self.domain)
+        if pipeline is None:
+            return True
+        return pipeline.flush(timeout)
 
-        event["timestamp"] = event.get("timestamp") or datetime.utcnow().isoformat()
-        with open(self.file_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event) + "\n")
+    def add_ticker(self, ticker, hold=None):
+        """
+        Have the domain's writer thread poll ticker() for events that became due.
+
+        hold() returns the oldest timestamp ticker() may still return, see
+        IngestPipeline.add_ticker().
+        """
+        if self.batched:
+            self._get_pipeline().add_ticker(ticker, hold)
+
+    def remove_ticker(self, ticker):
+        """Stop polling a ticker registered with add_ticker()."""
+        pipeline = LogWriter.pipelines.get(self.domain)
+        if pipeline is not None:
+            pipeline.remove_ticker(ticker)
 
     def clear(self):
-        """Clear all contents from the log file and reset the database."""
+        """Clear all contents from the log files and reset the database."""
+        self.flush()
         clear_domain_table(self.domain.value)
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            f.truncate(0)
+        LogWriter.recent[self.domain].reset(empty=True)
+        with LogWriter._file_locks[self.domain]:
+            with open(self.file_path, "w", encoding="utf-8") as f:
+                f.truncate(0)
+            self.index.clear()
+            self.segments.clear()
+
+    @staticmethod
+    def reset_recent(empty: bool = False):
+        """Forget the recent rows of every domain, e.g. after a direct write."""
+        for recent in LogWriter.recent.values():
+            recent.reset(empty)
+
+    def _get_pipeline(self) -> IngestPipeline:
+        pipeline = LogWriter.pipelines.get(self.domain)
+        if pipeline is not None:
+            return pipeline
+
+        with LogWriter._pipelines_lock:
+            pipeline = LogWriter.pipelines.get(self.domain)
+            if pipeline is None:
+                sink = LogWriter(self.domain, batched=False).write_batch
+                pipeline = IngestPipeline(
+                    sink,
+                    name=f"ingest-{self.domain}",
+                    spill_path=LOG_DIR / f"{self.domain.value}.spill",
+                )
+                pipeline.start()
+                LogWriter.pipelines[self.domain] = pipeline
+            return pipeline
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """Queue depth and counters of the domain's pipeline (None if not started)."""
+        pipeline = LogWriter.pipelines.get(self.domain)
+        return pipeline.stats() if pipeline is not None else None
+
+    @staticmethod
+    def resume_spilled():
+        """Start the pipelines of domains whose spill file still holds events."""
+        for domain in LogDomain:
+            spill_path = LOG_DIR / f"{domain.value}.spill"
+            if spill_path.exists() and spill_path.stat().st_size > 0:
+                LogWriter(domain)._get_pipeline()
+
+    @staticmethod
+    def shutdown(drain: Optional[bool] = None, timeout: Optional[float] = None):
+        """Stop every ingestion pipeline, writing pending events if draining."""
+        with LogWriter._pipelines_lock:
+            pipelines = list(LogWriter.pipelines.values())
+            LogWriter.pipelines.clear()
+        for pipeline in pipelines:
+            pipeline.stop(drain=drain, timeout=timeout)
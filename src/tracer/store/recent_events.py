@@ -0,0 +1,174 @@
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# (timestamp, id): rows are shown newest first in this order
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    timestamp = row["timestamp"]
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat()
+    return f"{timestamp}#{row['id']}"
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    timestamp, _, row_id = cursor.rpartition("#")
+    try:
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+
+class RecentEvents:
+    """
+    Fixed-size ring of the newest rows written to a domain's table.
+
+    Slots are a preallocated list filled in insertion (id) order. Rows that
+    are not in the ring, because they were evicted or written before the
+    ring existed, all have timestamps up to ``floor``; a page made only of
+    ring rows newer than that is exactly what the table would return, so it
+    is served without touching the database.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._slots: List[Optional[Tuple[datetime, int, Dict[str, Any]]]] = [
+            None
+        ] * capacity
+        self._head = 0  # Slot the next row goes into
+        self.size = 0
+        # Newest timestamp among the rows not in the ring (None: there are
+        # none); only meaningful once floor_known
+        self.floor: Optional[datetime] = None
+        self.floor_known = False
+        # Newest timestamp evicted since the floor was last looked up
+        self._evicted: Optional[datetime] = None
+        self._epoch = 0  # Bumped by reset(), to discard stale floor lookups
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def extend(self, rows: List[Dict[str, Any]]):
+        """Add rows just written; each needs an id and a datetime timestamp."""
+        with self._lock:
+            for row in rows:
+                old = self._slots[self._head]
+                if old is not None:
+                    self._evict(old[0])
+                else:
+                    self.size += 1
+                self._slots[self._head] = (row["timestamp"], row["id"], row)
+                self._head = (self._head + 1) % self.capacity
+
+    def page(
+        self,
+        limit: int,
+        before: Optional[Cursor] = None,
+        after: Optional[Cursor] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Serve a page from memory if the ring holds all of it.
+
+        Args:
+            limit: Largest number of rows
+            before: Only rows older than this cursor, newest first
+            after: Only rows newer than this cursor, oldest first
+
+        Returns:
+            The rows, or None if the database has to be asked
+        """
+        with self._lock:
+            if not self.floor_known:
+                self.misses += 1
+                return None
+            entries = [slot for slot in self._slots if slot is not None]
+            if after is not None:
+                # Rows outside the ring are all at or before the floor
+                if self.floor is not None and after[0] <= self.floor:
+                    self.misses += 1
+                    return None
+                entries = sorted(e for e in entries if (e[0], e[1]) > after)
+                self.hits += 1
+                return [row for _, _, row in entries[:limit]]
+
+            if before is not None:
+                entries = [e for e in entries if (e[0], e[1]) < before]
+            entries.sort(reverse=True)
+            rows = []
+            for timestamp, _, row in entries[:limit]:
+                # Rows outside the ring have older ids, so they only sort after
+                # ring rows of the same timestamp
+                if self.floor is not None and timestamp < self.floor:
+                    break
+                rows.append(row)
+            if len(rows) < limit and self.floor is not None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return rows
+
+    def floor_lookup(self) -> Tuple[int, Optional[int]]:
+        """
+        Start looking up the floor.
+
+        Returns:
+            (epoch, smallest id in the ring); the floor is the newest
+            timestamp of the rows with a smaller id, see set_floor()
+        """
+        with self._lock:
+            self._evicted = None
+            ids = [slot[1] for slot in self._slots if slot is not None]
+            return self._epoch, min(ids) if ids else None
+
+    def set_floor(self, epoch: int, floor: Optional[datetime]):
+        with self._lock:
+            if epoch != self._epoch:
+                return  # reset() meanwhile
+            if floor is None or (self._evicted is not None and self._evicted > floor):
+                floor = self._evicted
+            self.floor = floor
+            self.floor_known = True
+
+    def discard_older(self, cutoff: datetime):
+        """Drop the rows older than cutoff, e.g. once retention deleted them."""
+        with self._lock:
+            for i, slot in enumerate(self._slots):
+                if slot is not None and slot[0] < cutoff:
+                    self._slots[i] = None
+                    self.size -= 1
+
+    def reset(self, empty: bool = False):
+        """
+        Drop every row.
+
+        Args:
+            empty: The table is now empty too (e.g. cleared), so the floor is
+                known; otherwise it is looked up again
+        """
+        with self._lock:
+            self._slots = [None] * self.capacity
+            self._head = 0
+            self.size = 0
+            self.floor = None
+            self.floor_known = empty
+            self._evicted = None
+            self._epoch += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "size": self.size,
+            "floor": self.floor.isoformat() if self.floor else None,
+            "floor_known": self.floor_known,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _evict(self, timestamp: datetime):
+        if self._evicted is None or timestamp > self._evicted:
+            self._evicted = timestamp
+        if self.floor_known and (self.floor is None or timestamp > self.floor):
+            self.floor = timestamp
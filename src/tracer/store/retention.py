@@ -0,0 +1,319 @@
+"""
+Background retention and incremental compaction of the database.
+
+Every RETENTION_INTERVAL_S the job works out, per table of each domain, a
+cutoff timestamp from the domain's policy (age, row count, bytes) and
+deletes the rows older than it in chunks of RETENTION_CHUNK_ROWS, oldest
+first through the timestamp index. Each chunk is its own short transaction
+on the writer connection, so ingestion gets the connection back between
+chunks. Freed pages are then handed back to the OS with incremental_vacuum.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, func, select, text
+from tracer.config import (
+    LogDomain,
+    RETENTION_POLICIES,
+    RETENTION_INTERVAL_S,
+    RETENTION_CHUNK_ROWS,
+    RETENTION_CHUNK_PAUSE_MS,
+    RETENTION_VACUUM_PAGES,
+)
+from tracer.db.connection import engine, read_engine, checkpoint_if_due
+from tracer.db.models import Base, DOMAIN_EXTRA_TABLES
+from tracer.store.log_writer import LogWriter
+
+_POLICY_KEYS = ("max_age_s", "max_rows", "max_bytes")
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+class RetentionJob:
+    """Enforces RETENTION_POLICIES from a background thread."""
+
+    def __init__(
+        self,
+        policies: Optional[Dict[str, Dict[str, Optional[int]]]] = None,
+        interval_s: float = RETENTION_INTERVAL_S,
+        chunk_rows: int = RETENTION_CHUNK_ROWS,
+        chunk_pause_ms: float = RETENTION_CHUNK_PAUSE_MS,
+        vacuum_pages: int = RETENTION_VACUUM_PAGES,
+    ):
+        source = RETENTION_POLICIES if policies is None else policies
+        self.policies = {domain: dict(policy) for domain, policy in source.items()}
+        self.interval_s = interval_s
+        self.chunk_rows = chunk_rows
+        self.chunk_pause_ms = chunk_pause_ms
+        self.vacuum_pages = vacuum_pages
+
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()  # One run at a time
+        self._wakeup = threading.Event()
+        self._stopping = False
+
+        # Progress of the current run, and the outcome of the last one
+        self.current: Optional[Dict[str, Any]] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.next_run_at: Optional[datetime] = None
+        self.runs = 0
+        self.total_rows_deleted = 0
+        self.total_reclaimed_bytes = 0
+
+    def start(self):
+        """Start the background thread (no-op if disabled or already running)."""
+        if not self.interval_s or (self._thread and self._thread.is_alive()):
+            return
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._loop, daemon=True, name="retention"
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the thread after the chunk it is deleting."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        thread.join(timeout)
+
+    def trigger(self):
+        """Run now instead of at next_run_at, in the background."""
+        if self._thread and self._thread.is_alive():
+            self._wakeup.set()
+        else:
+            threading.Thread(
+                target=self.run_once, daemon=True, name="retention-once"
+            ).start()
+
+    def set_policy(self, domain: str, **limits: Optional[int]):
+        """
+        Change a domain's policy.
+
+        Args:
+            domain: Domain to change the policy of
+            limits: max_age_s / max_rows / max_bytes; None disables a limit
+        """
+        if domain not in self.policies:
+            raise ValueError(f"Unknown domain: {domain}")
+        unknown = set(limits) - set(_POLICY_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown policy keys: {', '.join(sorted(unknown))}")
+        for key, value in limits.items():
+            if value is not None and value <= 0:
+                raise ValueError(f"{key} must be positive (or None to disable it)")
+        self.policies[domain].update(limits)
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Enforce every policy, then reclaim the freed pages.
+
+        Returns:
+            What was done: rows deleted per table, reclaimed bytes, duration
+        """
+        with self._lock:
+            run = {
+                "started_at": datetime.utcnow().isoformat(),
+                "tables": {},
+                "rows_deleted": 0,
+                "reclaimed_bytes": 0,
+                "error": None,
+            }
+            self.current = run
+            started = time.monotonic()
+            try:
+                sizes = None
+                if any(policy.get("max_bytes") for policy in self.policies.values()):
+                    sizes = self._table_sizes()
+                for domain, policy in self.policies.items():
+                    self._enforce(domain, policy, sizes, run)
+                    if self._stopping:
+                        break
+                run["reclaimed_bytes"] = self._reclaim(run)
+            except Exception as e:
+                run["error"] = str(e)
+            finally:
+                run["duration_s"] = round(time.monotonic() - started, 3)
+                run["finished_at"] = datetime.utcnow().isoformat()
+                self.current = None
+                self.last_run = run
+                self.runs += 1
+                self.total_rows_deleted += run["rows_deleted"]
+                self.total_reclaimed_bytes += run["reclaimed_bytes"]
+            return run
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": bool(self.interval_s),
+            "running": self.current is not None,
+            "interval_s": self.interval_s,
+            "policies": self.policies,
+            "current_run": self.current,
+            "last_run": self.last_run,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+            "runs": self.runs,
+            "total_rows_deleted": self.total_rows_deleted,
+            "total_reclaimed_bytes": self.total_reclaimed_bytes,
+            "auto_vacuum": self._auto_vacuum(),
+        }
+
+    def _loop(self):
+        while not self._stopping:
+            self.run_once()
+            self.next_run_at = datetime.utcnow() + timedelta(seconds=self.interval_s)
+            self._wakeup.wait(self.interval_s)
+            self._wakeup.clear()
+        self.next_run_at = None
+
+    def _enforce(
+        self,
+        domain: str,
+        policy: Dict[str, Optional[int]],
+        sizes: Optional[Dict[str, int]],
+        run: Dict[str, Any],
+    ):
+        if not any(policy.get(key) for key in _POLICY_KEYS):
+            return  # Retention is off for this domain
+        tables = [domain] + list(DOMAIN_EXTRA_TABLES.get(domain, ()))
+        counts = {name: self._count(name) for name in tables}
+
+        # Share of the domain's rows to drop to get under max_bytes
+        over_bytes = 0.0
+        if policy.get("max_bytes") and sizes is not None:
+            domain_bytes = sum(sizes.get(name, 0) for name in tables)
+            if domain_bytes > policy["max_bytes"]:
+                over_bytes = 1 - policy["max_bytes"] / domain_bytes
+
+        for name in tables:
+            cutoffs = []
+            if policy.get("max_age_s"):
+                cutoffs.append(
+                    datetime.utcnow() - timedelta(seconds=policy["max_age_s"])
+                )
+            excess = 0
+            if policy.get("max_rows"):
+                excess = counts[name] - policy["max_rows"]
+            excess = max(excess, math.ceil(counts[name] * over_bytes))
+            if excess > 0:
+                cutoffs.append(self._cutoff_after(name, excess))
+            cutoffs = [cutoff for cutoff in cutoffs if cutoff is not None]
+            if not cutoffs:
+                continue
+
+            cutoff = max(cutoffs)
+            deleted = self._delete_before(name, cutoff, run)
+            if deleted and name == domain:
+                # Rows the ring still holds are gone from the table
+                LogWriter.recent[LogDomain(domain)].discard_older(cutoff)
+            if self._stopping:
+                return
+
+    def _delete_before(self, name: str, cutoff: datetime, run: Dict[str, Any]) -> int:
+        """Delete the rows older than cutoff, chunk by chunk."""
+        table = Base.metadata.tables[name]
+        oldest = (
+            select(table.c.id)
+            .where(table.c.timestamp < cutoff)
+            .order_by(table.c.timestamp)
+            .limit(self.chunk_rows)
+        )
+        progress = run["tables"].setdefault(
+            name, {"cutoff": cutoff.isoformat(), "rows_deleted": 0}
+        )
+        deleted = 0
+        while not self._stopping:
+            with engine.begin() as connection:
+                count = connection.execute(
+                    delete(table).where(table.c.id.in_(oldest))
+                ).rowcount
+            deleted += count
+            progress["rows_deleted"] += count
+            run["rows_deleted"] += count
+            if count < self.chunk_rows:
+                break
+            # Let ingestion in before the next chunk
+            time.sleep(self.chunk_pause_ms / 1000)
+        return deleted
+
+    def _reclaim(self, run: Dict[str, Any]) -> int:
+        """incremental_vacuum the free pages; returns the bytes given back."""
+        if engine.dialect.name != "sqlite" or self._auto_vacuum() != "incremental":
+            return 0
+        page_size, before = self._pragmas("page_size", "page_count")
+        while not self._stopping:
+            (free,) = self._pragmas("freelist_count")
+            run["free_pages"] = free
+            if not free:
+                break
+            # One chunk per checkout, so ingestion gets the connection in
+            # between. execute() would free a single page: the pragma frees
+            # one per step, and executescript() steps it to completion
+            with engine.connect() as connection:
+                connection.connection.driver_connection.executescript(
+                    f"PRAGMA incremental_vacuum({self.vacuum_pages})"
+                )
+            time.sleep(self.chunk_pause_ms / 1000)
+        (after,) = self._pragmas("page_count")
+        # With WAL, the file only shrinks once the pages are checkpointed
+        checkpoint_if_due(force=True)
+        return (before - after) * page_size
+
+    @staticmethod
+    def _pragmas(*names: str) -> List[int]:
+        with engine.connect() as connection:
+            return [
+                connection.execute(text(f"PRAGMA {name}")).scalar() for name in names
+            ]
+
+    @staticmethod
+    def _count(name: str) -> int:
+        table = Base.metadata.tables[name]
+        with read_engine.connect() as connection:
+            return connection.execute(select(func.count()).select_from(table)).scalar()
+
+    @staticmethod
+    def _cutoff_after(name: str, excess: int) -> Optional[datetime]:
+        """A cutoff that deletes the excess oldest rows of a table."""
+        table = Base.metadata.tables[name]
+        with read_engine.connect() as connection:
+            timestamp = connection.execute(
+                select(table.c.timestamp)
+                .order_by(table.c.timestamp)
+                .offset(excess - 1)
+                .limit(1)
+            ).scalar()
+        if timestamp is None:
+            return None
+        return timestamp + timedelta(microseconds=1)
+
+    @staticmethod
+    def _table_sizes() -> Optional[Dict[str, int]]:
+        """Bytes of table and index pages per table (None without dbstat)."""
+        if read_engine.dialect.name != "sqlite":
+            return None
+        try:
+            with read_engine.connect() as connection:
+                rows = connection.execute(
+                    text(
+                        "SELECT s.tbl_name, SUM(d.pgsize) FROM dbstat d "
+                        "JOIN sqlite_schema s ON s.name = d.name GROUP BY s.tbl_name"
+                    )
+                ).all()
+        except Exception:
+            return None  # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+        return {name: size for name, size in rows}
+
+    @staticmethod
+    def _auto_vacuum() -> Optional[str]:
+        if engine.dialect.name != "sqlite":
+            return None
+        with read_engine.connect() as connection:
+            mode = connection.execute(text("PRAGMA auto_vacuum")).scalar()
+        return _AUTO_VACUUM_MODES.get(mode, str(mode))
+
+
+retention_job = RetentionJob()
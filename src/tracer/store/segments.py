@@ -0,0 +1,215 @@
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from tracer.config import (
+    LOG_DIR,
+    LogDomain,
+    LOG_ROTATE_MAX_BYTES,
+    LOG_ROTATE_MAX_AGE_S,
+    LOG_RETENTION_MAX_SEGMENTS,
+    LOG_RETENTION_MAX_BYTES,
+)
+from tracer.store.log_index import LogIndex, line_timestamp
+
+# Size of the chunks read when counting lines of a segment
+_COUNT_BLOCK_SIZE = 1024 * 1024
+
+
+class LogSegments:
+    """
+    Numbered segments of a domain's JSONL log.
+
+    New lines go to the active file (``<domain>.jsonl``). When it grows past
+    the size or age limit it is renamed to ``<domain>.<n>.jsonl`` (together
+    with its ``.idx`` sidecar) and a ``.manifest.json`` recording its
+    min/max timestamp and line count is written next to it. Readers use the
+    manifests to skip segments outside a requested time range, and
+    retention deletes whole segments, oldest first.
+    """
+
+    def __init__(
+        self,
+        domain: LogDomain,
+        max_bytes: Optional[int] = LOG_ROTATE_MAX_BYTES,
+        max_age_s: Optional[float] = LOG_ROTATE_MAX_AGE_S,
+        max_segments: Optional[int] = LOG_RETENTION_MAX_SEGMENTS,
+        max_total_bytes: Optional[int] = LOG_RETENTION_MAX_BYTES,
+    ):
+        self.domain = domain
+        self.directory = LOG_DIR
+        self.active_path = LOG_DIR / f"{domain.value}.jsonl"
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.max_segments = max_segments
+        self.max_total_bytes = max_total_bytes
+        self._pattern = re.compile(rf"^{re.escape(domain.value)}\.(\d+)\.jsonl$")
+
+    def sealed(self) -> List[Path]:
+        """Sealed segment files, oldest first."""
+        numbered = []
+        for path in self.directory.glob(f"{self.domain.value}.*.jsonl"):
+            match = self._pattern.match(path.name)
+            if match:
+                numbered.append((int(match.group(1)), path))
+        return [path for _, path in sorted(numbered)]
+
+    def manifest(self, path: Path) -> Dict[str, Any]:
+        """Return a sealed segment's manifest, recreating it if it is missing."""
+        manifest_path = _manifest_path(path)
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            manifest = describe_segment(path)
+            _write_json(manifest_path, manifest)
+            return manifest
+
+    def overlapping(
+        self, start: Optional[float] = None, end: Optional[float] = None
+    ) -> List[Path]:
+        """Segments (sealed, then the active file) that may hold lines in [start, end]."""
+        paths = []
+        for path in self.sealed():
+            manifest = self.manifest(path)
+            if manifest["min_ts"] is None:
+                continue
+            if start is not None and manifest["max_ts"] < start:
+                continue
+            if end is not None and manifest["min_ts"] > end:
+                continue
+            paths.append(path)
+        if self.active_path.exists():
+            paths.append(self.active_path)
+        return paths
+
+    # ========== Writer side (callers hold the domain's file lock) ==========
+
+    def should_rotate(self, now: Optional[float] = None) -> bool:
+        """Whether the active file has reached the size or age limit."""
+        try:
+            size = self.active_path.stat().st_size
+        except OSError:
+            return False
+        if size == 0:
+            return False
+        if self.max_bytes is not None and size >= self.max_bytes:
+            return True
+        if self.max_age_s is not None:
+            with open(self.active_path, "rb") as f:
+                oldest = line_timestamp(f.readline())
+            now = time.time() if now is None else now
+            return oldest is not None and now - oldest >= self.max_age_s
+        return False
+
+    def rotate(self) -> Optional[Path]:
+        """Seal the active file into the next numbered segment."""
+        if not self.active_path.exists() or self.active_path.stat().st_size == 0:
+            return None
+
+        sealed = self.sealed()
+        number = 1
+        if sealed:
+            number = int(self._pattern.match(sealed[-1].name).group(1)) + 1
+        path = self.directory / f"{self.domain.value}.{number:06d}.jsonl"
+
+        manifest = describe_segment(self.active_path)
+        manifest["segment"] = number
+        os.replace(self.active_path, path)
+        active_index = LogIndex(self.active_path).path
+        if active_index.exists():
+            os.replace(active_index, LogIndex(path).path)
+        _write_json(_manifest_path(path), manifest)
+        return path
+
+    def enforce_retention(self) -> List[Path]:
+        """Delete the oldest sealed segments beyond the retention limits."""
+        sealed = self.sealed()
+        sizes = {path: _size(path) for path in sealed}
+        total = sum(sizes.values())
+        removed = []
+
+        while sealed:
+            too_many = self.max_segments is not None and len(sealed) > self.max_segments
+            too_big = self.max_total_bytes is not None and total > self.max_total_bytes
+            if not (too_many or too_big):
+                break
+            oldest = sealed.pop(0)
+            total -= sizes[oldest]
+            self._remove(oldest)
+            removed.append(oldest)
+
+        return removed
+
+    def clear(self):
+        """Delete every sealed segment."""
+        for path in self.sealed():
+            self._remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Summary of the active file and sealed segments."""
+        sealed = self.sealed()
+        return {
+            "active_bytes": _size(self.active_path),
+            "segments": len(sealed),
+            "segment_bytes": sum(_size(path) for path in sealed),
+            "oldest_segment": sealed[0].name if sealed else None,
+        }
+
+    def _remove(self, path: Path):
+        for file_path in (path, LogIndex(path).path, _manifest_path(path)):
+            try:
+                file_path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def describe_segment(path: Path) -> Dict[str, Any]:
+    """Compute the manifest fields (time bounds, line count, size) of a log file."""
+    from tracer.store.log_reader import iter_lines_reverse
+
+    lines = 0
+    min_ts = max_ts = None
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_COUNT_BLOCK_SIZE)
+            if not block:
+                break
+            lines += block.count(b"\n")
+
+        f.seek(0)
+        for line in f:
+            min_ts = line_timestamp(line)
+            if min_ts is not None:
+                break
+        for line in iter_lines_reverse(f):
+            max_ts = line_timestamp(line)
+            if max_ts is not None:
+                break
+
+    return {
+        "min_ts": min_ts,
+        "max_ts": max_ts,
+        "lines": lines,
+        "bytes": _size(path),
+    }
+
+
+def _manifest_path(path: Path) -> Path:
+    return path.with_name(path.name + ".manifest.json")
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
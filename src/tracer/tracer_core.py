@@ -1,18 +1,47 @@
-import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tracer.store import LogReader, LogWriter
-from tracer.config import LogDomain
+from tracer.config import (
+    LogDomain,
+    TRACER_STOP_TIMEOUT_S,
+    NET_COUNTERS_RESOLUTIONS_S,
+    NET_RATES_MAX_POINTS,
+    SHOW_LOGS_DEFAULT_LIMIT,
+    SHOW_LOGS_MAX_LIMIT,
+)
 from tracer.core import BaseTracer
-from tracer.core import FileTracer
-from typing import Dict, Tuple
+from tracer.core import FileTracer, NetTracer
+from tracer.core.counter_sampler import to_datetime
+from tracer.db.crud import NetCRUD, get_crud_class
+from tracer.store.live_tail import to_json_row
+from tracer.store.recent_events import Cursor, decode_cursor, encode_cursor
+from tracer.utils import TimeRange, to_epoch, to_utc_naive
+from typing import Dict, List, Optional, Tuple
+
+
+def _to_cursor(value: Optional[str]) -> Optional[Cursor]:
+    if value is None:
+        return None
+    if "#" in value:
+        return decode_cursor(value)
+    return to_utc_naive(value), 0
 
 
 class TracerCore:
     # Use tuple of (domain, path) as key for filesystem tracers
     active_tracers: Dict[Tuple[str, str], BaseTracer] = {}
-    tracer_threads: Dict[Tuple[str, str], threading.Thread] = {}
 
     @staticmethod
-    def start_tracing(domain: str, dir_to_watch: str = None):
+    def start_tracing(
+        domain: str,
+        dir_to_watch: str = None,
+        coalesce_window_ms: int = None,
+        coalesce_transient: str = None,
+        include: List[str] = None,
+        exclude: List[str] = None,
+        interval_ms: int = None,
+        flow_window_ms: int = None,
+    ):
         """Starts tracing for the specified domain."""
         if domain == LogDomain.FS.value:
             if not dir_to_watch:
@@ -24,40 +53,40 @@ class TracerCore:
                     f"Tracing already active for {domain} in directory {dir_to_watch}"
                 )
 
-            tracer = FileTracer(LogDomain.FS, dir_to_watch)
-
-            # Create and start thread for tracing
-            thread = threading.Thread(
-                target=tracer.start,
-                daemon=True,  # Thread will exit when main program exits
-                name=f"tracer-{domain}-{dir_to_watch}",
+            tracer = FileTracer(
+                LogDomain.FS,
+                dir_to_watch,
+                coalesce_window_ms,
+                coalesce_transient,
+                include,
+                exclude,
             )
-            thread.start()
+
+            # Adds a watch to the shared observer; no thread per tracer
+            tracer.start()
 
             TracerCore.active_tracers[tracer_key] = tracer
-            TracerCore.tracer_threads[tracer_key] = thread
             return (
                 f"Successfully started filesystem tracing for directory: {dir_to_watch}"
             )
 
         elif domain == LogDomain.NET.value:
-            # Replace with actual NetTracer implementation
-            tracer = BaseTracer(LogDomain.NET)
             tracer_key = (domain, None)
-
             if tracer_key in TracerCore.active_tracers:
                 raise ValueError(f"Tracing already active for {domain}")
 
-            # Create and start thread for tracing
-            thread = threading.Thread(
-                target=tracer.start,
-                daemon=True,  # Thread will exit when main program exits
-                name=f"tracer-{domain}",
+            # Samples the kernel connection tables on a thread of its own
+            tracer = NetTracer(
+                LogDomain.NET, interval_ms, flow_window_ms=flow_window_ms
             )
-            thread.start()
+            tracer.start()
 
             TracerCore.active_tracers[tracer_key] = tracer
-            TracerCore.tracer_threads[tracer_key] = thread
+            if tracer.flows is not None:
+                return (
+                    "Successfully started network tracing "
+                    f"(flows over {tracer.flows.stats()['window_ms']} ms windows)"
+                )
             return "Successfully started network tracing"
         else:
             raise ValueError(
@@ -81,27 +110,47 @@ class TracerCore:
             else:
                 raise ValueError(f"No active tracing found for {domain}")
 
-        # Stop the tracer
-        tracer = TracerCore.active_tracers[tracer_key]
-        if hasattr(tracer, "stop") and callable(getattr(tracer, "stop")):
-            tracer.stop()
-
-        # Wait for thread to finish (with timeout to avoid blocking)
-        thread = TracerCore.tracer_threads.get(tracer_key)
-        if thread and thread.is_alive():
-            thread.join(timeout=5.0)  # Wait up to 5 seconds
-            if thread.is_alive():
-                print(f"Warning: Tracer thread for {domain} did not stop gracefully")
-
-        # Remove from active tracers and threads
-        del TracerCore.active_tracers[tracer_key]
-        if tracer_key in TracerCore.tracer_threads:
-            del TracerCore.tracer_threads[tracer_key]
+        # Stop the tracer; this returns once its buffered events are written
+        drained = TracerCore._stop(tracer_key)
 
         if domain == LogDomain.FS.value and dir_to_watch:
-            return f"Stopped tracing for {domain} in directory {dir_to_watch}"
+            message = f"Stopped tracing for {domain} in directory {dir_to_watch}"
         else:
-            return f"Stopped tracing for {domain}"
+            message = f"Stopped tracing for {domain}"
+        if not drained:
+            message += " (some buffered events were still being written)"
+        return message
+
+    @staticmethod
+    def stop_all(timeout: float = TRACER_STOP_TIMEOUT_S) -> Dict[str, str]:
+        """Stops every active tracer in parallel and reports how each one ended."""
+        keys = list(TracerCore.active_tracers)
+        if not keys:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(32, len(keys))) as executor:
+            # One future per tracer, so a failure does not hide the others
+            futures = [executor.submit(TracerCore._stop, key, timeout) for key in keys]
+            outcome = {}
+            for (domain, directory), future in zip(keys, futures):
+                key = f"{domain}_{directory}" if directory else domain
+                try:
+                    drained = future.result()
+                except Exception as e:
+                    outcome[key] = f"failed: {e}"
+                    continue
+                outcome[key] = "stopped" if drained else "stopped (not fully drained)"
+        return outcome
+
+    @staticmethod
+    def _stop(tracer_key: Tuple[str, str], timeout: float = TRACER_STOP_TIMEOUT_S):
+        tracer = TracerCore.active_tracers.get(tracer_key)
+        if tracer is None:
+            return True
+        try:
+            return tracer.stop(timeout)
+        finally:
+            TracerCore.active_tracers.pop(tracer_key, None)
 
     @staticmethod
     def list_tracers():
@@ -110,21 +159,139 @@ class TracerCore:
             return {}
 
         active_info = {}
-        for (domain, directory), tracer in TracerCore.active_tracers.items():
+        # Copied: tracers being stopped in parallel leave the dict meanwhile
+        for (domain, directory), tracer in list(TracerCore.active_tracers.items()):
             key = f"{domain}_{directory}" if directory else domain
-            thread = TracerCore.tracer_threads.get((domain, directory))
-            thread_status = "running" if thread and thread.is_alive() else "stopped"
-
             active_info[key] = {
                 "domain": domain,
                 "directory": directory,
                 "tracer_type": type(tracer).__name__,
-                "thread_status": thread_status,
-                "thread_name": thread.name if thread else None,
+                **tracer.status(),
             }
+            event_handler = getattr(tracer, "event_handler", None)
+            if event_handler is not None:
+                active_info[key]["filtering"] = event_handler.stats()
+            coalescer = getattr(tracer, "coalescer", None)
+            if coalescer is not None:
+                active_info[key]["coalescing"] = coalescer.stats()
+            if isinstance(tracer, NetTracer):
+                active_info[key]["sampling"] = tracer.stats()
+            writer = getattr(tracer, "writer", None)
+            if writer is not None:
+                active_info[key]["ingest"] = writer.stats()
 
         return active_info
 
+    @staticmethod
+    def ingest_stats():
+        """Returns queue depth and dropped/spilled counters per domain."""
+        return {
+            str(domain): pipeline.stats()
+            for domain, pipeline in LogWriter.pipelines.items()
+        }
+
+    @staticmethod
+    def show_logs(
+        domain: str, limit: int = None, before: str = None, after: str = None
+    ):
+        """
+        Newest rows of a domain's table, by keyset on (timestamp, id).
+
+        Pages the RecentEvents ring holds entirely are served from memory;
+        older ones from the database. before/after take the next_cursor of
+        a previous page or a time ("5m", ISO).
+        """
+        log_domain = next((d for d in LogDomain if d.value == domain), None)
+        if log_domain is None:
+            raise ValueError(f"Unknown domain: {domain}")
+        limit = min(limit or SHOW_LOGS_DEFAULT_LIMIT, SHOW_LOGS_MAX_LIMIT)
+        before, after = _to_cursor(before), _to_cursor(after)
+
+        recent = LogWriter.recent[log_domain]
+        rows = recent.page(limit, before, after)
+        source = "memory"
+        if rows is None:
+            source = "database"
+            # On the reader pool: a slow page must not stall ingestion
+            with get_crud_class(log_domain)(read_only=True) as crud:
+                rows = [crud.as_dict(e) for e in crud.get_page(limit, before, after)]
+                if not recent.floor_known:
+                    # Once known, later pages can come from memory
+                    epoch, below_id = recent.floor_lookup()
+                    recent.set_floor(epoch, crud.get_max_timestamp(below_id))
+
+        rows = [to_json_row(row) for row in rows]
+        if after is not None:
+            # Rows come oldest first; follow from the newest one
+            next_cursor = (
+                encode_cursor(rows[-1])
+                if rows
+                else encode_cursor({"timestamp": after[0], "id": after[1]})
+            )
+        else:
+            next_cursor = encode_cursor(rows[-1]) if len(rows) == limit else None
+        return {"source": source, "next_cursor": next_cursor, "rows": rows}
+
+    @staticmethod
+    def network_rates(
+        start: str = "30s",
+        end: str = None,
+        series: List[str] = None,
+        step_s: float = None,
+    ):
+        """
+        Per-second rates of the interface/protocol counters over a time range.
+
+        Ranges still held by the running network tracer's ring buffer are
+        answered from memory; older ones from the downsampled points stored
+        in network_counters.
+        """
+        time_range = TimeRange(start, end)
+        if time_range.start is None:
+            raise ValueError("A start time is required")
+        span = (time_range.end or time.time()) - time_range.start
+
+        tracer = TracerCore.active_tracers.get((LogDomain.NET.value, None))
+        counters = getattr(tracer, "counters", None)
+        if counters is not None and counters.covers(time_range.start):
+            step = step_s
+            if span / (step or counters.interval) > NET_RATES_MAX_POINTS:
+                step = span / NET_RATES_MAX_POINTS
+            rates = counters.rates(
+                time_range.start, time_range.end, names=series, step=step
+            )
+            source, resolution = "memory", step or counters.interval
+        else:
+            resolutions = sorted(NET_COUNTERS_RESOLUTIONS_S)
+            resolution = next(
+                (
+                    r
+                    for r in resolutions
+                    if r >= (step_s or 0) and span / r <= NET_RATES_MAX_POINTS
+                ),
+                resolutions[-1],
+            )
+            # On the reader pool, never the connection ingestion writes with
+            with NetCRUD(read_only=True) as crud:
+                points = crud.get_counters(time_range, resolution, series)
+            rates = {}
+            for point in points:
+                rates.setdefault(point.name, []).append(
+                    (to_epoch(point.timestamp), point.rate)
+                )
+            source = "database"
+
+        return {
+            "source": source,
+            "resolution_s": resolution,
+            "series": {
+                name: [
+                    [to_datetime(t).isoformat(), round(rate, 3)] for t, rate in points
+                ]
+                for name, points in rates.items()
+            },
+        }
+
     @staticmethod
     def print_logs(domain: str, start_time: str = None, end_time: str = None):
         """Prints logs for the specified domain and time range."""
@@ -4,10 +4,20 @@ from .timestamp import (
     now_iso,
     parse_iso,
     is_in_range,
+    to_epoch,
+    to_utc_naive,
+    TimeRange,
 )
+from .columnar import encode_columnar, dumps_columnar, decode_columnar
 
 __all__ = [
     "now_iso",
     "parse_iso",
     "is_in_range",
+    "to_epoch",
+    "to_utc_naive",
+    "TimeRange",
+    "encode_columnar",
+    "dumps_columnar",
+    "decode_columnar",
 ]
@@ -0,0 +1,109 @@
+"""
+Compact columnar encoding of tabular results.
+
+    {"columns": ["id", "event", "full_path"],
+     "rows": [[1, 0, [0, "a.txt"]], [2, 1, [0, "b.txt"]]],
+     "dictionaries": {"event": ["created", "deleted"]},
+     "prefixes": {"full_path": ["/home/user/project/"]}}
+
+Column names are sent once. String columns with repeated values are sent
+as indexes into a per-column dictionary; path-like columns whose
+directories repeat are sent as [index of the directory, rest of the path].
+"""
+
+import json
+from typing import Any, Dict, List, Sequence
+
+
+def _default(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value)
+
+
+def encode_columnar(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> dict:
+    """
+    Encode rows as a columnar payload.
+
+    Args:
+        columns: Column names
+        rows: Row tuples in column order
+
+    Returns:
+        {"columns", "rows", "dictionaries", "prefixes"}, ready for json.dumps
+    """
+    dictionaries: Dict[str, List[str]] = {}
+    prefixes: Dict[str, List[str]] = {}
+    # Work column by column: one pass per column instead of one per value
+    values_by_column = [list(values) for values in zip(*rows)]
+    # Tables are keyed by column name, so a name used twice (e.g. by a join)
+    # is sent as plain values
+    repeated = {column for column in columns if columns.count(column) > 1}
+
+    for column, values in zip(columns, values_by_column):
+        if column in repeated:
+            continue
+        first = next((value for value in values if value is not None), None)
+        if type(first) is not str:
+            continue
+        distinct = dict.fromkeys(values)
+        distinct.pop(None, None)
+        if len(values) < 2 or not all(type(value) is str for value in distinct):
+            continue
+
+        # Repeated values (event names, commands...): send each one once
+        if len(distinct) <= len(values) // 2:
+            index = {value: i for i, value in enumerate(distinct)}
+            values[:] = [index.get(value) for value in values]
+            dictionaries[column] = list(distinct)
+            continue
+
+        # Distinct paths sharing directories: send each directory once
+        heads = dict.fromkeys(
+            value[: value.rfind("/") + 1] for value in distinct if "/" in value
+        )
+        if not heads or len(heads) > len(values) // 2:
+            continue
+        index = {head: i for i, head in enumerate(heads)}
+        for i, value in enumerate(values):
+            if value is not None and "/" in value:
+                cut = value.rfind("/") + 1
+                values[i] = [index[value[:cut]], value[cut:]]
+        prefixes[column] = list(heads)
+
+    return {
+        "columns": list(columns),
+        "rows": list(zip(*values_by_column)),
+        "dictionaries": dictionaries,
+        "prefixes": prefixes,
+    }
+
+
+def dumps_columnar(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    """encode_columnar() serialized without whitespace."""
+    return json.dumps(
+        encode_columnar(columns, rows), separators=(",", ":"), default=_default
+    )
+
+
+def decode_columnar(payload: dict) -> List[Dict[str, Any]]:
+    """Turn a columnar payload back into one dict per row."""
+    columns = payload["columns"]
+    dictionaries = payload.get("dictionaries", {})
+    prefixes = payload.get("prefixes", {})
+    values_by_column = list(zip(*payload["rows"]))
+
+    for j, column in enumerate(columns):
+        if column in dictionaries:
+            table = dictionaries[column]
+            values_by_column[j] = [
+                table[value] if value is not None else None
+                for value in values_by_column[j]
+            ]
+        elif column in prefixes:
+            table = prefixes[column]
+            values_by_column[j] = [
+                table[value[0]] + value[1] if type(value) is list else value
+                for value in values_by_column[j]
+            ]
+    return [dict(zip(columns, row)) for row in zip(*values_by_column)]
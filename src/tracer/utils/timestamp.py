@@ -34,22 +34,102 @@ def parse_iso(ts: str) -> datetime:
         raise ValueError(f"Invalid timestamp format: {ts}")
 
 
+def to_epoch(ts: Union[str, datetime]) -> float:
+    """Converts an ISO/fuzzy string or datetime to epoch seconds (naive means UTC)."""
+    if isinstance(ts, str):
+        ts = parse_iso(ts)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def to_utc_naive(ts: Union[str, datetime]) -> datetime:
+    """Converts an ISO/fuzzy string or datetime to a naive UTC datetime."""
+    if isinstance(ts, str):
+        ts = parse_iso(ts)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+class TimeRange:
+    """
+    Time bounds resolved once, at query start, for filtering many timestamps.
+
+    Fuzzy bounds such as '5m' are turned into fixed points in time when the
+    range is created, so they do not drift during a long scan. Timestamps
+    written by the tracers (naive UTC ``datetime.isoformat()`` strings) are
+    compared as raw strings against bounds formatted the same way, without
+    parsing them.
+    """
+
+    def __init__(
+        self,
+        start: Optional[Union[str, datetime]] = None,
+        end: Optional[Union[str, datetime]] = None,
+    ):
+        # Naive UTC datetimes, e.g. for database queries
+        self.start_dt = to_utc_naive(start) if start else None
+        self.end_dt = to_utc_naive(end) if end else None
+        # Epoch seconds, e.g. for sidecar indexes and segment manifests
+        self.start = to_epoch(self.start_dt) if self.start_dt else None
+        self.end = to_epoch(self.end_dt) if self.end_dt else None
+        # ISO strings matching the format of stored timestamps
+        self.start_iso = self.start_dt.isoformat() if self.start_dt else None
+        self.end_iso = self.end_dt.isoformat() if self.end_dt else None
+
+    @property
+    def is_bounded(self) -> bool:
+        return self.start is not None or self.end is not None
+
+    def position(self, ts: Union[str, datetime, float]) -> int:
+        """
+        Locates a timestamp relative to the range.
+
+        Returns:
+            -1 if before start, 1 if after end, 0 if inside the range
+        """
+        if isinstance(ts, str):
+            if _is_plain_iso(ts):
+                if self.start_iso is not None and ts < self.start_iso:
+                    return -1
+                if self.end_iso is not None and ts > self.end_iso:
+                    return 1
+                return 0
+            ts = to_epoch(ts)
+        elif isinstance(ts, datetime):
+            ts = to_epoch(ts)
+
+        if self.start is not None and ts < self.start:
+            return -1
+        if self.end is not None and ts > self.end:
+            return 1
+        return 0
+
+    def contains(self, ts: Union[str, datetime, float]) -> bool:
+        """Checks if a timestamp is inside the range (both bounds inclusive)."""
+        return self.position(ts) == 0
+
+    def __repr__(self):
+        return f"TimeRange(start={self.start_iso!r}, end={self.end_iso!r})"
+
+
 def is_in_range(
     ts: Union[str, datetime], start: Optional[str], end: Optional[str]
 ) -> bool:
     """Checks if a timestamp is in a given range (start and end optional)."""
-    if isinstance(ts, str):
-        ts = parse_iso(ts)
-    if start and ts < parse_iso(start):
-        return False
-    if end and ts > parse_iso(end):
-        return False
-    return True
+    # Prefer building one TimeRange up front when checking many timestamps
+    return TimeRange(start, end).contains(ts)
 
 
 # ========== Internal ==========
 
 
+def _is_plain_iso(ts: str) -> bool:
+    """True for 'YYYY-MM-DDTHH:MM:SS[.ffffff]' strings, which sort chronologically."""
+    return (len(ts) == 19 or len(ts) == 26) and ts[10] == "T" and ts[4] == "-"
+
+
 def _get_timedelta(num: int, unit: str) -> timedelta:
     """Helper to convert unit shorthand to timedelta."""
     if unit == "s":
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Importing tracer opens the database, so point it at a scratch one first
+os.environ.setdefault(
+    "TRACER_DB_URL", f"sqlite:///{tempfile.mkdtemp(prefix='tracer-tests-')}/tracer.db"
+)
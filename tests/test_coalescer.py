@@ -0,0 +1,86 @@
+import time
+from datetime import datetime, timedelta
+from tracer.core.coalescer import EventCoalescer
+
+T0 = datetime(2025, 1, 1)
+
+
+def event(kind, path, seconds=0.0):
+    return {
+        "event": kind,
+        "name": path.rsplit("/", 1)[-1],
+        "is_directory": False,
+        "full_path": path,
+        "timestamp": T0 + timedelta(seconds=seconds),
+    }
+
+
+def test_merges_a_burst_with_first_and_last_timestamps():
+    coalescer = EventCoalescer(window_ms=10_000)
+    for i in range(3):
+        assert coalescer.add(event("modified", "/a", i)) == []
+    (record,) = coalescer.drain()
+    assert record["count"] == 3
+    assert record["first_timestamp"] == T0
+    assert record["timestamp"] == T0 + timedelta(seconds=2)
+    assert not any(key.startswith("_") for key in record)
+
+
+def test_created_wins_over_modified():
+    coalescer = EventCoalescer(window_ms=10_000)
+    coalescer.add(event("modified", "/a"))
+    coalescer.add(event("created", "/a", 1))
+    coalescer.add(event("modified", "/a", 2))
+    (record,) = coalescer.drain()
+    assert record["event"] == "created"
+
+
+def test_transient_policies():
+    for transient, expected in (("drop", []), ("summary", ["transient"])):
+        coalescer = EventCoalescer(window_ms=10_000, transient=transient)
+        coalescer.add(event("created", "/a"))
+        coalescer.add(event("deleted", "/a", 1))
+        assert [record["event"] for record in coalescer.drain()] == expected
+
+
+def test_expire_after_the_window():
+    coalescer = EventCoalescer(window_ms=20)
+    coalescer.add(event("modified", "/a"))
+    assert coalescer.expire() == []
+    time.sleep(0.05)
+    assert [record["full_path"] for record in coalescer.expire()] == ["/a"]
+
+
+def test_pass_through_flushes_only_the_paths_it_touches():
+    coalescer = EventCoalescer(window_ms=10_000)
+    coalescer.add(event("modified", "/src"))
+    coalescer.add(event("modified", "/dst", 1))
+    coalescer.add(event("modified", "/other", 2))
+    ready = coalescer.add(event("moved", "/src", 3), related=("/dst",))
+    assert [(r["event"], r["full_path"]) for r in ready] == [
+        ("modified", "/src"),
+        ("modified", "/dst"),
+        ("moved", "/src"),
+    ]
+    assert coalescer.stats()["pending"] == 1  # /other is still held
+
+
+def test_polled_hands_records_out_from_expire_only():
+    coalescer = EventCoalescer(window_ms=10_000, polled=True)
+    coalescer.add(event("modified", "/a"))
+    assert coalescer.add(event("moved", "/b", 1)) == []
+    assert coalescer.hold() == T0
+    assert [r["full_path"] for r in coalescer.expire()] == ["/b"]
+    assert coalescer.hold() == T0  # /a is still held
+
+    assert coalescer.drain() == []
+    assert [r["full_path"] for r in coalescer.expire()] == ["/a"]
+    assert coalescer.hold() is None
+
+
+def test_hold_follows_the_oldest_last_update():
+    coalescer = EventCoalescer(window_ms=10_000, polled=True)
+    coalescer.add(event("modified", "/a"))
+    coalescer.add(event("modified", "/b", 1))
+    coalescer.add(event("modified", "/a", 2))
+    assert coalescer.hold() == T0 + timedelta(seconds=1)
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from tracer.utils import decode_columnar, dumps_columnar, encode_columnar
+
+
+def round_trip(columns, rows):
+    payload = json.loads(dumps_columnar(columns, rows))
+    assert decode_columnar(payload) == [dict(zip(columns, row)) for row in rows]
+    return payload
+
+
+def test_repeated_strings_use_a_dictionary():
+    rows = [(i, "created" if i % 3 else "deleted") for i in range(6)]
+    payload = round_trip(["id", "event"], rows)
+    assert payload["dictionaries"] == {"event": ["deleted", "created"]}
+    assert [row[1] for row in payload["rows"]] == [0, 1, 1, 0, 1, 1]
+
+
+def test_distinct_paths_share_directory_prefixes():
+    rows = [
+        ("/home/user/project/a.txt",),
+        ("/home/user/project/b.txt",),
+        ("/home/user/project/src/c.py",),
+        ("relative.txt",),
+        (None,),
+    ]
+    payload = round_trip(["full_path"], rows)
+    assert payload["prefixes"] == {
+        "full_path": ["/home/user/project/", "/home/user/project/src/"]
+    }
+    assert payload["rows"][0] == [[0, "a.txt"]]
+    assert payload["rows"][3] == ["relative.txt"]
+
+
+def test_unique_unrelated_strings_are_left_alone():
+    payload = round_trip(["name"], [("a",), ("b",), ("c",)])
+    assert payload["dictionaries"] == {} and payload["prefixes"] == {}
+
+
+def test_nulls_are_kept():
+    rows = [("x", None), (None, None), ("x", 1), ("x", 2)]
+    payload = round_trip(["tag", "value"], rows)
+    assert payload["dictionaries"] == {"tag": ["x"]}
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [("a", 1), (2, 1), ("a", 1), ("a", 1)],  # Mixed types
+        [(b"\x00\x01", 1), (b"\x00\x01", 2)],  # Blobs are sent as hex
+    ],
+)
+def test_non_string_columns_are_not_encoded(rows):
+    payload = json.loads(dumps_columnar(["value", "n"], rows))
+    assert payload["dictionaries"] == {} and payload["prefixes"] == {}
+
+
+def test_repeated_column_names_round_trip():
+    # e.g. SELECT a.name, b.name FROM ... JOIN ...
+    rows = [("a", "/x/1"), ("a", "/x/2"), ("a", "/x/3"), ("b", "/x/4")]
+    rows = [row + (i,) for i, row in enumerate(rows)]
+    payload = round_trip(["name", "name", "id"], rows)
+    assert payload["rows"] == [list(row) for row in rows]
+
+
+def test_no_rows():
+    payload = encode_columnar(["id", "name"], [])
+    assert payload["rows"] == []
+    assert decode_columnar(payload) == []
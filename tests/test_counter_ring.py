@@ -0,0 +1,127 @@
+import pytest
+
+from tracer.core.counter_sampler import CounterRing, parse_dev, parse_snmp
+
+T0 = 1_700_000_000.0
+
+
+def filled(capacity, samples, interval=1.0):
+    """A ring fed samples, a list of {name: value}, one per interval."""
+    ring = CounterRing(capacity)
+    for i, values in enumerate(samples):
+        ring.append(T0 + i * interval, values)
+    return ring
+
+
+def test_first_sample_only_sets_the_baseline():
+    ring = CounterRing(4)
+    assert ring.append(T0, {"eth0.rx_bytes": 100}) == {}
+    assert ring.size == 0
+    assert ring.newest == T0
+    assert ring.rates(T0 - 10) == {}
+
+
+def test_append_returns_the_counters_that_moved():
+    ring = CounterRing(4)
+    ring.append(T0, {"a": 10, "b": 5})
+    assert ring.append(T0 + 1, {"a": 15, "b": 5}) == {"a": 5}
+
+
+def test_rates_are_per_second():
+    ring = filled(8, [{"a": 100 * i} for i in range(4)], interval=0.5)
+    assert ring.rates(T0) == {
+        "a": [(T0 + 0.5, 200.0), (T0 + 1.0, 200.0), (T0 + 1.5, 200.0)]
+    }
+
+
+def test_start_and_end_bound_the_intervals():
+    ring = filled(8, [{"a": i} for i in range(6)])
+    points = ring.rates(T0 + 2, T0 + 4)["a"]
+    assert [timestamp for timestamp, _ in points] == [T0 + 3, T0 + 4]
+
+
+def test_counter_reset_counts_as_no_growth():
+    ring = filled(8, [{"a": 100}, {"a": 150}, {"a": 20}, {"a": 30}])
+    assert [rate for _, rate in ring.rates(T0)["a"]] == [50.0, 0.0, 10.0]
+
+
+def test_names_select_by_prefix():
+    ring = filled(
+        4, [{"eth0.rx_bytes": i, "lo.rx_bytes": i, "Tcp.InSegs": i} for i in range(3)]
+    )
+    assert set(ring.rates(T0, names=["eth0."])) == {"eth0.rx_bytes"}
+    assert set(ring.rates(T0, names=["lo.", "Tcp.InSegs"])) == {
+        "lo.rx_bytes",
+        "Tcp.InSegs",
+    }
+
+
+def test_vanished_and_new_series():
+    ring = filled(8, [{"a": 0}, {"a": 10}, {"b": 100}, {"a": 50, "b": 120}])
+    rates = ring.rates(T0)
+    # "a" vanished for one sample; when it came back its baseline was gone
+    assert [rate for _, rate in rates["a"]] == [10.0, 0.0, 0.0]
+    assert [rate for _, rate in rates["b"]] == [0.0, 0.0, 20.0]
+
+
+def test_step_averages_over_buckets():
+    ring = filled(16, [{"a": i * i} for i in range(7)])
+    # Deltas 1, 3, 5, 7, 9, 11 at T0+1..T0+6; buckets end on multiples of 2 s
+    assert T0 % 2 == 0
+    assert ring.rates(T0, step=2)["a"] == [(T0 + 2, 2.0), (T0 + 4, 6.0), (T0 + 6, 10.0)]
+
+
+def test_wrapping_keeps_the_newest_samples():
+    ring = filled(3, [{"a": 10 * i} for i in range(10)])
+    assert ring.size == 3
+    assert ring.oldest == pytest.approx(T0 + 6)
+    assert [timestamp for timestamp, _ in ring.rates(0)["a"]] == [
+        T0 + 7,
+        T0 + 8,
+        T0 + 9,
+    ]
+    assert ring.covers(T0 + 6)
+    assert not ring.covers(T0 + 5.5)
+
+
+def test_covers_needs_a_sample():
+    ring = CounterRing(3)
+    assert not ring.covers(T0)
+    ring.append(T0, {"a": 1})
+    assert ring.covers(T0)
+    assert not ring.covers(T0 - 1)
+
+
+def test_stats_count_the_arrays():
+    ring = filled(10, [{"a": 1, "b": 2}, {"a": 2, "b": 3}])
+    stats = ring.stats()
+    assert stats["series"] == 2
+    assert stats["bytes"] == 10 * 4 + 2 * 10 * 8
+    assert stats["span_s"] == 1.0
+
+
+def test_parse_dev():
+    data = (
+        "Inter-|   Receive                                                |  Transmit\n"
+        " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n"
+        "    lo:    1000      10    0    0    0     0          0         0     1000      10    0    0    0     0       0          0\n"
+        "  eth0: 2000 20 1 2 0 0 0 0 3000 30 0 4 0 0 0 0\n"
+    )
+    values = parse_dev(data, counters=("rx_bytes", "tx_drop"))
+    assert values == {
+        "lo.rx_bytes": 1000,
+        "lo.tx_drop": 0,
+        "eth0.rx_bytes": 2000,
+        "eth0.tx_drop": 4,
+    }
+
+
+def test_parse_snmp():
+    data = (
+        "Ip: Forwarding DefaultTTL InReceives\n"
+        "Ip: 1 64 500\n"
+        "Tcp: RtoAlgorithm ActiveOpens RetransSegs\n"
+        "Tcp: 1 7 3\n"
+    )
+    values = parse_snmp(data, counters={"Tcp": ["RetransSegs"], "Udp": ["InDatagrams"]})
+    assert values == {"Tcp.RetransSegs": 3}
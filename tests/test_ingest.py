@@ -0,0 +1,90 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from tracer.store.ingest import IngestPipeline
+
+
+def make_pipeline(tmp_path=None, **kwargs):
+    written = []
+    lock = threading.Lock()
+
+    def sink(batch):
+        with lock:
+            written.extend(batch)
+
+    options = {"batch_size": 50, "flush_interval_ms": 10}
+    if tmp_path is not None:
+        options.update(spill_path=tmp_path / "spill", spill_max_bytes=1 << 24)
+    options.update(kwargs)
+    return IngestPipeline(sink, **options), written
+
+
+def test_writes_everything_in_order():
+    pipeline, written = make_pipeline()
+    pipeline.start()
+    for n in range(1000):
+        pipeline.put({"n": n})
+    assert pipeline.flush(10)
+    pipeline.stop()
+    assert [event["n"] for event in written] == list(range(1000))
+    assert all(isinstance(event["timestamp"], datetime) for event in written)
+
+
+def test_spills_past_max_queue_and_keeps_order(tmp_path):
+    pipeline, written = make_pipeline(tmp_path, max_queue=10)
+    for n in range(500):  # Writer thread not started: memory fills up
+        pipeline.put({"n": n})
+    assert pipeline.stats()["spill_pending"] == 490
+    pipeline.start()
+    assert pipeline.flush(10)
+    pipeline.stop()
+    assert [event["n"] for event in written] == list(range(500))
+    assert pipeline.stats()["spilled"] == 490
+
+
+def test_drop_oldest_policy():
+    pipeline, written = make_pipeline(max_queue=10, overflow_policy="drop_oldest")
+    for n in range(25):
+        pipeline.put({"n": n})
+    pipeline.start()
+    assert pipeline.flush(10)
+    pipeline.stop()
+    assert [event["n"] for event in written] == list(range(15, 25))
+    assert pipeline.stats()["dropped"] == 15
+
+
+def test_holds_newer_events_behind_a_ticker():
+    pipeline, written = make_pipeline()
+    old = datetime.utcnow() - timedelta(seconds=60)
+    held = [{"n": "old", "timestamp": old}]
+
+    def ticker():
+        events, held[:] = list(held), []
+        return events
+
+    def hold():
+        return held[0]["timestamp"] if held else None
+
+    # The ticker keeps its old event until the writer thread polls it
+    pipeline.add_ticker(ticker, hold)
+    pipeline.put({"n": "new"})
+    assert pipeline.flush(10)
+    pipeline.remove_ticker(ticker)
+    pipeline.stop()
+    assert [event["n"] for event in written] == ["old", "new"]
+
+
+def test_remove_ticker_polls_it_one_last_time():
+    pipeline, written = make_pipeline()
+    polls = []
+
+    def ticker():
+        polls.append(time.monotonic())
+        return [{"n": len(polls)}] if len(polls) > 1 else []
+
+    pipeline.add_ticker(ticker)
+    time.sleep(0.05)
+    pipeline.remove_ticker(ticker)
+    assert pipeline.flush(10)
+    pipeline.stop()
+    assert len(written) == len(polls) - 1
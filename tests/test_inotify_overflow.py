@@ -0,0 +1,44 @@
+import os
+import struct
+
+import pytest
+
+from tracer.core import inotify_overflow
+
+pytestmark = pytest.mark.skipif(
+    inotify_overflow.Inotify is None, reason="inotify is Linux only"
+)
+
+
+@pytest.fixture
+def fresh_hooks(monkeypatch):
+    monkeypatch.setattr(inotify_overflow, "_installed", False)
+    monkeypatch.setattr(inotify_overflow, "_callbacks", {})
+    Inotify = inotify_overflow.Inotify
+    monkeypatch.setattr(Inotify, "read_events", Inotify.read_events)
+    monkeypatch.setattr(
+        Inotify, "_parse_event_buffer", Inotify.__dict__["_parse_event_buffer"]
+    )
+    return Inotify
+
+
+def test_missing_watchdog_internals_disable_reporting(fresh_hooks, monkeypatch):
+    monkeypatch.delattr(fresh_hooks, "_parse_event_buffer")
+    assert inotify_overflow.on_overflow("/tmp", lambda: None) is False
+    assert inotify_overflow._callbacks == {}
+
+
+def test_overflow_record_calls_back_for_the_watch_being_read(fresh_hooks):
+    calls = []
+    assert inotify_overflow.on_overflow("/watched", lambda: calls.append(1))
+
+    # struct inotify_event: wd, mask, cookie, len, then the name
+    overflow = inotify_overflow.InotifyConstants.IN_Q_OVERFLOW
+    buffer = struct.pack("iIII", -1, overflow, 0, 0)
+    inotify_overflow._reading.path = os.fsencode(os.path.abspath("/watched"))
+    try:
+        records = list(fresh_hooks._parse_event_buffer(buffer))
+    finally:
+        inotify_overflow._reading.path = None
+    assert [mask for _, mask, _, _ in records] == [overflow]
+    assert calls == [1]
@@ -0,0 +1,89 @@
+import json
+import pytest
+from sqlalchemy import create_engine, text
+from tracer.db.paging import PageTokenError, fetch_page
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        connection.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, pid INTEGER)"))
+        connection.execute(
+            text("INSERT INTO t VALUES (1, NULL), (2, NULL), (3, NULL), (4, 7), (5, 3)")
+        )
+        yield connection
+
+
+def fetch_all(connection, sql_query, limit, max_bytes=1 << 20):
+    """Ids of every page's rows, and the last page."""
+    ids, token = [], None
+    while True:
+        page = fetch_page(connection, sql_query, limit, max_bytes, token)
+        ids.extend(json.loads(row)["id"] for row in page.rows)
+        token = page.next_token
+        if token is None:
+            return ids, page
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 10])
+def test_pages_by_id(connection, limit):
+    ids, page = fetch_all(connection, "SELECT * FROM t", limit)
+    assert ids == [1, 2, 3, 4, 5]
+    assert not page.truncated
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_null_sort_values_ascending(connection, limit):
+    ids, page = fetch_all(connection, "SELECT * FROM t ORDER BY pid", limit)
+    assert ids == [1, 2, 3, 5, 4]
+    assert not page.truncated
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_null_sort_values_descending(connection, limit):
+    ids, _ = fetch_all(connection, "SELECT * FROM t ORDER BY pid DESC", limit)
+    assert ids == [4, 5, 3, 2, 1]
+
+
+@pytest.mark.parametrize("limit", [2, 3, 4])
+def test_duplicate_ids_are_not_skipped(connection, limit):
+    sql_query = "SELECT id, pid FROM t UNION ALL SELECT id, pid FROM t"
+    ids, page = fetch_all(connection, sql_query, limit)
+    assert ids == [1, 1, 2, 2, 3, 3, 4, 4, 5, 5]
+    assert not page.truncated
+
+
+def test_page_of_only_duplicates_is_truncated(connection):
+    sql_query = "SELECT id, pid FROM t UNION ALL SELECT id, pid FROM t"
+    page = fetch_page(connection, sql_query, 1, 1 << 20)
+    assert [json.loads(row)["id"] for row in page.rows] == [1]
+    assert page.next_token is None
+    assert page.truncated
+
+
+def test_byte_budget_ends_the_page(connection):
+    page = fetch_page(connection, "SELECT * FROM t", 10, 1)
+    assert len(page.rows) == 1  # A page always holds at least one row
+    assert page.next_token is not None
+
+
+def test_without_id_column_is_truncated(connection):
+    page = fetch_page(connection, "SELECT pid FROM t", 2, 1 << 20)
+    assert len(page.rows) == 2
+    assert page.next_token is None
+    assert page.truncated
+
+
+def test_token_of_another_query_is_rejected(connection):
+    page = fetch_page(connection, "SELECT * FROM t", 2, 1 << 20)
+    with pytest.raises(PageTokenError):
+        fetch_page(
+            connection, "SELECT * FROM t WHERE id > 0", 2, 1 << 20, page.next_token
+        )
+
+
+def test_compact_rows_are_tuples(connection):
+    page = fetch_page(connection, "SELECT * FROM t", 2, 1 << 20, compact=True)
+    assert page.columns == ["id", "pid"]
+    assert page.rows == [(1, None), (2, None)]
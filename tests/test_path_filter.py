@@ -0,0 +1,98 @@
+import pytest
+
+from tracer.core.path_filter import PathFilter
+
+
+def test_no_patterns_allows_everything():
+    path_filter = PathFilter()
+    assert path_filter.is_empty
+    assert path_filter.allows("a/b/c.txt")
+
+
+def test_blank_patterns_are_ignored():
+    path_filter = PathFilter(include=["", "  "], exclude=[""])
+    assert path_filter.is_empty
+    assert path_filter.allows("anything")
+
+
+@pytest.mark.parametrize(
+    "path, allowed",
+    [
+        ("app.log", False),
+        ("deep/dir/app.log", False),
+        ("app.log.txt", True),
+        ("catalog", True),
+    ],
+)
+def test_bare_glob_matches_at_any_depth(path, allowed):
+    assert PathFilter(exclude=["*.log"]).allows(path) is allowed
+
+
+@pytest.mark.parametrize(
+    "path, allowed",
+    [
+        ("node_modules", False),
+        ("node_modules/pkg/index.js", False),
+        ("src/node_modules/pkg/index.js", False),
+        ("node_modules_backup/x", True),
+    ],
+)
+def test_directory_pattern_covers_everything_below(path, allowed):
+    assert PathFilter(exclude=["node_modules/"]).allows(path) is allowed
+
+
+@pytest.mark.parametrize(
+    "path, allowed",
+    [
+        ("build/out.o", False),
+        ("src/build/out.o", True),
+    ],
+)
+def test_pattern_with_slash_is_anchored(path, allowed):
+    assert PathFilter(exclude=["/build"]).allows(path) is allowed
+    assert PathFilter(exclude=["build/out.o"]).allows(path) is allowed
+
+
+def test_star_does_not_cross_directories():
+    path_filter = PathFilter(exclude=["src/*.py"])
+    assert not path_filter.allows("src/main.py")
+    assert path_filter.allows("src/pkg/main.py")
+
+
+def test_double_star_crosses_directories():
+    path_filter = PathFilter(exclude=["src/**/test_*.py"])
+    assert not path_filter.allows("src/test_a.py")
+    assert not path_filter.allows("src/a/b/test_a.py")
+    assert path_filter.allows("lib/test_a.py")
+
+
+def test_character_classes():
+    path_filter = PathFilter(exclude=["file[0-9].txt", "tmp[!a].dat"])
+    assert not path_filter.allows("file7.txt")
+    assert path_filter.allows("fileX.txt")
+    assert not path_filter.allows("tmpb.dat")
+    assert path_filter.allows("tmpa.dat")
+
+
+def test_regex_metacharacters_are_literal():
+    path_filter = PathFilter(exclude=["a+b(1).txt"])
+    assert not path_filter.allows("a+b(1).txt")
+    assert path_filter.allows("aab1.txt")
+
+
+def test_negation_re_includes_and_last_match_wins():
+    path_filter = PathFilter(exclude=["*.log", "!keep.log"])
+    assert not path_filter.allows("drop.log")
+    assert path_filter.allows("keep.log")
+    assert path_filter.allows("logs/keep.log")
+
+    excluded_again = PathFilter(exclude=["*.log", "!keep.log", "keep.*"])
+    assert not excluded_again.allows("keep.log")
+
+
+def test_include_restricts_and_exclude_still_applies():
+    path_filter = PathFilter(include=["src/", "*.md"], exclude=["src/gen/"])
+    assert path_filter.allows("src/main.py")
+    assert path_filter.allows("docs/README.md")
+    assert not path_filter.allows("setup.py")
+    assert not path_filter.allows("src/gen/out.py")
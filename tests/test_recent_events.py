@@ -0,0 +1,144 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from tracer.store.recent_events import RecentEvents, decode_cursor, encode_cursor
+
+T0 = datetime(2025, 1, 1)
+
+
+def rows_at(*seconds, first_id=1):
+    return [
+        {"id": first_id + i, "timestamp": T0 + timedelta(seconds=s)}
+        for i, s in enumerate(seconds)
+    ]
+
+
+def key(row):
+    return row["timestamp"], row["id"]
+
+
+def ring_with_known_floor(capacity, table):
+    """A ring fed every row of table, with the floor looked up as the DB would."""
+    ring = RecentEvents(capacity)
+    ring.extend(table)
+    epoch, min_id = ring.floor_lookup()
+    older = [row["timestamp"] for row in table if min_id is None or row["id"] < min_id]
+    ring.set_floor(epoch, max(older, default=None))
+    return ring
+
+
+def newest_first(table, limit, before=None):
+    rows = sorted(table, key=key, reverse=True)
+    if before is not None:
+        rows = [row for row in rows if key(row) < before]
+    return rows[:limit]
+
+
+def oldest_first(table, limit, after):
+    return [row for row in sorted(table, key=key) if key(row) > after][:limit]
+
+
+def test_cursor_round_trip():
+    row = {"id": 42, "timestamp": T0 + timedelta(microseconds=5)}
+    assert decode_cursor(encode_cursor(row)) == key(row)
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_unknown_floor_always_misses():
+    ring = RecentEvents(4)
+    ring.extend(rows_at(1, 2))
+    assert ring.page(10) is None
+    assert ring.misses == 1
+
+
+def test_empty_table_serves_everything_from_the_ring():
+    ring = RecentEvents(4)
+    ring.reset(empty=True)
+    ring.extend(rows_at(1, 2, 3))
+    assert [row["id"] for row in ring.page(10)] == [3, 2, 1]
+    assert [
+        row["id"] for row in ring.page(2, before=(T0 + timedelta(seconds=3), 3))
+    ] == [2, 1]
+    assert [row["id"] for row in ring.page(10, after=(T0, 0))] == [1, 2, 3]
+
+
+def test_eviction_raises_the_floor_and_short_pages_miss():
+    ring = RecentEvents(3)
+    ring.reset(empty=True)
+    ring.extend(rows_at(1, 2, 3, 4, 5))
+    assert ring.floor == T0 + timedelta(seconds=2)
+    assert [row["id"] for row in ring.page(3)] == [5, 4, 3]
+    # A fourth row would come from the table
+    assert ring.page(4) is None
+    # An after-cursor at or below the floor may skip table rows
+    assert ring.page(10, after=(T0 + timedelta(seconds=2), 2)) is None
+    assert [
+        row["id"] for row in ring.page(10, after=(T0 + timedelta(seconds=3), 3))
+    ] == [4, 5]
+
+
+def test_table_rows_tied_with_the_floor_sort_after_ring_rows():
+    # id 1 is only in the table and shares its timestamp with ring rows 2 and 3
+    table = rows_at(5, 5, 5, 1)
+    ring = ring_with_known_floor(3, table)
+    assert ring.floor == T0 + timedelta(seconds=5)
+    assert [row["id"] for row in ring.page(2)] == [3, 2]
+    # Row 1 comes next, before row 4, so the ring cannot answer
+    assert ring.page(3) is None
+
+
+def test_evictions_during_floor_lookup_are_kept():
+    ring = RecentEvents(2)
+    ring.extend(rows_at(1, 2))
+    epoch, min_id = ring.floor_lookup()
+    assert min_id == 1
+    ring.extend(rows_at(3, first_id=3))  # Evicts id 1 before the lookup returns
+    ring.set_floor(epoch, None)
+    assert ring.floor == T0 + timedelta(seconds=1)
+
+
+def test_stale_floor_lookup_is_discarded_after_reset():
+    ring = RecentEvents(2)
+    epoch, _ = ring.floor_lookup()
+    ring.reset()
+    ring.set_floor(epoch, None)
+    assert not ring.floor_known
+
+
+def test_discard_older_drops_rows_below_the_cutoff():
+    ring = RecentEvents(4)
+    ring.reset(empty=True)
+    ring.extend(rows_at(1, 2, 3))
+    ring.discard_older(T0 + timedelta(seconds=2))
+    assert ring.size == 2
+    assert [row["id"] for row in ring.page(10)] == [3, 2]
+
+
+@pytest.mark.parametrize("capacity", [8, 16, 64])
+@pytest.mark.parametrize("seed", range(10))
+def test_served_pages_match_the_table(seed, capacity):
+    rng = random.Random(seed)
+    # Clustered, repeated and slightly out-of-order timestamps
+    table = rows_at(*(rng.choice(range(3)) + i // 3 for i in range(40)))
+    ring = ring_with_known_floor(capacity, table)
+
+    cursors = [None] + [key(row) for row in table]
+    served = 0
+    for cursor in cursors:
+        limit = rng.randint(1, 12)
+        page = ring.page(limit, before=cursor)
+        if page is not None:
+            served += 1
+            assert page == newest_first(table, limit, cursor)
+        if cursor is not None:
+            page = ring.page(limit, after=cursor)
+            if page is not None:
+                served += 1
+                assert page == oldest_first(table, limit, cursor)
+    assert served
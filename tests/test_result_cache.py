@@ -0,0 +1,121 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from tracer.db.result_cache import (
+    SCHEMA,
+    ResultCache,
+    WriteGenerations,
+    normalize_sql,
+    tables_read,
+    track_writes,
+)
+
+
+@pytest.mark.parametrize(
+    "sql, tables",
+    [
+        ("SELECT * FROM file_system", {"file_system"}),
+        ('select * from "FILE_SYSTEM" where id = 1', {"file_system"}),
+        ("SELECT * FROM main.[network]", {"network"}),
+        ("SELECT * FROM network_events", {"network"}),
+        ("SELECT * FROM network a, file_system b", {"network", "file_system"}),
+        (
+            "SELECT * FROM network WHERE id IN (SELECT id FROM network_flows)",
+            {"network", "network_flows"},
+        ),
+        (
+            "WITH recent AS (SELECT * FROM file_system) SELECT * FROM recent",
+            {"file_system"},
+        ),
+        ("SELECT 'from nowhere' FROM network", {"network"}),
+        ("SELECT name FROM sqlite_master", set()),
+    ],
+)
+def test_tables_read(sql, tables):
+    assert tables_read(sql) == tables | {SCHEMA}
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM unknown_table",
+        "SELECT * FROM file_system JOIN unknown_table USING (id)",
+        "SELECT random() FROM file_system",
+        "SELECT * FROM file_system WHERE timestamp > CURRENT_TIMESTAMP",
+        "SELECT * FROM json_each('[1, 2]')",
+        'SELECT "from nowhere" FROM network',
+    ],
+)
+def test_tables_read_gives_up(sql):
+    assert tables_read(sql) is None
+
+
+def test_normalize_sql_keeps_literals():
+    sql = "SELECT  *\n FROM file_system\tWHERE name = 'a   b' ;"
+    assert normalize_sql(sql) == "SELECT * FROM file_system WHERE name = 'a   b'"
+
+
+def test_committed_writes_bump_generations_and_rollbacks_do_not():
+    engine = create_engine("sqlite://")
+    track_writes(engine)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE cache_test_t (id INTEGER)"))
+    before = WriteGenerations.snapshot(["cache_test_t"])
+
+    with engine.connect() as connection:
+        connection.execute(text('INSERT INTO main."Cache_Test_T" VALUES (1)'))
+        connection.rollback()
+    assert WriteGenerations.snapshot(["cache_test_t"]) == before
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE cache_test_t SET id = 2"))
+    assert WriteGenerations.snapshot(["cache_test_t"]) != before
+
+
+def test_get_serves_until_a_read_table_is_written():
+    cache = ResultCache(max_bytes=1000, max_entry_bytes=100)
+    generations = WriteGenerations.snapshot(["cache_test_a", "cache_test_b"])
+    cache.put("key", generations, "result")
+    assert cache.get("key") == "result"
+
+    WriteGenerations.bump(["cache_test_other"])
+    assert cache.get("key") == "result"
+
+    WriteGenerations.bump(["cache_test_b"])
+    assert cache.get("key") is None
+    assert cache.stale == 1
+    assert cache.bytes == 0
+
+
+def test_least_recently_used_entries_are_evicted_by_size():
+    cache = ResultCache(max_bytes=10, max_entry_bytes=10)
+    for key in "abc":
+        cache.put(key, (), key * 4)
+    # Only two 4-byte results fit: "a" went first
+    assert cache.get("a") is None
+    assert cache.get("b") == "bbbb"
+    cache.put("d", (), "dddd")
+    # "b" was used more recently than "c"
+    assert cache.get("c") is None
+    assert cache.get("b") == "bbbb"
+    assert cache.bytes == 8
+    assert cache.evictions == 2
+
+
+def test_oversized_results_and_disabled_cache_store_nothing():
+    cache = ResultCache(max_bytes=100, max_entry_bytes=3)
+    cache.put("big", (), "four")
+    assert cache.get("big") is None
+    assert cache.too_large == 1
+
+    disabled = ResultCache(max_bytes=0)
+    disabled.put("key", (), "x")
+    assert disabled.get("key") is None
+
+
+def test_replacing_a_key_keeps_the_byte_count():
+    cache = ResultCache(max_bytes=100, max_entry_bytes=100)
+    cache.put("key", (), "abc")
+    cache.put("key", (), "abcdef")
+    assert cache.get("key") == "abcdef"
+    assert cache.bytes == 6
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tracer.utils.timestamp import TimeRange, is_in_range
+
+START = "2025-01-01T08:00:00"
+END = "2025-01-01T09:00:00"
+
+
+def test_unbounded_range_contains_everything():
+    time_range = TimeRange()
+    assert not time_range.is_bounded
+    assert time_range.contains("1970-01-01T00:00:00")
+    assert time_range.contains(datetime(2999, 1, 1))
+
+
+def test_bounds_are_normalized_to_naive_utc():
+    time_range = TimeRange("2025-01-01T10:00:00+02:00", END + "+00:00")
+    assert time_range.start_dt == datetime(2025, 1, 1, 8)
+    assert time_range.end_dt == datetime(2025, 1, 1, 9)
+    assert time_range.start_iso == START
+    assert time_range.start == datetime(2025, 1, 1, 8, tzinfo=timezone.utc).timestamp()
+
+
+@pytest.mark.parametrize(
+    "ts, position",
+    [
+        ("2025-01-01T07:59:59.999999", -1),
+        (START, 0),
+        ("2025-01-01T08:30:00.250000", 0),
+        (END, 0),
+        ("2025-01-01T09:00:00.000001", 1),
+    ],
+)
+def test_plain_iso_strings_compare_with_inclusive_bounds(ts, position):
+    assert TimeRange(START, END).position(ts) == position
+
+
+@pytest.mark.parametrize(
+    "ts, position",
+    [
+        ("2025-01-01T09:30:00+02:00", -1),
+        ("2025-01-01T09:30:00+01:00", 0),
+        (datetime(2025, 1, 1, 8, 30), 0),
+        (datetime(2025, 1, 1, 10, 30, tzinfo=timezone(timedelta(hours=2))), 0),
+        (datetime(2025, 1, 1, 9, 0, 1, tzinfo=timezone.utc), 1),
+        (datetime(2025, 1, 1, 8, tzinfo=timezone.utc).timestamp(), 0),
+        (datetime(2025, 1, 1, 8, tzinfo=timezone.utc).timestamp() - 1, -1),
+    ],
+)
+def test_offsets_datetimes_and_epochs_agree_with_the_bounds(ts, position):
+    assert TimeRange(START, END).position(ts) == position
+
+
+def test_half_open_ranges():
+    assert TimeRange(start=START).position("2999-01-01T00:00:00") == 0
+    assert TimeRange(end=END).position("1970-01-01T00:00:00") == 0
+    assert TimeRange(end=END).is_bounded
+
+
+def test_fuzzy_bounds_are_fixed_when_the_range_is_built():
+    time_range = TimeRange("5m")
+    start = time_range.start_dt
+    now = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+    assert timedelta(minutes=4) < now - start < timedelta(minutes=6)
+    assert time_range.contains(now)
+    assert not time_range.contains(now - timedelta(minutes=6))
+
+
+def test_is_in_range_matches_time_range():
+    assert is_in_range("2025-01-01T08:30:00", START, END)
+    assert not is_in_range("2025-01-01T09:30:00", START, END)
+    assert is_in_range("2025-01-01T09:30:00", None, None)